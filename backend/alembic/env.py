@@ -1,36 +1,40 @@
-from logging.config import fileConfig
-from sqlalchemy import engine_from_config, pool
-from alembic import context
-import os
-
-config = context.config
-fileConfig(config.config_file_name)
-
-def get_url():
-    return os.getenv("DATABASE_URL")
-
-config.set_main_option("sqlalchemy.url", get_url())
-
-from app.models import Base
-target_metadata = Base.metadata
-
-def run_migrations_offline():
-    context.configure(url=get_url(), target_metadata=target_metadata, literal_binds=True)
-    with context.begin_transaction():
-        context.run_migrations()
-
-def run_migrations_online():
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
-    with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
-        with context.begin_transaction():
-            context.run_migrations()
-
-if context.is_offline_mode():
-    run_migrations_offline()
-else:
+from logging.config import fileConfig
+from sqlalchemy import pool
+from alembic import context
+import os
+
+config = context.config
+fileConfig(config.config_file_name)
+
+def get_url():
+    from app.database import DATABASE_URL
+    return os.getenv("DATABASE_URL", DATABASE_URL)
+
+config.set_main_option("sqlalchemy.url", get_url())
+
+from app.models import Base
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    context.configure(url=get_url(), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    from app.database import create_db_engine
+    # Same connect options and SQLite pragmas as the app, without pooling
+    connectable = create_db_engine(get_url(), name="alembic", poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        # SQLite can only alter tables by copying them, which batch mode handles
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
     run_migrations_online() 
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""Initial schema: users, issues and daily_stats
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-07-14 00:00:00
+
+Databases created earlier with init_db.py already have these tables; mark
+them as migrated with `alembic stamp 0001` before upgrading.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ISSUE_STATUSES = ("OPEN", "TRIAGED", "IN_PROGRESS", "DONE")
+
+
+def issue_status_enum(create_type: bool = True):
+    # daily_stats reuses the Postgres type created for issues.status
+    enum = sa.Enum(*ISSUE_STATUSES, name="issuestatus")
+    if create_type:
+        return enum
+    return enum.with_variant(postgresql.ENUM(*ISSUE_STATUSES, name="issuestatus", create_type=False), "postgresql")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=True),
+        sa.Column("oauth_provider", sa.String(), nullable=True),
+        sa.Column("oauth_id", sa.String(), nullable=True),
+        sa.Column("role", sa.Enum("ADMIN", "MAINTAINER", "REPORTER", name="userrole"), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+    )
+    op.create_table(
+        "issues",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("file_path", sa.String(), nullable=True),
+        sa.Column("severity", sa.Enum("LOW", "MEDIUM", "HIGH", "CRITICAL", name="issueseverity"), nullable=True),
+        sa.Column("status", issue_status_enum(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("reporter_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["reporter_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_issues_id", "issues", ["id"])
+    op.create_index("ix_issues_title", "issues", ["title"])
+    op.create_table(
+        "daily_stats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.DateTime(), nullable=False),
+        sa.Column("status", issue_status_enum(create_type=False), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_stats")
+    op.drop_index("ix_issues_title", table_name="issues")
+    op.drop_index("ix_issues_id", table_name="issues")
+    op.drop_table("issues")
+    op.drop_table("users")
+    if op.get_bind().dialect.name == "postgresql":
+        for name in ("issuestatus", "issueseverity", "userrole"):
+            op.execute(f"DROP TYPE IF EXISTS {name}")
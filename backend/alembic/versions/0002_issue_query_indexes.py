@@ -0,0 +1,44 @@
+"""Indexes for the hot issue queries and unique daily_stats (date, status)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-07-14 00:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_issues_reporter_id_created_at", "issues", ["reporter_id", "created_at"])
+    op.create_index("ix_issues_status_created_at", "issues", ["status", "created_at"])
+    op.create_index("ix_issues_created_at_id", "issues", ["created_at", "id"])
+    op.create_index("ix_issues_updated_at", "issues", ["updated_at"])
+
+    # Racing upserts may have left duplicate rollups; keep the newest of each
+    op.execute(
+        "DELETE FROM daily_stats WHERE id NOT IN "
+        "(SELECT max_id FROM (SELECT MAX(id) AS max_id FROM daily_stats GROUP BY date, status) AS latest)"
+    )
+    with op.batch_alter_table("daily_stats") as batch_op:
+        batch_op.create_unique_constraint("uq_daily_stats_date_status", ["date", "status"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("daily_stats") as batch_op:
+        batch_op.drop_constraint("uq_daily_stats_date_status", type_="unique")
+    op.drop_index("ix_issues_updated_at", table_name="issues")
+    op.drop_index("ix_issues_created_at_id", table_name="issues")
+    op.drop_index("ix_issues_status_created_at", table_name="issues")
+    op.drop_index("ix_issues_reporter_id_created_at", table_name="issues")
@@ -0,0 +1,42 @@
+"""Change feed: (updated_at, id) index and deleted_issues tombstones
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-07-28 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The feed pages by (updated_at, id); the composite index also serves updated_since
+    op.create_index("ix_issues_updated_at_id", "issues", ["updated_at", "id"])
+    op.drop_index("ix_issues_updated_at", table_name="issues")
+    op.create_table(
+        "deleted_issues",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("issue_id", sa.Integer(), nullable=False),
+        sa.Column("reporter_id", sa.Integer(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_deleted_issues_deleted_at_id", "deleted_issues", ["deleted_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_deleted_issues_deleted_at_id", table_name="deleted_issues")
+    op.drop_table("deleted_issues")
+    op.create_index("ix_issues_updated_at", "issues", ["updated_at"])
+    op.drop_index("ix_issues_updated_at_id", table_name="issues")
@@ -0,0 +1,80 @@
+"""Issue status/severity history and its per-day duration rollups
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-08-25 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ISSUE_STATUSES = ("OPEN", "TRIAGED", "IN_PROGRESS", "DONE")
+ISSUE_SEVERITIES = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+
+def existing_enum(values, name):
+    # The Postgres types were created with the issues table in 0001
+    return sa.Enum(*values, name=name).with_variant(postgresql.ENUM(*values, name=name, create_type=False), "postgresql")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "issue_transitions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("issue_id", sa.Integer(), nullable=False),
+        sa.Column("from_status", existing_enum(ISSUE_STATUSES, "issuestatus"), nullable=True),
+        sa.Column("to_status", existing_enum(ISSUE_STATUSES, "issuestatus"), nullable=False),
+        sa.Column("from_severity", existing_enum(ISSUE_SEVERITIES, "issueseverity"), nullable=True),
+        sa.Column("to_severity", existing_enum(ISSUE_SEVERITIES, "issueseverity"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sa.Column("changed_by_id", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_issue_transitions_issue_id_id", "issue_transitions", ["issue_id", "id"])
+    op.create_table(
+        "status_duration_stats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.DateTime(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("status", existing_enum(ISSUE_STATUSES, "issuestatus"), nullable=False),
+        sa.Column("severity", existing_enum(ISSUE_SEVERITIES, "issueseverity"), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("total_seconds", sa.Float(), nullable=False),
+        sa.Column("histogram", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("date", "kind", "status", "severity", name="uq_status_duration_stats_key"),
+    )
+    op.create_table(
+        "aggregation_cursors",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("last_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    # Baseline row per existing issue: its current status and severity, known
+    # to hold since its last update, so the next change can be timed
+    op.execute(
+        "INSERT INTO issue_transitions (issue_id, to_status, to_severity, created_at, changed_at) "
+        "SELECT id, status, coalesce(severity, 'LOW'), created_at, coalesce(updated_at, created_at) "
+        "FROM issues WHERE status IS NOT NULL AND created_at IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("aggregation_cursors")
+    op.drop_table("status_duration_stats")
+    op.drop_index("ix_issue_transitions_issue_id_id", table_name="issue_transitions")
+    op.drop_table("issue_transitions")
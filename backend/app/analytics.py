@@ -0,0 +1,287 @@
+"""
+Dashboard trends computed with NumPy over an in-memory column cache of `issues`.
+
+IssueArrayCache keeps id, created_at, updated_at, status, severity and
+reporter_id of every issue as parallel arrays sorted by id (timestamps as
+epoch seconds, enums as small integer codes), loaded with one SELECT of just
+those columns; the database returns the timestamps as integers, which is
+several times faster than converting datetime objects.  After that it
+refreshes incrementally the way the change feed does: issues with
+(updated_at, id) past the last position, rewound by CHANGE_FEED_OVERLAP,
+replace their old entries, and deletion tombstones remove theirs.  A refresh happens on the next read after an issue event
+reaches this process, or once ANALYTICS_MAX_AGE has passed; the whole cache
+is reloaded every ANALYTICS_RELOAD_SECONDS (which must stay below the
+tombstone retention).
+
+Each refresh builds new arrays, so the computations below run on an
+immutable snapshot in a worker thread.
+"""
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+import asyncio
+import os
+import time
+import numpy as np
+from sqlalchemy import BigInteger, cast, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .changes import rewind
+from .models import DeletedIssue, Issue, IssueSeverity, IssueStatus
+from .realtime import manager
+from .response_cache import INVALIDATING_EVENTS
+from .schemas import AgePercentilesOut, TrendDayOut
+from .stats import CLOSED_STATUSES
+
+# Seconds a cached snapshot is served without checking for changes no event announced
+ANALYTICS_MAX_AGE = float(os.getenv("ANALYTICS_MAX_AGE", "30"))
+# Seconds between full reloads that drop any drift from incremental refreshes
+ANALYTICS_RELOAD_SECONDS = float(os.getenv("ANALYTICS_RELOAD_SECONDS", "3600"))
+
+STATUSES = list(IssueStatus)
+SEVERITIES = list(IssueSeverity)
+CLOSED_CODES = np.array([STATUSES.index(status) for status in CLOSED_STATUSES], dtype=np.int8)
+DAY_SECONDS = 86400
+EPOCH = datetime(1970, 1, 1)
+
+@dataclass(frozen=True)
+class IssueArrays:
+    """Column arrays of the cached issues, sorted by id; reporter -1 stands for none"""
+    id: np.ndarray
+    created: np.ndarray
+    updated: np.ndarray
+    status: np.ndarray
+    severity: np.ndarray
+    reporter: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "IssueArrays":
+        return cls(*(np.empty(0, dtype=dtype) for dtype in (np.int64, np.int64, np.int64, np.int8, np.int8, np.int64)))
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def take(self, index) -> "IssueArrays":
+        """Subset by boolean mask or index array"""
+        return IssueArrays(*(getattr(self, f.name)[index] for f in fields(self)))
+
+    @classmethod
+    def concat(cls, *parts: "IssueArrays") -> "IssueArrays":
+        return cls(*(np.concatenate([getattr(part, f.name) for part in parts]) for f in fields(cls)))
+
+def epoch_column(dialect: str, column):
+    """`column` as integer epoch seconds computed in SQL, or unchanged where that is not supported"""
+    if dialect == "postgresql":
+        return cast(func.extract("epoch", column), BigInteger)
+    if dialect == "sqlite":
+        return cast(func.strftime("%s", column), BigInteger)
+    return column
+
+def epoch_seconds(values: Iterable) -> np.ndarray:
+    """Epoch seconds from integers or (naive UTC) datetimes"""
+    values = list(values)
+    if values and isinstance(values[0], datetime):
+        return np.array(values, dtype="datetime64[s]").astype(np.int64)
+    return np.array(values, dtype=np.int64)
+
+def from_epoch(seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=int(seconds))
+
+def day_number(day: date) -> int:
+    return (day - EPOCH.date()).days
+
+def arrays_from_rows(rows: list) -> IssueArrays:
+    """Columns of (id, created_at, updated_at, status, severity, reporter_id) rows, sorted by id"""
+    if not rows:
+        return IssueArrays.empty()
+    ids, created, updated, statuses, severities, reporters = zip(*rows)
+    status_codes = {status: code for code, status in enumerate(STATUSES)}
+    # Issue.severity is nullable on rows that predate its default; count those as LOW
+    severity_codes = {None: 0, **{severity: code for code, severity in enumerate(SEVERITIES)}}
+    arrays = IssueArrays(
+        id=np.array(ids, dtype=np.int64),
+        created=epoch_seconds(created),
+        updated=epoch_seconds(updated),
+        status=np.fromiter((status_codes[status] for status in statuses), dtype=np.int8, count=len(rows)),
+        severity=np.fromiter((severity_codes[severity] for severity in severities), dtype=np.int8, count=len(rows)),
+        reporter=np.fromiter((-1 if reporter is None else reporter for reporter in reporters), dtype=np.int64, count=len(rows)),
+    )
+    return arrays.take(np.argsort(arrays.id, kind="stable"))
+
+def merge_changes(base: IssueArrays, changed: IssueArrays, deleted_ids: np.ndarray, deleted_at: np.ndarray) -> IssueArrays:
+    """Apply tombstones, then replace or add changed rows; returns new arrays.
+
+    A tombstone only removes a cached row it is newer than, since SQLite may
+    reuse the id of a deleted issue for a later one.
+    """
+    if len(deleted_ids) and len(base):
+        pos = np.minimum(np.searchsorted(base.id, deleted_ids), len(base) - 1)
+        hit = (base.id[pos] == deleted_ids) & (base.updated[pos] <= deleted_at)
+        keep = np.ones(len(base), dtype=bool)
+        keep[pos[hit]] = False
+        base = base.take(keep)
+    if len(changed):
+        merged = IssueArrays.concat(base.take(~np.isin(base.id, changed.id)), changed)
+        base = merged.take(np.argsort(merged.id, kind="stable"))
+    return base
+
+def issue_columns(db: Session) -> tuple:
+    dialect = db.get_bind().dialect.name
+    return (
+        Issue.id,
+        epoch_column(dialect, Issue.created_at),
+        epoch_column(dialect, func.coalesce(Issue.updated_at, Issue.created_at)),
+        Issue.status,
+        Issue.severity,
+        Issue.reporter_id,
+    )
+
+class IssueArrayCache:
+    """Per-process column cache of `issues` for the analytics endpoints"""
+
+    def __init__(self, max_age: float = ANALYTICS_MAX_AGE, reload_seconds: float = ANALYTICS_RELOAD_SECONDS):
+        self.max_age = max_age
+        self.reload_seconds = reload_seconds
+        self.arrays = IssueArrays.empty()
+        self.generation = 0
+        self.loaded_generation = -1
+        self.position = None
+        self.tombstone_position = None
+        self.loaded_at: Optional[datetime] = None
+        self.refreshed_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def on_event(self, message: dict):
+        if message.get("type") in INVALIDATING_EVENTS:
+            self.mark_changed()
+
+    def mark_changed(self):
+        """Refresh (incrementally) on the next read"""
+        self.generation += 1
+
+    def invalidate(self):
+        """Force a full reload on the next read"""
+        self.loaded_at = None
+        self.generation += 1
+
+    def is_stale(self) -> bool:
+        return self.loaded_generation != self.generation or time.monotonic() - self.refreshed_at > self.max_age
+
+    async def get(self, db: AsyncSession) -> IssueArrays:
+        """Current snapshot, refreshed first if an event or ANALYTICS_MAX_AGE says it may be out of date.
+
+        Rows are read on the session's connection; turning them into arrays
+        happens in a worker thread so a full reload does not block the loop.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self.is_stale():
+            async with self._lock:
+                if self.is_stale():
+                    now = datetime.utcnow()
+                    generation = self.generation
+                    fetched = await db.run_sync(self.fetch, now)
+                    await asyncio.to_thread(self.apply, fetched, now)
+                    self._mark_loaded(generation)
+        return self.arrays
+
+    def refresh(self, db: Session, now: Optional[datetime] = None) -> IssueArrays:
+        """Bring the arrays up to date synchronously (worker threads, tests)"""
+        now = now or datetime.utcnow()
+        generation = self.generation
+        self.apply(self.fetch(db, now), now)
+        self._mark_loaded(generation)
+        return self.arrays
+
+    def _mark_loaded(self, generation: int):
+        self.loaded_generation = generation
+        self.refreshed_at = time.monotonic()
+
+    def fetch(self, db: Session, now: datetime) -> tuple:
+        """(full, issue rows, tombstone rows): everything when a reload is due, else changes since the positions"""
+        query = select(*issue_columns(db)).where(Issue.created_at.isnot(None), Issue.status.isnot(None))
+        if self.loaded_at is None or (now - self.loaded_at).total_seconds() > self.reload_seconds:
+            return True, db.execute(query).all(), []
+        updated_at = func.coalesce(Issue.updated_at, Issue.created_at)
+        changed_rows = db.execute(query.where(tuple_(updated_at, Issue.id) > rewind(self.position, now))).all()
+        tombstones = db.execute(
+            select(DeletedIssue.id, DeletedIssue.issue_id, DeletedIssue.deleted_at)
+            .where(tuple_(DeletedIssue.deleted_at, DeletedIssue.id) > rewind(self.tombstone_position, now))
+        ).all()
+        return False, changed_rows, tombstones
+
+    def apply(self, fetched: tuple, now: datetime):
+        full, rows, tombstones = fetched
+        if full:
+            # Positions start at the read, so changes committed while it ran
+            # are picked up again by the next incremental refresh
+            self.position = (now, 0)
+            self.tombstone_position = (now, 0)
+            self.arrays = arrays_from_rows(rows)
+            self.loaded_at = now
+            return
+        changed = arrays_from_rows(rows)
+        if len(changed):
+            latest = int(np.argmax(changed.updated))
+            # Whole seconds: rounding down only re-reads part of a second
+            self.position = max(self.position, (from_epoch(changed.updated[latest]), int(changed.id[latest])))
+        if tombstones:
+            self.tombstone_position = max(self.tombstone_position, max((row[2], row[0]) for row in tombstones))
+        if len(changed) or tombstones:
+            self.arrays = merge_changes(
+                self.arrays,
+                changed,
+                np.array([row[1] for row in tombstones], dtype=np.int64),
+                epoch_seconds(row[2] for row in tombstones),
+            )
+
+issue_arrays = IssueArrayCache()
+manager.add_listener(issue_arrays.on_event)
+
+def filter_arrays(arrays: IssueArrays, severities: Optional[Iterable[IssueSeverity]] = None,
+                  reporter_id: Optional[int] = None) -> IssueArrays:
+    mask = np.ones(len(arrays), dtype=bool)
+    if severities:
+        mask &= np.isin(arrays.severity, [SEVERITIES.index(severity) for severity in severities])
+    if reporter_id is not None:
+        mask &= arrays.reporter == reporter_id
+    return arrays if mask.all() else arrays.take(mask)
+
+def daily_trends(arrays: IssueArrays, start: date, end: date) -> List[TrendDayOut]:
+    """Opened, closed and end-of-day backlog for each day in [start, end].
+
+    An issue counts as closed on the day of its last update if its current
+    status is closed; the backlog is every issue created so far minus those.
+    """
+    first, days = day_number(start), (end - start).days + 1
+    created_day = arrays.created // DAY_SECONDS - first
+    closed_day = arrays.updated[np.isin(arrays.status, CLOSED_CODES)] // DAY_SECONDS - first
+
+    def per_day(day_index: np.ndarray) -> np.ndarray:
+        return np.bincount(day_index[(day_index >= 0) & (day_index < days)], minlength=days)
+
+    opened, closed = per_day(created_day), per_day(closed_day)
+    carried = np.count_nonzero(created_day < 0) - np.count_nonzero(closed_day < 0)
+    backlog = carried + np.cumsum(opened - closed)
+    return [
+        TrendDayOut(date=(start + timedelta(days=i)).isoformat(), opened=int(o), closed=int(c), backlog=int(b))
+        for i, (o, c, b) in enumerate(zip(opened.tolist(), closed.tolist(), backlog.tolist()))
+    ]
+
+def age_percentiles(arrays: IssueArrays, now: datetime) -> List[AgePercentilesOut]:
+    """Age of open issues per severity: count, p50/p90/p99 and oldest, in seconds"""
+    open_issues = arrays.take(~np.isin(arrays.status, CLOSED_CODES))
+    ages = (np.datetime64(now, "s").astype(np.int64) - open_issues.created).astype(np.float64)
+    order = np.lexsort((ages, open_issues.severity))
+    ages, severity = ages[order], open_issues.severity[order]
+    bounds = np.searchsorted(severity, np.arange(len(SEVERITIES) + 1))
+    result = []
+    for code, level in enumerate(SEVERITIES):
+        group = ages[bounds[code]:bounds[code + 1]]
+        if len(group):
+            p50, p90, p99 = np.percentile(group, [50, 90, 99]).tolist()
+            result.append(AgePercentilesOut(severity=level, open_issues=len(group), p50_seconds=p50,
+                                            p90_seconds=p90, p99_seconds=p99, max_seconds=float(group[-1])))
+        else:
+            result.append(AgePercentilesOut(severity=level, open_issues=0))
+    return result
@@ -0,0 +1,151 @@
+"""
+Issue attachments stored on disk by content.
+
+An upload is streamed from the request body into a temporary file while its
+SHA-256 is computed, then renamed to ATTACHMENT_DIR/sha256/ab/cd/<digest>.
+Identical files therefore share one blob however often they are attached;
+the `attachments` rows carry the per-upload name and type.  Hashing and disk
+writes run in a worker thread one ATTACHMENT_WRITE_BUFFER block at a time, so
+large uploads neither sit in memory nor hold up the event loop.
+
+Blobs are never deleted inline (a concurrent upload of the same content could
+be about to reference them); the worker removes blobs no row references once
+they are older than ATTACHMENT_GC_GRACE_HOURS.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Iterator, Optional
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .models import Attachment
+
+ATTACHMENT_DIR = os.path.abspath(os.getenv("ATTACHMENT_DIR", "./attachments"))
+ATTACHMENT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", str(100 * 1024 * 1024)))
+# Bytes gathered from the request before one hash+write hop to a thread
+ATTACHMENT_WRITE_BUFFER = int(os.getenv("ATTACHMENT_WRITE_BUFFER", str(1024 * 1024)))
+# Read size when a download is streamed rather than sent by the server itself
+ATTACHMENT_READ_CHUNK = int(os.getenv("ATTACHMENT_READ_CHUNK", str(256 * 1024)))
+# Unreferenced blobs younger than this are kept, covering uploads still in flight
+ATTACHMENT_GC_GRACE_HOURS = float(os.getenv("ATTACHMENT_GC_GRACE_HOURS", "24"))
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+
+def storage_key(sha256: str) -> str:
+    """Path of a blob relative to ATTACHMENT_DIR; also what Issue.file_path holds"""
+    return f"sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(ATTACHMENT_DIR, storage_key(sha256))
+
+def sanitize_filename(filename: Optional[str]) -> str:
+    """Keep only the base name, without control or path characters"""
+    name = os.path.basename((filename or "").replace("\\", "/"))
+    name = re.sub(r"[\x00-\x1f\x7f/]", "", name).strip().lstrip(".")
+    return name[:255] or "attachment"
+
+def sanitize_content_type(content_type: Optional[str]) -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if re.fullmatch(r"[a-z0-9][a-z0-9!#$&^_.+-]*/[a-z0-9][a-z0-9!#$&^_.+-]*", content_type):
+        return content_type
+    return "application/octet-stream"
+
+def check_declared_size(content_length: Optional[str], max_bytes: Optional[int] = None):
+    """Reject an oversized upload from its Content-Length before reading any of it"""
+    max_bytes = ATTACHMENT_MAX_BYTES if max_bytes is None else max_bytes
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Attachment exceeds {max_bytes} bytes")
+
+class _BlobWriter:
+    """Temporary file plus running digest; every method runs in a worker thread"""
+
+    def __init__(self):
+        self.temp_path = os.path.join(ATTACHMENT_DIR, "tmp", f"{uuid.uuid4().hex}.part")
+        os.makedirs(os.path.dirname(self.temp_path), exist_ok=True)
+        self.file = open(self.temp_path, "wb")
+        self.digest = hashlib.sha256()
+
+    def write(self, block: bytes):
+        self.digest.update(block)
+        self.file.write(block)
+
+    def commit(self) -> str:
+        """Move the finished file to its content address; returns the digest"""
+        self.file.close()
+        sha256 = self.digest.hexdigest()
+        final_path = blob_path(sha256)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        # Replacing an existing blob is harmless (same bytes) and revives one
+        # the garbage collector may be about to delete
+        os.replace(self.temp_path, final_path)
+        return sha256
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+async def store_stream(chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> StoredBlob:
+    """Write a body to content-addressed storage; 413 once it passes `max_bytes` (default ATTACHMENT_MAX_BYTES)"""
+    max_bytes = ATTACHMENT_MAX_BYTES if max_bytes is None else max_bytes
+    writer = await asyncio.to_thread(_BlobWriter)
+    size = 0
+    pending = []
+    pending_size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Attachment exceeds {max_bytes} bytes")
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= ATTACHMENT_WRITE_BUFFER:
+                await asyncio.to_thread(writer.write, b"".join(pending))
+                pending, pending_size = [], 0
+        if pending:
+            await asyncio.to_thread(writer.write, b"".join(pending))
+        sha256 = await asyncio.to_thread(writer.commit)
+    except BaseException:
+        await asyncio.to_thread(writer.discard)
+        raise
+    return StoredBlob(sha256=sha256, size=size)
+
+def iter_blob_digests() -> Iterator[str]:
+    root = os.path.join(ATTACHMENT_DIR, "sha256")
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if _DIGEST.match(filename):
+                yield filename
+
+def prune_unreferenced_blobs(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete blobs no attachment row references and stale temp files; returns blobs removed"""
+    horizon = ((now or datetime.utcnow()) - timedelta(hours=ATTACHMENT_GC_GRACE_HOURS)).replace(tzinfo=timezone.utc).timestamp()
+    removed = 0
+    for sha256 in iter_blob_digests():
+        path = blob_path(sha256)
+        try:
+            if os.stat(path).st_mtime > horizon:
+                continue
+        except FileNotFoundError:
+            continue
+        if db.scalar(select(Attachment.id).where(Attachment.sha256 == sha256).limit(1)) is None:
+            os.remove(path)
+            removed += 1
+    temp_dir = os.path.join(ATTACHMENT_DIR, "tmp")
+    if os.path.isdir(temp_dir):
+        for entry in os.scandir(temp_dir):
+            if entry.is_file() and entry.stat().st_mtime <= horizon:
+                os.remove(entry.path)
+    return removed
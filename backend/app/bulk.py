@@ -0,0 +1,94 @@
+from collections import Counter
+from typing import AsyncIterator, Optional, Tuple
+import csv
+import json
+import os
+from fastapi import HTTPException, Request
+from .stats import stats_day
+
+# Rows written per INSERT/UPDATE batch and per transaction
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+# Per-row errors echoed back; the failed count keeps counting past this
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+
+# (row number, parsed object or None, error message or None)
+ImportRow = Tuple[int, Optional[dict], Optional[str]]
+
+async def iter_lines(request: Request) -> AsyncIterator[str]:
+    """Yield decoded lines from the request body as it arrives"""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+async def iter_ndjson_rows(request: Request) -> AsyncIterator[ImportRow]:
+    row_number = 0
+    async for line in iter_lines(request):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line), None
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+
+async def iter_csv_rows(request: Request) -> AsyncIterator[ImportRow]:
+    """Parse a CSV upload with a header row, one record at a time.
+
+    A record is complete once its quote count is even, so quoted fields may
+    span lines without buffering the whole upload.
+    """
+    header = None
+    record_lines = []
+    row_number = 0
+    async for line in iter_lines(request):
+        record_lines.append(line)
+        if sum(part.count('"') for part in record_lines) % 2:
+            continue
+        record = next(csv.reader(["\n".join(record_lines)]), [])
+        record_lines = []
+        if not any(field.strip() for field in record):
+            continue
+        if header is None:
+            header = [field.strip() for field in record]
+            continue
+        row_number += 1
+        if len(record) != len(header):
+            yield row_number, None, f"Expected {len(header)} fields, got {len(record)}"
+            continue
+        # Empty cells fall back to the schema defaults
+        yield row_number, {key: value for key, value in zip(header, record) if value != ""}, None
+    if record_lines:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+async def iter_json_rows(request: Request) -> AsyncIterator[ImportRow]:
+    try:
+        rows = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of issues")
+    for row_number, row in enumerate(rows, start=1):
+        yield row_number, row, None
+
+def iter_import_rows(request: Request) -> AsyncIterator[ImportRow]:
+    """Pick the parser from the Content-Type; NDJSON and CSV are streamed"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        return iter_ndjson_rows(request)
+    if content_type == "text/csv":
+        return iter_csv_rows(request)
+    if content_type == "application/json":
+        return iter_json_rows(request)
+    raise HTTPException(status_code=415, detail="Use application/json, application/x-ndjson or text/csv")
+
+def status_deltas(changes) -> list:
+    """Fold (created_at, status, delta) triples into DailyStats increment rows"""
+    totals = Counter()
+    for created_at, status, delta in changes:
+        totals[(stats_day(created_at), status)] += delta
+    return [(day, status, delta) for (day, status), delta in totals.items() if delta]
@@ -0,0 +1,45 @@
+"""
+Change feed over issues: rows created or updated after a cursor, plus
+tombstones for deleted rows.
+
+Positions are (updated_at, id) for issues and (deleted_at, id) for
+tombstones.  Timestamps come from the writing process at flush time, so a
+transaction that commits late can land behind a position already handed
+out.  Once a client has caught up, its cursor is therefore rewound to
+CHANGE_FEED_OVERLAP seconds ago and the next poll re-sends that window;
+clients apply changes idempotently by issue id.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import os
+from sqlalchemy import delete, tuple_
+from sqlalchemy.orm import Session
+from .models import DeletedIssue, UserRole
+
+# Seconds of recent changes re-sent after catching up, to cover commit lag and clock skew
+CHANGE_FEED_OVERLAP = float(os.getenv("CHANGE_FEED_OVERLAP", "5"))
+# Tombstones are kept this long; older cursors get 410 and must reload everything
+CHANGE_FEED_RETENTION_DAYS = int(os.getenv("CHANGE_FEED_RETENTION_DAYS", "30"))
+
+Position = Tuple[datetime, int]
+
+def rewind(position: Optional[Position], now: datetime) -> Position:
+    """Move a caught-up position back to the start of the overlap window"""
+    horizon = (now - timedelta(seconds=CHANGE_FEED_OVERLAP), 0)
+    if position is None:
+        return horizon
+    return min(position, horizon)
+
+def retention_horizon(now: datetime) -> datetime:
+    return now - timedelta(days=CHANGE_FEED_RETENTION_DAYS)
+
+def filter_tombstones(query, current_user, after: Position):
+    """Tombstones after `after`, limited to the caller's own issues for reporters"""
+    if current_user.role == UserRole.REPORTER:
+        query = query.filter(DeletedIssue.reporter_id == current_user.id)
+    return query.filter(tuple_(DeletedIssue.deleted_at, DeletedIssue.id) > after)
+
+def prune_tombstones(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete tombstones past the retention horizon; returns the number removed"""
+    result = db.execute(delete(DeletedIssue).where(DeletedIssue.deleted_at < retention_horizon(now or datetime.utcnow())))
+    return result.rowcount
@@ -1,10 +1,136 @@
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
-
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
-
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base() 
\ No newline at end of file
+import os
+import time
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .metrics import (
+    db_pool_checkout_duration, db_pool_checked_out, db_pool_overflow,
+    db_pool_overflow_checkouts_counter, db_pool_timeouts_counter,
+)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+# Pool settings shared by every engine built here (backend, worker, migrations)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds after which a pooled connection is replaced (-1 disables)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test connections on checkout so a restarted Postgres does not surface as errors
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "true")
+# Per-statement timeout on Postgres in milliseconds (0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# How long SQLite waits on a locked database before failing
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching asyncio driver (asyncpg / aiosqlite)"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+
+class _InstrumentedPoolMixin:
+    """Records how long checkouts wait for a connection and how often they time out"""
+    metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            db_pool_timeouts_counter.labels(self.metrics_name).inc()
+            raise
+        finally:
+            db_pool_checkout_duration.labels(self.metrics_name).observe(time.perf_counter() - started)
+
+def _instrumented_pool_class(base, name: str):
+    return type(f"Instrumented{base.__name__}", (_InstrumentedPoolMixin, base), {"metrics_name": name})
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite:"))
+
+def _engine_options(url: str, name: str, is_async: bool, overrides: dict) -> dict:
+    options = {}
+    connect_args = {}
+    if url.startswith("sqlite"):
+        connect_args["check_same_thread"] = False
+    elif url.startswith("postgresql") and DB_STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    if "poolclass" not in overrides and not _is_memory_sqlite(url):
+        options.update(
+            poolclass=_instrumented_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, name),
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    options.update(overrides)
+    return options
+
+def _install_listeners(sync_engine, url: str, name: str):
+    if url.startswith("sqlite"):
+        @event.listens_for(sync_engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if not _is_memory_sqlite(url):
+                # WAL lets readers proceed while the worker or a request writes
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.close()
+
+    if not isinstance(sync_engine.pool, QueuePool):
+        return
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checked_out.labels(name).inc()
+        overflow = sync_engine.pool.overflow()
+        db_pool_overflow.labels(name).set(overflow)
+        if overflow > 0:
+            db_pool_overflow_checkouts_counter.labels(name).inc()
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        db_pool_checked_out.labels(name).dec()
+        db_pool_overflow.labels(name).set(sync_engine.pool.overflow())
+
+def create_db_engine(url: str = DATABASE_URL, name: str = "backend", **overrides):
+    """Sync engine configured from the DB_* environment; `name` labels its pool metrics"""
+    engine = create_engine(url, **_engine_options(url, name, False, overrides))
+    _install_listeners(engine, url, name)
+    return engine
+
+def create_async_db_engine(url: str = ASYNC_DATABASE_URL, name: str = "backend_async", **overrides):
+    """Async counterpart of create_db_engine for the request handlers"""
+    engine = create_async_engine(url, **_engine_options(url, name, True, overrides))
+    _install_listeners(engine.sync_engine, url, name)
+    return engine
+
+# Sync engine: scripts and migrations
+engine = create_db_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: request handlers, so DB round-trips never block the event loop
+async_engine = create_async_db_engine()
+# Objects stay usable after commit; lazy refreshes would need an await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+Base = declarative_base()
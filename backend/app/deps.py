@@ -1,44 +1,67 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-from .database import SessionLocal
-from .models import User, UserRole
-import os
-
-SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
-ALGORITHM = "HS256"
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
-    return user
-
-def require_role(role: UserRole):
-    def role_checker(user: User = Depends(get_current_user)):
-        if user.role != role:
-            raise HTTPException(status_code=403, detail="Insufficient permissions")
-        return user
-    return role_checker 
\ No newline at end of file
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import jwt, JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import AsyncSessionLocal
+from .models import User, UserRole
+from .user_cache import Principal, user_cache
+import os
+
+SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
+ALGORITHM = "HS256"
+# "stateless" resolves the caller from the JWT and the user cache,
+# "database" loads the user row on every request
+AUTH_MODE = os.getenv("AUTH_MODE", "stateless")
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def load_principal(db: AsyncSession, user_id: int):
+    """Fetch just the columns a Principal needs, or None if the user is gone"""
+    result = await db.execute(select(User.id, User.email, User.role, User.is_active).where(User.id == user_id))
+    row = result.first()
+    if row is None:
+        return None
+    return Principal(id=row.id, email=row.email, role=row.role, is_active=row.is_active is not False)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
+        raise credentials_exception
+
+    # The session only checks out a connection if we fall through to the query
+    principal = user_cache.get(user_id) if AUTH_MODE == "stateless" else None
+    if principal is None:
+        principal = await load_principal(db, user_id)
+        if principal is None:
+            raise credentials_exception
+        if AUTH_MODE == "stateless":
+            user_cache.put(principal)
+    if not principal.is_active:
+        raise HTTPException(status_code=403, detail="Inactive user")
+    return principal
+
+async def get_current_db_user(principal: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> User:
+    """Load the ORM User for handlers that need more than the principal"""
+    user = await db.get(User, principal.id)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return user
+
+def require_role(role: UserRole):
+    def role_checker(user: Principal = Depends(get_current_user)):
+        if user.role != role:
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
+        return user
+    return role_checker
@@ -0,0 +1,127 @@
+"""
+Per-request instrumentation: route latency, in-flight requests and the SQL
+each request runs.
+
+MetricsMiddleware labels latency and SQL with the matched route template
+(e.g. /api/issues/{issue_id}), read from the scope once routing has run, so
+ids do not explode label cardinality.  The route is not known until then,
+so the in-flight gauge is labelled by method only.  SQL is
+counted by engine-wide cursor events into a QueryStats held in a context
+variable for the duration of the request; a SELECT repeated more than
+DB_N_PLUS_ONE_THRESHOLD times in one request is reported as a likely N+1.
+"""
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+import logging
+import os
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .metrics import (
+    db_n_plus_one_counter, db_queries_per_request, db_query_seconds_per_request,
+    http_request_duration, http_requests_in_flight,
+)
+
+logger = logging.getLogger(__name__)
+
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "10"))
+
+class QueryStats:
+    """SQL executed on behalf of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.selects = Counter()
+        # (statement, seconds) of every query, kept only once capture() is called
+        self.statements: Optional[list] = None
+        self.max_statements = 0
+
+    def capture(self, max_statements: int):
+        """Also keep the text and duration of up to `max_statements` statements"""
+        self.statements = []
+        self.max_statements = max_statements
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if statement.lstrip()[:6].upper() == "SELECT":
+            self.selects[statement] += 1
+        if self.statements is not None and len(self.statements) < self.max_statements:
+            self.statements.append((statement, seconds))
+
+    def repeated_selects(self, threshold: int = DB_N_PLUS_ONE_THRESHOLD):
+        return [(statement, count) for statement, count in self.selects.items() if count > threshold]
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    started = conn.info.get("query_started_at")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+def route_template(scope) -> str:
+    """The path template of the route that handled this request, or "unmatched".
+
+    The matched route only knows its path below any include_router prefix, so
+    the prefix is recovered from the part of the request path it did not match.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    path = scope["path"]
+    try:
+        matched = template.format(**{name: str(value) for name, value in scope.get("path_params", {}).items()})
+    except (KeyError, IndexError, ValueError):
+        return template
+    return path[:-len(matched)] + template if matched and path.endswith(matched) else template
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request and the SQL it runs"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        in_flight = http_requests_in_flight.labels(method=method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            current_query_stats.reset(token)
+            route = route_template(scope)
+            http_request_duration.labels(method=method, route=route, status=str(status)).observe(elapsed)
+            db_queries_per_request.labels(route=route).observe(stats.count)
+            db_query_seconds_per_request.labels(route=route).observe(stats.seconds)
+            repeated = stats.repeated_selects()
+            if repeated:
+                db_n_plus_one_counter.labels(route=route).inc()
+                statement, count = max(repeated, key=lambda item: item[1])
+                logger.warning(f"Possible N+1 on {method} {route}: {count}x {' '.join(statement.split())[:200]}")
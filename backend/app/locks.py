@@ -0,0 +1,74 @@
+"""
+Cross-process, non-blocking named locks for background jobs.
+
+On Postgres a session advisory lock is taken on a connection held for the
+duration of the lock, so a crashed holder releases it when its connection
+drops.  SQLite has no advisory locks; there every process shares the database
+file, so an flock on a file next to it (or in LOCK_DIR) plays the same role.
+"""
+from contextlib import contextmanager
+from typing import Iterator
+import hashlib
+import os
+import re
+import tempfile
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+try:
+    import fcntl
+except ImportError:  # Windows: file locks are not supported there
+    fcntl = None
+
+# Directory for SQLite lock files; defaults to the database file's directory
+LOCK_DIR = os.getenv("LOCK_DIR")
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock"""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+def lock_file_path(engine: Engine, name: str) -> str:
+    database = engine.url.database
+    directory = LOCK_DIR
+    if directory is None:
+        in_memory = not database or database == ":memory:"
+        directory = tempfile.gettempdir() if in_memory else os.path.dirname(os.path.abspath(database))
+    return os.path.join(directory, f".{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}.lock")
+
+@contextmanager
+def _advisory_lock(engine: Engine, name: str) -> Iterator[bool]:
+    key = advisory_lock_key(name)
+    with engine.connect() as conn:
+        acquired = bool(conn.scalar(select(func.pg_try_advisory_lock(key))))
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(select(func.pg_advisory_unlock(key)))
+                conn.commit()
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[bool]:
+    with open(path, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+@contextmanager
+def try_lock(engine: Engine, name: str) -> Iterator[bool]:
+    """Yield True if `name` was locked for this process, False if another holder has it"""
+    if engine.dialect.name == "postgresql":
+        with _advisory_lock(engine, name) as acquired:
+            yield acquired
+    elif fcntl is not None:
+        with _file_lock(lock_file_path(engine, name)) as acquired:
+            yield acquired
+    else:
+        raise NotImplementedError(f"No cross-process lock available for {engine.dialect.name} on this platform")
@@ -1,10 +1,80 @@
-from prometheus_client import Counter, generate_latest
-from fastapi import APIRouter, Response
-
-issue_created_counter = Counter('issue_created_total', 'Total number of issues created')
-
-metrics_router = APIRouter()
-
-@metrics_router.get("/metrics")
-def metrics():
-    return Response(generate_latest(), media_type="text/plain") 
\ No newline at end of file
+"""
+Prometheus metrics for the API, realtime layer, database and worker.
+
+With several uvicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory before starting the server: every process then writes
+its samples there and /metrics aggregates them.  The worker has no HTTP
+server; its metrics live in `worker_registry` and are pushed to a
+Pushgateway (PUSHGATEWAY_URL) or written to a node_exporter textfile
+(WORKER_METRICS_TEXTFILE) after each job.
+"""
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+    push_to_gateway, write_to_textfile,
+)
+from fastapi import APIRouter, Response
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+PUSHGATEWAY_URL = os.getenv("PUSHGATEWAY_URL")
+WORKER_METRICS_TEXTFILE = os.getenv("WORKER_METRICS_TEXTFILE")
+
+issue_created_counter = Counter('issue_created_total', 'Total number of issues created')
+
+http_request_duration = Histogram('http_request_duration_seconds', 'HTTP request latency by route template', ['method', 'route', 'status'], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+http_requests_in_flight = Gauge('http_requests_in_flight', 'HTTP requests currently being served', ['method'], multiprocess_mode='livesum')
+
+db_queries_per_request = Histogram('db_queries_per_request', 'SQL statements executed while serving one request', ['route'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250))
+db_query_seconds_per_request = Histogram('db_query_seconds_per_request', 'Time spent executing SQL while serving one request', ['route'], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+db_n_plus_one_counter = Counter('db_n_plus_one_total', 'Requests that repeated one SELECT more than DB_N_PLUS_ONE_THRESHOLD times', ['route'])
+
+password_hash_pending = Gauge('password_hash_pending', 'Password hash/verify jobs queued or running', multiprocess_mode='livesum')
+password_hash_rejected_counter = Counter('password_hash_rejected_total', 'Password hash/verify jobs rejected because the pool was saturated')
+password_hash_duration = Histogram('password_hash_duration_seconds', 'Time from submitting a password hash/verify job to its result', ['operation'])
+
+websocket_connections = Gauge('websocket_connections', 'Open WebSocket connections by role', ['role'], multiprocess_mode='livesum')
+websocket_fanout_duration = Histogram('websocket_fanout_seconds', 'Time to route and queue one notification for its local recipients', ['audience'], buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+websocket_send_failures_counter = Counter('websocket_send_failures_total', 'WebSocket sends that failed or timed out, evicting the socket', ['reason'])
+websocket_queued_messages = Gauge('websocket_outbound_queued_messages', 'Messages waiting in WebSocket outbound queues across all connections', multiprocess_mode='livesum')
+websocket_queue_length = Histogram('websocket_outbound_queue_length', 'Outbound queue length seen when a message is enqueued', buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+websocket_dropped_counter = Counter('websocket_outbound_dropped_total', 'WebSocket messages dropped before delivery', ['reason'])
+websocket_coalesced_counter = Counter('websocket_outbound_coalesced_total', 'Queued WebSocket messages replaced by a newer event for the same issue')
+
+db_pool_checkout_duration = Histogram('db_pool_checkout_seconds', 'Time spent waiting to check a connection out of the pool', ['pool'], buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+db_pool_checked_out = Gauge('db_pool_checked_out_connections', 'Connections currently checked out of the pool', ['pool'], multiprocess_mode='livesum')
+db_pool_overflow = Gauge('db_pool_overflow_connections', 'Connections open beyond pool_size (negative while the pool is not full)', ['pool'], multiprocess_mode='livesum')
+db_pool_overflow_checkouts_counter = Counter('db_pool_overflow_checkouts_total', 'Checkouts served by an overflow connection', ['pool'])
+db_pool_timeouts_counter = Counter('db_pool_checkout_timeouts_total', 'Checkouts that gave up after pool_timeout', ['pool'])
+
+response_cache_requests_counter = Counter('response_cache_requests_total', 'Cacheable GET requests by cache outcome (hit, miss, not_modified)', ['endpoint', 'result'])
+response_cache_bytes = Gauge('response_cache_bytes', 'Bytes of response bodies held in the response cache', multiprocess_mode='livesum')
+
+worker_registry = CollectorRegistry()
+worker_job_duration = Histogram('worker_job_duration_seconds', 'Duration of worker job runs', ['job'], registry=worker_registry, buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600))
+worker_job_failures_counter = Counter('worker_job_failures_total', 'Worker job runs that raised', ['job'], registry=worker_registry)
+worker_job_last_success = Gauge('worker_job_last_success_timestamp_seconds', 'Unix time of the last successful run', ['job'], registry=worker_registry, multiprocess_mode='max')
+worker_job_lag = Gauge('worker_job_lag_seconds', 'Delay between when a job run was due and when it started', ['job'], registry=worker_registry)
+worker_job_skipped_counter = Counter('worker_job_skipped_total', 'Job runs not executed: locked by another replica, recently run, overlapping or missed', ['job', 'reason'], registry=worker_registry)
+worker_jobs_running = Gauge('worker_jobs_running', 'Job runs currently executing', ['job'], registry=worker_registry)
+
+def export_worker_metrics(job_name: str = "issue-tracker-worker"):
+    """Publish worker_registry to the Pushgateway and/or the textfile, whichever is configured"""
+    if PUSHGATEWAY_URL:
+        push_to_gateway(PUSHGATEWAY_URL, job=job_name, registry=worker_registry)
+    if WORKER_METRICS_TEXTFILE:
+        write_to_textfile(WORKER_METRICS_TEXTFILE, worker_registry)
+
+def mark_process_dead(pid: int):
+    """Drop a stopped process's live gauges from the multiprocess directory"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+metrics_router = APIRouter()
+
+@metrics_router.get("/metrics")
+def metrics():
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
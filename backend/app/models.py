@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, ForeignKey, Enum, Text, Boolean, UniqueConstraint, Index, DDL, event, text
 from sqlalchemy.orm import declarative_base, relationship
 import enum
 from datetime import datetime
@@ -35,6 +35,14 @@ class IssueSeverity(str, enum.Enum):
 
 class Issue(Base):
     __tablename__ = "issues"
+    __table_args__ = (
+        # Reporter-scoped lists, status filters and the stats rollup all
+        # range over created_at; the change feed ranges over updated_at
+        Index("ix_issues_reporter_id_created_at", "reporter_id", "created_at"),
+        Index("ix_issues_status_created_at", "status", "created_at"),
+        Index("ix_issues_created_at_id", "created_at", "id"),
+        Index("ix_issues_updated_at_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -49,8 +57,149 @@ class Issue(Base):
     # Relationship
     reporter = relationship("User", back_populates="issues")
 
+class DeletedIssue(Base):
+    """Tombstone written by delete_issue so the change feed can report deletions"""
+    __tablename__ = "deleted_issues"
+    __table_args__ = (
+        Index("ix_deleted_issues_deleted_at_id", "deleted_at", "id"),
+    )
+    id = Column(Integer, primary_key=True)
+    issue_id = Column(Integer, nullable=False)
+    reporter_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class IssueTransition(Base):
+    """Append-only record of an issue's status/severity, written with the change that caused it.
+
+    A row with no `from_status` marks the issue's creation.  `created_at` is
+    the issue's own creation time, kept here so resolution times can be
+    computed without the (possibly deleted) issue; there is deliberately no
+    foreign key, history outlives the issue.
+    """
+    __tablename__ = "issue_transitions"
+    __table_args__ = (
+        Index("ix_issue_transitions_issue_id_id", "issue_id", "id"),
+    )
+    id = Column(Integer, primary_key=True)
+    issue_id = Column(Integer, nullable=False)
+    from_status = Column(Enum(IssueStatus), nullable=True)
+    to_status = Column(Enum(IssueStatus), nullable=False)
+    from_severity = Column(Enum(IssueSeverity), nullable=True)
+    to_severity = Column(Enum(IssueSeverity), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    changed_by_id = Column(Integer, nullable=True)
+
+class StatusDurationStats(Base):
+    """Per-day rollup of issue_transitions, maintained incrementally by the worker.
+
+    `kind` is "time_in_status" (a stint in `status` that ended that day) or
+    "resolution" (creation to `status`, a closed status, reached that day).
+    `histogram` is a JSON object of log-scale bucket -> count (see
+    app.transitions), so percentiles can be taken over any range of days.
+    """
+    __tablename__ = "status_duration_stats"
+    __table_args__ = (
+        UniqueConstraint("date", "kind", "status", "severity", name="uq_status_duration_stats_key"),
+    )
+    id = Column(Integer, primary_key=True)
+    date = Column(DateTime, nullable=False)
+    kind = Column(String, nullable=False)
+    status = Column(Enum(IssueStatus), nullable=False)
+    severity = Column(Enum(IssueSeverity), nullable=False)
+    count = Column(Integer, nullable=False)
+    total_seconds = Column(Float, nullable=False)
+    histogram = Column(Text, nullable=False)
+
+class AggregationCursor(Base):
+    """Last source row folded into an incremental rollup, committed together with it"""
+    __tablename__ = "aggregation_cursors"
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
+
+class Attachment(Base):
+    """One upload attached to an issue; the bytes live in content-addressed storage under `sha256`"""
+    __tablename__ = "attachments"
+    id = Column(Integer, primary_key=True)
+    issue_id = Column(Integer, ForeignKey("issues.id", ondelete="CASCADE"), nullable=False, index=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    uploaded_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class OutboxEvent(Base):
+    """Notification envelope written in the same transaction as the change it announces.
+
+    `seq` is assigned by the dispatcher in commit order and is the position
+    clients resume from; `dispatched_at` is set once the envelope was published.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_pending", "id",
+              postgresql_where=text("dispatched_at IS NULL"), sqlite_where=text("dispatched_at IS NULL")),
+        Index("ix_outbox_events_dispatched_at", "dispatched_at"),
+    )
+    id = Column(Integer, primary_key=True)
+    seq = Column(Integer, unique=True, nullable=True)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    dispatched_at = Column(DateTime, nullable=True)
+
+class WorkerJob(Base):
+    """Last run of each scheduled worker job, shared by all worker replicas"""
+    __tablename__ = "worker_jobs"
+    name = Column(String, primary_key=True)
+    last_started_at = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    last_success_at = Column(DateTime, nullable=True)
+    last_duration_seconds = Column(Float, nullable=True)
+    last_status = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    runs = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+
+# Text search configuration baked into the generated Postgres tsvector
+SEARCH_TS_CONFIG = "english"
+
+# Full-text search lives outside the ORM columns: a generated, GIN-indexed
+# tsvector on Postgres and an external-content FTS5 table kept in sync by
+# triggers on SQLite.  Migration 0003 creates the same objects.
+SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE issues ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_TS_CONFIG}', coalesce(description, '')), 'B')) STORED",
+        "CREATE INDEX ix_issues_search_vector ON issues USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE issues_fts USING fts5("
+        "title, description, content='issues', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER issues_fts_ai AFTER INSERT ON issues BEGIN "
+        "INSERT INTO issues_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER issues_fts_ad AFTER DELETE ON issues BEGIN "
+        "INSERT INTO issues_fts(issues_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER issues_fts_au AFTER UPDATE OF title, description ON issues BEGIN "
+        "INSERT INTO issues_fts(issues_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO issues_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    ],
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Issue.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+event.listen(Issue.__table__, "before_drop", DDL("DROP TABLE IF EXISTS issues_fts").execute_if(dialect="sqlite"))
+
 class DailyStats(Base):
     __tablename__ = "daily_stats"
+    __table_args__ = (
+        # One row per (day, status); the rollup upserts rely on this
+        UniqueConstraint("date", "status", name="uq_daily_stats_date_status"),
+    )
     id = Column(Integer, primary_key=True)
     date = Column(DateTime, nullable=False)
     status = Column(Enum(IssueStatus), nullable=False)
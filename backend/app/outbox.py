@@ -0,0 +1,197 @@
+"""
+Transactional outbox for realtime notifications.
+
+Handlers add the notification envelope to `outbox_events` in the same
+transaction as the issue change, so an event exists exactly when its change
+was committed.  OutboxDispatcher then publishes pending rows in batches:
+
+1. assign each row the next `seq` (in dispatch order, which follows commit
+   order) and commit;
+2. publish the envelopes, with `seq` added to the message, in that order;
+3. mark the rows dispatched.
+
+A crash between 1 and 3 re-publishes the same seqs on the next run, so
+delivery is at-least-once and sockets drop seqs they have already been sent.
+Handlers only wake the dispatcher's background loop after committing, so
+publishing never adds to a write's latency; the loop also sweeps every
+OUTBOX_POLL_INTERVAL for rows committed by other processes or left by a
+crash.  On Postgres a session advisory lock keeps one dispatcher at a time
+across processes.
+
+Reconnecting clients pass the last seq they saw and get the gap replayed from
+the table (see ConnectionManager.replay); dispatched rows are kept for
+OUTBOX_RETENTION_HOURS.
+"""
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from .database import async_engine
+from .models import OutboxEvent
+from .pubsub import encode_envelope
+
+logger = logging.getLogger(__name__)
+
+# Rows published per dispatcher transaction
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+# Seconds between background sweeps for rows no inline dispatch picked up
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+# Dispatched rows are kept this long for replay; older reconnects must resync
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "72"))
+# Most events replayed to one reconnecting socket before it is told to resync
+OUTBOX_REPLAY_LIMIT = int(os.getenv("OUTBOX_REPLAY_LIMIT", "1000"))
+
+# pg_advisory_lock key held by the active dispatcher
+OUTBOX_LOCK_KEY = 7_310_162_100
+
+outbox = OutboxEvent.__table__
+
+Publish = Callable[[dict], Awaitable[None]]
+
+def add_event(db, envelope: dict):
+    """Stage a notification envelope in the caller's transaction (sync or async session)"""
+    db.add(OutboxEvent(payload=encode_envelope(envelope)))
+
+def decode_event(seq: int, payload: str) -> dict:
+    envelope = json.loads(payload)
+    envelope["message"]["seq"] = seq
+    return envelope
+
+async def events_after(last_seq: int, limit: int = OUTBOX_REPLAY_LIMIT) -> Tuple[List[dict], int, bool]:
+    """(envelopes with seq > last_seq, latest seq, complete).
+
+    `complete` is False when the gap cannot be replayed: it is larger than
+    `limit`, reaches back past the retention window, or `last_seq` is ahead
+    of the log (e.g. after a database reset).
+    """
+    async with async_engine.connect() as conn:
+        oldest, latest = (await conn.execute(select(func.min(outbox.c.seq), func.max(outbox.c.seq)))).one()
+        rows = (await conn.execute(
+            select(outbox.c.seq, outbox.c.payload)
+            .where(outbox.c.seq > last_seq)
+            .order_by(outbox.c.seq)
+            .limit(limit + 1)
+        )).all()
+    latest = latest or 0
+    complete = len(rows) <= limit and last_seq <= latest and (oldest is None or last_seq >= oldest - 1)
+    return [decode_event(seq, payload) for seq, payload in rows[:limit]], latest, complete
+
+def prune_outbox(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete dispatched rows past the retention window; the latest seq is always kept"""
+    horizon = (now or datetime.utcnow()) - timedelta(hours=OUTBOX_RETENTION_HOURS)
+    latest = select(func.max(outbox.c.seq)).scalar_subquery()
+    result = db.execute(delete(outbox).where(outbox.c.dispatched_at < horizon, outbox.c.seq < latest))
+    return result.rowcount
+
+class OutboxDispatcher:
+    """Publishes committed outbox rows in seq order"""
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.publish: Optional[Publish] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, publish: Publish):
+        self.publish = publish
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def wake(self):
+        """Ask the background loop to publish now; returns at once and is safe from any thread"""
+        if self._wake is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.dispatch()
+
+    async def dispatch(self) -> int:
+        """Publish every pending row; returns how many were published, never raises"""
+        if self.publish is None:
+            return 0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        published = 0
+        try:
+            async with self._lock, async_engine.connect() as conn:
+                postgres = conn.dialect.name == "postgresql"
+                if postgres:
+                    locked = await conn.scalar(select(func.pg_try_advisory_lock(OUTBOX_LOCK_KEY)))
+                    await conn.commit()
+                    if not locked:
+                        # Another process is dispatching and will publish these rows
+                        return 0
+                try:
+                    while True:
+                        count = await self._dispatch_batch(conn)
+                        published += count
+                        if count < self.batch_size:
+                            break
+                finally:
+                    if postgres:
+                        await conn.execute(select(func.pg_advisory_unlock(OUTBOX_LOCK_KEY)))
+                        await conn.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Outbox dispatch failed after {published} events, will retry: {e!r}")
+        return published
+
+    async def _dispatch_batch(self, conn) -> int:
+        async with conn.begin():
+            rows = (await conn.execute(
+                select(outbox.c.id, outbox.c.seq, outbox.c.payload)
+                .where(outbox.c.dispatched_at.is_(None))
+                # Rows numbered by an interrupted run go first, in their original order
+                .order_by(outbox.c.seq.asc().nulls_last(), outbox.c.id)
+                .limit(self.batch_size)
+            )).all()
+            if not rows:
+                return 0
+            next_seq = (await conn.scalar(select(func.max(outbox.c.seq))) or 0) + 1
+            numbered, assignments = [], []
+            for row_id, seq, payload in rows:
+                if seq is None:
+                    seq = next_seq
+                    next_seq += 1
+                    assignments.append({"row_id": row_id, "new_seq": seq})
+                numbered.append((row_id, seq, payload))
+            if assignments:
+                await conn.execute(
+                    update(outbox).where(outbox.c.id == bindparam("row_id")).values(seq=bindparam("new_seq")),
+                    assignments,
+                )
+
+        for _, seq, payload in numbered:
+            await self.publish(decode_event(seq, payload))
+
+        async with conn.begin():
+            await conn.execute(
+                update(outbox)
+                .where(outbox.c.id.in_([row_id for row_id, _, _ in numbered]))
+                .values(dispatched_at=datetime.utcnow())
+            )
+        return len(numbered)
+
+outbox_dispatcher = OutboxDispatcher()
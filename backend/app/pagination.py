@@ -0,0 +1,61 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+def encode_cursor(created_at: datetime, issue_id: int) -> str:
+    """Encode the (created_at, id) keyset position of the last row on a page"""
+    raw = f"{created_at.isoformat()}|{issue_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Decode a cursor produced by encode_cursor, raising 400 if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, issue_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(issue_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_rank_cursor(rank: float, issue_id: int) -> str:
+    """Encode the (rank, id) keyset position of the last hit on a search page"""
+    raw = f"{rank!r}|{issue_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_rank_cursor(cursor: Optional[str]) -> Optional[Tuple[float, int]]:
+    """Decode a cursor produced by encode_rank_cursor, raising 400 if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, issue_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return float(rank), int(issue_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_feed_cursor(issues_after: Tuple[datetime, int], deleted_after: Tuple[datetime, int]) -> str:
+    """Encode the change-feed position: last (updated_at, id) of issues and (deleted_at, id) of tombstones"""
+    raw = "|".join([issues_after[0].isoformat(), str(issues_after[1]), deleted_after[0].isoformat(), str(deleted_after[1])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_feed_cursor(cursor: Optional[str]) -> Optional[Tuple[Tuple[datetime, int], Tuple[datetime, int]]]:
+    """Decode a cursor produced by encode_feed_cursor, raising 400 if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, issue_id, deleted_at, tombstone_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return (
+            (datetime.fromisoformat(updated_at), int(issue_id)),
+            (datetime.fromisoformat(deleted_at), int(tombstone_id)),
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,254 @@
+"""
+Opt-in request profiling for diagnosing slow endpoints in a live process.
+
+ProfilingMiddleware records a request when it is picked by PROFILE_SAMPLE_RATE
+or turns out slower than PROFILE_SLOW_MS.  Whether a request is slow is only
+known at the end, so while profiling is on every request is watched by a
+statistical sampler: one background thread reads the event loop thread's
+stack every PROFILE_INTERVAL_MS and charges the sample to the request whose
+task was running.  Fast, unsampled requests are then simply discarded.  The
+SQL each recorded request ran is captured through the QueryStats set up by
+MetricsMiddleware.
+
+Samples only cover code running on the event loop; time spent awaiting the
+database or in worker threads (sync endpoints, password hashing) shows up as
+wall time not covered by samples, and in the SQL timings.
+
+The last PROFILE_BUFFER_SIZE profiles are kept per process and served by the
+admin endpoints under /api/debug/profiles; /api/debug/profiling changes the
+settings of the process that answers, without a restart.
+"""
+from collections import Counter, deque
+from datetime import datetime
+from itertools import count
+from typing import Dict, Optional
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from .instrumentation import QueryStats, current_query_stats, route_template
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Fraction of requests profiled regardless of how long they take
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+# Requests slower than this are always kept; 0 keeps sampled requests only
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+PROFILE_MAX_STATEMENTS = int(os.getenv("PROFILE_MAX_STATEMENTS", "200"))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "30"))
+
+# Never profiled: scrapes and the profiling endpoints themselves
+PROFILE_EXCLUDED_PREFIXES = ("/metrics", "/api/debug/")
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class RequestRecorder:
+    """Stack samples taken while one request's task was running"""
+
+    def __init__(self, root_code):
+        self.root_code = root_code
+        self.samples = 0
+        self.stacks = Counter()
+
+    def add(self, frame):
+        """Fold the stack from the request's entry point down to `frame`"""
+        labels = []
+        while frame is not None:
+            if frame.f_code is self.root_code:
+                break
+            labels.append(frame_label(frame))
+            frame = frame.f_back
+        self.samples += 1
+        self.stacks[";".join(reversed(labels))] += 1
+
+class StackSampler:
+    """Background thread sampling the event loop thread while requests are recorded"""
+
+    def __init__(self):
+        self.recorders: Dict[asyncio.Task, RequestRecorder] = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+
+    def start(self, task: asyncio.Task, recorder: RequestRecorder):
+        """Record samples for `task`; must be called from the event loop thread"""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        with self.lock:
+            self.recorders[task] = recorder
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self.thread.start()
+        self.wake.set()
+
+    def stop(self, task: asyncio.Task):
+        with self.lock:
+            self.recorders.pop(task, None)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                idle = not self.recorders
+                if idle:
+                    self.wake.clear()
+            if idle:
+                self.wake.wait()
+                continue
+            time.sleep(PROFILE_INTERVAL_MS / 1000)
+            self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            return
+        with self.lock:
+            recorder = self.recorders.get(task)
+            if recorder is not None and frame is not None:
+                recorder.add(frame)
+
+class Profiler:
+    """Runtime settings plus the ring buffer of finished profiles"""
+
+    def __init__(self):
+        self.enabled = PROFILING_ENABLED
+        self.sample_rate = PROFILE_SAMPLE_RATE
+        self.slow_ms = PROFILE_SLOW_MS
+        self.profiles = deque(maxlen=PROFILE_BUFFER_SIZE)
+        self.sampler = StackSampler()
+        self.ids = count(1)
+
+    def settings(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "buffer_size": self.profiles.maxlen,
+            "pid": os.getpid(),
+        }
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None, slow_ms: Optional[float] = None):
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        logger.info(f"Request profiling settings: {self.settings()}")
+
+    def record(self, scope, status: int, started_at: datetime, elapsed: float, reason: str,
+               recorder: RequestRecorder, stats: QueryStats) -> dict:
+        self_samples, total_samples = Counter(), Counter()
+        for stack, samples in recorder.stacks.items():
+            frames = stack.split(";") if stack else []
+            if frames:
+                self_samples[frames[-1]] += samples
+            for label in set(frames):
+                total_samples[label] += samples
+        profile = {
+            "id": next(self.ids),
+            "pid": os.getpid(),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route_template(scope),
+            "status": status,
+            "reason": reason,
+            "started_at": started_at.isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "samples": recorder.samples,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "sql_count": stats.count,
+            "sql_ms": round(stats.seconds * 1000, 3),
+            "sql": [{"statement": statement, "ms": round(seconds * 1000, 3)} for statement, seconds in stats.statements or ()],
+            "top_functions": [
+                {"function": label, "total_samples": samples, "self_samples": self_samples[label]}
+                for label, samples in total_samples.most_common(PROFILE_TOP_N)
+            ],
+            "stacks": [{"stack": stack, "samples": samples} for stack, samples in recorder.stacks.most_common()],
+        }
+        self.profiles.append(profile)
+        return profile
+
+    def summaries(self) -> list:
+        summary_fields = ("id", "pid", "method", "path", "route", "status", "reason", "started_at",
+                          "duration_ms", "samples", "sql_count", "sql_ms")
+        return [{field: profile[field] for field in summary_fields} for profile in reversed(self.profiles)]
+
+    def get(self, profile_id: int) -> Optional[dict]:
+        return next((profile for profile in self.profiles if profile["id"] == profile_id), None)
+
+    def clear(self):
+        self.profiles.clear()
+
+profiler = Profiler()
+
+class ProfilingMiddleware:
+    """ASGI middleware keeping profiles of sampled and slow requests; a pass-through while disabled.
+
+    Install it inside MetricsMiddleware so the request's QueryStats is shared.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not profiler.enabled
+            or scope["path"].startswith(PROFILE_EXCLUDED_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        sampled = random.random() < profiler.sample_rate
+        if not sampled and profiler.slow_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = current_query_stats.get()
+        token = None
+        if stats is None:
+            stats = QueryStats()
+            token = current_query_stats.set(stats)
+        stats.capture(PROFILE_MAX_STATEMENTS)
+
+        task = asyncio.current_task()
+        recorder = RequestRecorder(ProfilingMiddleware.__call__.__code__)
+        profiler.sampler.start(task, recorder)
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            profiler.sampler.stop(task)
+            if token is not None:
+                current_query_stats.reset(token)
+            slow = profiler.slow_ms > 0 and elapsed * 1000 >= profiler.slow_ms
+            if sampled or slow:
+                profile = profiler.record(scope, status, started_at, elapsed, "slow" if slow else "sampled", recorder, stats)
+                if slow:
+                    logger.warning(
+                        f"Slow request {scope['method']} {scope['path']}: {profile['duration_ms']:.0f} ms, "
+                        f"{stats.count} queries, profile {profile['id']}"
+                    )
@@ -0,0 +1,215 @@
+"""
+Cross-process transport for realtime notifications.
+
+Every backend process publishes each notification envelope once and
+receives every envelope (its own included) from the bus, then delivers it
+to the sockets it holds locally.  Pick the backend with REALTIME_BUS:
+
+- memory:   in-process only (default; single worker and tests)
+- redis:    Redis pub/sub on REDIS_URL
+- postgres: LISTEN/NOTIFY on DATABASE_URL
+"""
+from typing import Awaitable, Callable, Optional
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+REALTIME_BUS = os.getenv("REALTIME_BUS", "memory")
+REALTIME_CHANNEL = os.getenv("REALTIME_CHANNEL", "issue_events")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Seconds to wait before re-establishing a dropped subscription
+BUS_RECONNECT_DELAY = float(os.getenv("BUS_RECONNECT_DELAY", "2"))
+
+Handler = Callable[[dict], Awaitable[None]]
+
+def encode_envelope(envelope: dict) -> str:
+    return json.dumps(envelope, separators=(",", ":"), ensure_ascii=False, default=str)
+
+class NotificationBus:
+    """Base class: subclasses implement publish() and deliver incoming payloads via _dispatch()"""
+
+    def __init__(self):
+        self.handler: Optional[Handler] = None
+
+    def bind(self, handler: Handler):
+        self.handler = handler
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, envelope: dict):
+        raise NotImplementedError
+
+    async def _dispatch(self, payload):
+        if isinstance(payload, bytes):
+            payload = payload.decode()
+        try:
+            envelope = json.loads(payload)
+        except ValueError:
+            logger.error(f"Dropping malformed bus payload: {payload[:200]!r}")
+            return
+        if self.handler is not None:
+            await self.handler(envelope)
+
+class InMemoryBus(NotificationBus):
+    """Delivers straight to the bound handler.
+
+    Buses created with the same `hub` set see each other's messages, which
+    lets tests stand in several processes with several ConnectionManagers.
+    """
+
+    def __init__(self, hub: Optional[set] = None):
+        super().__init__()
+        self.hub = hub if hub is not None else set()
+        self.hub.add(self)
+
+    async def publish(self, envelope: dict):
+        # Round-trip through JSON so behaviour matches the network buses
+        payload = encode_envelope(envelope)
+        for bus in list(self.hub):
+            await bus._dispatch(payload)
+
+    async def stop(self):
+        self.hub.discard(self)
+
+class RedisBus(NotificationBus):
+    def __init__(self, url: str = REDIS_URL, channel: str = REALTIME_CHANNEL):
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        import redis.asyncio as aioredis
+
+        self._redis = aioredis.from_url(self.url)
+        self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                logger.info(f"Subscribed to Redis channel {self.channel}")
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis subscription failed, retrying in {BUS_RECONNECT_DELAY}s: {e!r}")
+                await asyncio.sleep(BUS_RECONNECT_DELAY)
+            finally:
+                await pubsub.aclose()
+
+    async def publish(self, envelope: dict):
+        await self._redis.publish(self.channel, encode_envelope(envelope))
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.aclose()
+
+class PostgresBus(NotificationBus):
+    """LISTEN/NOTIFY over psycopg2, with the listening socket watched by the event loop"""
+
+    # NOTIFY payloads must stay under 8000 bytes
+    MAX_PAYLOAD_BYTES = 7999
+
+    def __init__(self, dsn: str, channel: str = REALTIME_CHANNEL):
+        super().__init__()
+        self.dsn = dsn.replace("postgresql+psycopg2://", "postgresql://", 1)
+        self.channel = channel
+        self._listen_conn = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect: Optional[asyncio.Task] = None
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self._listen()
+
+    async def _listen(self):
+        self._listen_conn = await asyncio.to_thread(self._connect)
+        with self._listen_conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        self._loop.add_reader(self._listen_conn.fileno(), self._on_readable)
+        logger.info(f"Listening on Postgres channel {self.channel}")
+
+    def _on_readable(self):
+        try:
+            self._listen_conn.poll()
+        except Exception as e:
+            logger.error(f"Postgres LISTEN connection lost, retrying in {BUS_RECONNECT_DELAY}s: {e!r}")
+            self._drop_listener()
+            self._reconnect = self._loop.create_task(self._relisten())
+            return
+        while self._listen_conn.notifies:
+            notify = self._listen_conn.notifies.pop(0)
+            self._loop.create_task(self._dispatch(notify.payload))
+
+    def _drop_listener(self):
+        if self._listen_conn is not None:
+            try:
+                self._loop.remove_reader(self._listen_conn.fileno())
+            except Exception:
+                pass
+            self._listen_conn.close()
+            self._listen_conn = None
+
+    async def _relisten(self):
+        while self._listen_conn is None:
+            await asyncio.sleep(BUS_RECONNECT_DELAY)
+            try:
+                await self._listen()
+            except Exception as e:
+                logger.error(f"Postgres LISTEN reconnect failed: {e!r}")
+                self._listen_conn = None
+
+    def _notify(self, payload: str):
+        if self._publish_conn is None or self._publish_conn.closed:
+            self._publish_conn = self._connect()
+        with self._publish_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+
+    async def publish(self, envelope: dict):
+        payload = encode_envelope(envelope)
+        if len(payload.encode()) > self.MAX_PAYLOAD_BYTES:
+            raise ValueError(f"Notification payload of {len(payload.encode())} bytes exceeds the NOTIFY limit")
+        async with self._publish_lock:
+            await asyncio.to_thread(self._notify, payload)
+
+    async def stop(self):
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        self._drop_listener()
+        if self._publish_conn is not None:
+            self._publish_conn.close()
+
+def create_bus(kind: str = REALTIME_BUS) -> NotificationBus:
+    """Build the bus selected by REALTIME_BUS"""
+    if kind == "redis":
+        return RedisBus()
+    if kind == "postgres":
+        from .database import DATABASE_URL
+        return PostgresBus(DATABASE_URL)
+    if kind != "memory":
+        raise ValueError(f"Unknown REALTIME_BUS {kind!r}; expected memory, redis or postgres")
+    return InMemoryBus()
@@ -1,121 +1,539 @@
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi import APIRouter
+from collections import deque
+from typing import Callable, Optional
+import asyncio
 import json
 import logging
+import os
+import time
+from .pubsub import InMemoryBus, NotificationBus
+from .outbox import OUTBOX_REPLAY_LIMIT, events_after, outbox_dispatcher
+from .metrics import (
+    websocket_queued_messages, websocket_queue_length, websocket_dropped_counter, websocket_coalesced_counter,
+    websocket_connections, websocket_fanout_duration, websocket_send_failures_counter,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Seconds a single socket may take to accept a frame before it is evicted
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+# Messages buffered per connection before the overflow policy applies
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "100"))
+# "drop_oldest" discards the oldest queued message, "disconnect" evicts the client
+WS_OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", "drop_oldest")
+
+def serialize_message(message: dict) -> str:
+    """Encode a notification once, the same way WebSocket.send_json would"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def coalesce_key(message: dict):
+    """Queued messages sharing a key are merged; only issue updates are coalesced"""
+    if message.get("type") == "issue_updated" and message.get("issue_id") is not None:
+        return ("issue_updated", message["issue_id"])
+    return None
+
+class OutboundQueue:
+    """Bounded FIFO of serialized frames for one connection.
+
+    A frame with a coalesce key replaces a still-queued frame with the same
+    key and moves to the back, so a burst of updates to one issue costs a
+    single frame and frames still leave in event (seq) order.
+    """
+
+    def __init__(self, maxsize: int = WS_QUEUE_SIZE, overflow_policy: str = WS_OVERFLOW_POLICY):
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self._items: deque = deque()
+        self._by_key: dict = {}
+        self._ready = asyncio.Event()
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.closed = False
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, text: str, key=None) -> bool:
+        """Queue a frame; returns False if the connection must be dropped instead"""
+        if self.closed:
+            return False
+        if key is not None and key in self._by_key:
+            entry = self._by_key[key]
+            self._items.remove(entry)
+            entry[1] = text
+            self._items.append(entry)
+            websocket_coalesced_counter.inc()
+            self._ready.set()
+            return True
+        if len(self._items) >= self.maxsize:
+            if self.overflow_policy == "disconnect":
+                websocket_dropped_counter.labels("disconnect").inc()
+                return False
+            self._discard(self._items.popleft())
+            websocket_dropped_counter.labels("overflow").inc()
+        websocket_queue_length.observe(len(self._items))
+        entry = [key, text]
+        self._items.append(entry)
+        if key is not None:
+            self._by_key[key] = entry
+        self._unfinished += 1
+        self._idle.clear()
+        websocket_queued_messages.inc()
+        self._ready.set()
+        return True
+
+    def _discard(self, entry):
+        if entry[0] is not None:
+            self._by_key.pop(entry[0], None)
+        websocket_queued_messages.dec()
+        self.task_done()
+
+    async def get(self) -> str:
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        entry = self._items.popleft()
+        if entry[0] is not None:
+            self._by_key.pop(entry[0], None)
+        websocket_queued_messages.dec()
+        return entry[1]
+
+    def task_done(self):
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._idle.set()
+
+    async def join(self):
+        await self._idle.wait()
+
+    def close(self):
+        """Drop whatever is still queued; used when the connection goes away"""
+        if self._items:
+            websocket_dropped_counter.labels("disconnected").inc(len(self._items))
+        while self._items:
+            self._discard(self._items.popleft())
+        self.closed = True
+        self._idle.set()
+
+# Cap on topics per connection, so one client cannot bloat the topic index
+WS_MAX_TOPICS = int(os.getenv("WS_MAX_TOPICS", "200"))
+
+MAINTAINER_ROLES = ('MAINTAINER', 'ADMIN')
+KNOWN_ROLES = {'ADMIN', 'MAINTAINER', 'REPORTER'}
+SEVERITY_TOPICS = {"LOW", "MEDIUM", "HIGH", "CRITICAL"}
+
+def maintainers_envelope(message: dict) -> dict:
+    return {"audience": "roles", "roles": list(MAINTAINER_ROLES), "message": message}
+
+def all_users_envelope(message: dict) -> dict:
+    return {"audience": "roles", "roles": None, "message": message}
+
+def user_envelope(message: dict, user_id: str) -> dict:
+    return {"audience": "user", "user_id": user_id, "message": message}
+
+def role_label(role) -> str:
+    """Metric label for a client-supplied role, folding unknown values together"""
+    return role if role in KNOWN_ROLES else "other"
+
+def message_topics(message: dict) -> list[str]:
+    """Topics an issue event belongs to, e.g. ["issue:12", "severity:HIGH"]"""
+    topics = []
+    if message.get("issue_id") is not None:
+        topics.append(f"issue:{message['issue_id']}")
+    if message.get("severity") is not None:
+        topics.append(f"severity:{getattr(message['severity'], 'value', message['severity'])}")
+    return topics
+
+def parse_topic(topic) -> Optional[str]:
+    """Normalise a client-supplied topic, or return None if it is not one we publish"""
+    if not isinstance(topic, str) or ":" not in topic:
+        return None
+    kind, _, value = topic.partition(":")
+    if kind == "issue" and value.isdigit():
+        return f"issue:{int(value)}"
+    if kind == "severity" and value.upper() in SEVERITY_TOPICS:
+        return f"severity:{value.upper()}"
+    return None
+
+class ClientConnection:
+    """One accepted socket; a user may hold several (one per tab)"""
+
+    def __init__(self, websocket: WebSocket, user_id: str, role: Optional[str], email: Optional[str], queue: OutboundQueue):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.role = role
+        self.email = email
+        self.queue = queue
+        # Empty means "everything my role receives"; otherwise only matching events
+        self.topics: set[str] = set()
+        self.writer: Optional[asyncio.Task] = None
+        # Highest outbox seq queued for this socket; older or repeated seqs are dropped
+        self.last_seq = 0
+        # While a reconnect is being replayed, live events wait here instead of the queue
+        self.backlog: Optional[list[dict]] = None
+
 class ConnectionManager:
-    def __init__(self):
-        # Map user_id to WebSocket connection
-        self.active_connections: dict[str, WebSocket] = {}
-        # Map user_id to user role for notification targeting
-        self.user_roles: dict[str, str] = {}
-        # Map user_id to user email for better notifications
-        self.user_emails: dict[str, str] = {}
-
-    async def connect(self, websocket: WebSocket, user_id: str, user_role: str = None, user_email: str = None):
+    """Registry of live sockets indexed by user, by role and by subscribed topic.
+
+    Connections without topic subscriptions sit in `by_role` and receive every
+    broadcast addressed to their role; subscribed connections sit only in
+    `by_topic` and receive role broadcasts whose topics they asked for.  Either
+    way a notification only touches its actual recipients.
+    """
+
+    def __init__(self, send_timeout: float = WS_SEND_TIMEOUT, queue_size: int = WS_QUEUE_SIZE,
+                 overflow_policy: str = WS_OVERFLOW_POLICY, bus: Optional[NotificationBus] = None):
+        self.connections: set[ClientConnection] = set()
+        self.by_user: dict[str, set[ClientConnection]] = {}
+        self.by_role: dict[Optional[str], set[ClientConnection]] = {}
+        self.by_topic: dict[str, set[ClientConnection]] = {}
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        # Background tasks (writers, socket closes), kept so they are not garbage collected
+        self._pending_deliveries: set[asyncio.Task] = set()
+        # Callbacks that see every delivered message, e.g. cache invalidation
+        self.listeners: list[Callable[[dict], None]] = []
+        self.use_bus(bus or InMemoryBus())
+
+    def use_bus(self, bus: NotificationBus):
+        """Route notifications through `bus`; call bus.start() afterwards for network buses"""
+        self.bus = bus
+        bus.bind(self.deliver)
+
+    @staticmethod
+    def _index_add(index: dict, key, connection: ClientConnection):
+        index.setdefault(key, set()).add(connection)
+
+    @staticmethod
+    def _index_remove(index: dict, key, connection: ClientConnection):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(connection)
+            if not bucket:
+                del index[key]
+
+    async def connect(self, websocket: WebSocket, user_id: str, user_role: str = None, user_email: str = None,
+                      topics=(), last_seq: Optional[int] = None) -> ClientConnection:
+        """Register a socket; with `last_seq`, live events are held back until replay() runs"""
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-        if user_role:
-            self.user_roles[user_id] = user_role
-        if user_email:
-            self.user_emails[user_id] = user_email
-        logger.info(f"Client connected: {user_id} (role: {user_role}, email: {user_email}) - Total connections: {len(self.active_connections)}")
-
-    def disconnect(self, user_id: str):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-        if user_id in self.user_roles:
-            del self.user_roles[user_id]
-        if user_id in self.user_emails:
-            del self.user_emails[user_id]
-        logger.info(f"Client disconnected: {user_id} - Total connections: {len(self.active_connections)}")
+        connection = ClientConnection(websocket, user_id, user_role, user_email,
+                                      OutboundQueue(self.queue_size, self.overflow_policy))
+        if last_seq is not None:
+            connection.last_seq = last_seq
+            connection.backlog = []
+        self.connections.add(connection)
+        self._index_add(self.by_user, user_id, connection)
+        self._index_add(self.by_role, user_role, connection)
+        if topics:
+            self.subscribe(connection, topics)
+        connection.writer = self._spawn(self._writer(connection))
+        websocket_connections.labels(role=role_label(user_role)).inc()
+        logger.info(f"Client connected: {user_id} (role: {user_role}, email: {user_email}) - Total connections: {len(self.connections)}")
+        return connection
 
-    async def send_json_by_user_id(self, message: dict, user_id: str):
-        """Send JSON message to specific user"""
-        if user_id in self.active_connections:
+    def disconnect(self, connection: ClientConnection):
+        if connection not in self.connections:
+            return
+        self.connections.discard(connection)
+        self._index_remove(self.by_user, connection.user_id, connection)
+        self._index_remove(self.by_role, connection.role, connection)
+        for topic in connection.topics:
+            self._index_remove(self.by_topic, topic, connection)
+        connection.queue.close()
+        websocket_connections.labels(role=role_label(connection.role)).dec()
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        logger.info(f"Client disconnected: {connection.user_id} - Total connections: {len(self.connections)}")
+
+    def subscribe(self, connection: ClientConnection, topics) -> set[str]:
+        """Narrow a connection to the given topics; returns its topic set"""
+        wanted = {topic for topic in map(parse_topic, topics) if topic} - connection.topics
+        room = max(WS_MAX_TOPICS - len(connection.topics), 0)
+        wanted = set(sorted(wanted)[:room])
+        if wanted and not connection.topics:
+            self._index_remove(self.by_role, connection.role, connection)
+        for topic in wanted:
+            self._index_add(self.by_topic, topic, connection)
+        connection.topics |= wanted
+        return connection.topics
+
+    def unsubscribe(self, connection: ClientConnection, topics) -> set[str]:
+        """Remove topics; a connection left with none receives all role broadcasts again"""
+        for topic in {topic for topic in map(parse_topic, topics) if topic} & connection.topics:
+            connection.topics.discard(topic)
+            self._index_remove(self.by_topic, topic, connection)
+        if not connection.topics and connection in self.connections:
+            self._index_add(self.by_role, connection.role, connection)
+        return connection.topics
+
+    def _evict(self, connection: ClientConnection):
+        """Drop a slow or broken socket and close it in the background"""
+        self.disconnect(connection)
+        self._spawn(self._close_quietly(connection.websocket))
+
+    async def _close_quietly(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _writer(self, connection: ClientConnection):
+        """Drain one connection's queue, evicting the socket if a send fails or stalls"""
+        queue = connection.queue
+        while True:
+            text = await queue.get()
             try:
-                await self.active_connections[user_id].send_json(message)
-                logger.info(f"Sent notification to user {user_id}: {message}")
+                await asyncio.wait_for(connection.websocket.send_text(text), self.send_timeout)
             except Exception as e:
-                logger.error(f"Failed to send message to user {user_id}: {e}")
-                # Remove stale connection
-                self.disconnect(user_id)
+                logger.error(f"Failed to send message to user {connection.user_id}: {e!r}")
+                websocket_send_failures_counter.labels(reason="timeout" if isinstance(e, asyncio.TimeoutError) else "error").inc()
+                queue.task_done()
+                # Remove stale or slow connection
+                self._evict(connection)
+                return
+            queue.task_done()
+
+    def _enqueue(self, connection: ClientConnection, text: str, key=None) -> bool:
+        if not connection.queue.put(text, key):
+            logger.warning(f"Outbound queue full for user {connection.user_id}, disconnecting")
+            self._evict(connection)
+            return False
+        return True
+
+    def _send_sequenced(self, connection: ClientConnection, message: dict, text: str = None, key=None) -> bool:
+        """Queue a message unless the socket already got its seq; held back during replay"""
+        if connection.backlog is not None:
+            connection.backlog.append(message)
+            return True
+        seq = message.get("seq")
+        if seq is not None:
+            if seq <= connection.last_seq:
+                return False
+            connection.last_seq = seq
+        if text is None:
+            text, key = serialize_message(message), coalesce_key(message)
+        return self._enqueue(connection, text, key)
+
+    def _fan_out(self, message: dict, recipients) -> int:
+        """Serialize once and queue the frame for every recipient connection"""
+        recipients = list(recipients)
+        if not recipients:
+            return 0
+        text = serialize_message(message)
+        key = coalesce_key(message)
+        queued = sum(self._send_sequenced(connection, message, text, key) for connection in recipients)
+        logger.info(f"Queued {message.get('type')} for {queued}/{len(recipients)} connections")
+        return queued
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._pending_deliveries.add(task)
+        task.add_done_callback(self._pending_deliveries.discard)
+        return task
+
+    def role_recipients(self, message: dict, roles=None, exclude_user_id: str = None) -> set[ClientConnection]:
+        """Connections that should see a broadcast to `roles` (None means every role)"""
+        recipients = set()
+        buckets = self.by_role.values() if roles is None else (self.by_role.get(role, ()) for role in roles)
+        for bucket in buckets:
+            recipients.update(bucket)
+        for topic in message_topics(message):
+            for connection in self.by_topic.get(topic, ()):
+                if roles is None or connection.role in roles:
+                    recipients.add(connection)
+        if exclude_user_id is not None:
+            recipients.difference_update(self.by_user.get(exclude_user_id, ()))
+        return recipients
+
+    def user_recipients(self, user_id: str) -> set[ClientConnection]:
+        return set(self.by_user.get(user_id, ()))
+
+    def _accepts_broadcast(self, connection: ClientConnection, message: dict, roles, exclude_user_id) -> bool:
+        if roles is not None and connection.role not in roles:
+            return False
+        if exclude_user_id is not None and connection.user_id == exclude_user_id:
+            return False
+        return not connection.topics or not connection.topics.isdisjoint(message_topics(message))
+
+    def accepts(self, connection: ClientConnection, envelope: dict) -> bool:
+        """Whether deliver() would send this envelope to `connection`; used for replay"""
+        message = envelope["message"]
+        audience = envelope.get("audience")
+        if audience == "user":
+            return connection.user_id == envelope["user_id"]
+        if audience == "roles":
+            return self._accepts_broadcast(connection, message, envelope.get("roles"), envelope.get("exclude_user_id"))
+        if audience == "participants":
+            exclude_user_id = envelope.get("exclude_user_id")
+            if connection.user_id == envelope["user_id"] and exclude_user_id != envelope["user_id"]:
+                return True
+            return self._accepts_broadcast(connection, message, MAINTAINER_ROLES, exclude_user_id)
+        return False
+
+    async def replay(self, connection: ClientConnection):
+        """Queue the logged events a reconnecting socket missed, then the live ones held meanwhile.
+
+        If the gap cannot be replayed the client gets {"type": "resync_required"}
+        with the current seq and should refetch before relying on events again.
+        """
+        try:
+            envelopes, latest, complete = await events_after(connection.last_seq, OUTBOX_REPLAY_LIMIT)
+        except Exception as e:
+            logger.error(f"Replay for user {connection.user_id} failed: {e!r}")
+            envelopes, latest, complete = [], connection.last_seq, False
+        backlog, connection.backlog = connection.backlog or [], None
+        if complete:
+            for envelope in envelopes:
+                if self.accepts(connection, envelope):
+                    self._send_sequenced(connection, envelope["message"])
+        else:
+            logger.info(f"Client {connection.user_id} is too far behind (seq {connection.last_seq}), asking it to resync")
+            self.send_to_connection(connection, {"type": "resync_required", "seq": latest})
+            connection.last_seq = latest
+        for message in backlog:
+            self._send_sequenced(connection, message)
+
+    async def wait_for_deliveries(self):
+        """Wait until every queued frame has been sent or dropped (used on shutdown and in tests)"""
+        await asyncio.gather(*(connection.queue.join() for connection in list(self.connections)))
+        writers = {connection.writer for connection in self.connections}
+        closing = [task for task in self._pending_deliveries if task not in writers]
+        if closing:
+            await asyncio.gather(*closing, return_exceptions=True)
+
+    def send_to_connection(self, connection: ClientConnection, message: dict) -> bool:
+        """Queue a message for one specific socket"""
+        return self._enqueue(connection, serialize_message(message), coalesce_key(message))
+
+    async def publish(self, envelope: dict):
+        """Hand an envelope to the bus; every process, this one included, delivers it locally"""
+        try:
+            await self.bus.publish(envelope)
+        except Exception as e:
+            logger.error(f"Notification bus publish failed, delivering locally only: {e!r}")
+            await self.deliver(envelope)
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """Call `listener(message)` for every envelope this process receives, before fan-out"""
+        self.listeners.append(listener)
+
+    async def deliver(self, envelope: dict):
+        """Queue an envelope's message for the matching sockets held by this process"""
+        started = time.perf_counter()
+        message = envelope["message"]
+        for listener in self.listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                logger.error(f"Notification listener {listener!r} failed: {e!r}")
+        audience = envelope.get("audience")
+        if audience == "user":
+            recipients = self.user_recipients(envelope["user_id"])
+        elif audience == "roles":
+            recipients = self.role_recipients(message, envelope.get("roles"), envelope.get("exclude_user_id"))
+        elif audience == "participants":
+            recipients = self.role_recipients(message, MAINTAINER_ROLES, envelope.get("exclude_user_id"))
+            if envelope.get("exclude_user_id") != envelope["user_id"]:
+                recipients |= self.user_recipients(envelope["user_id"])
+        else:
+            logger.error(f"Dropping envelope with unknown audience {audience!r}")
+            return
+        self._fan_out(message, recipients)
+        websocket_fanout_duration.labels(audience=audience).observe(time.perf_counter() - started)
+
+    async def send_json_by_user_id(self, message: dict, user_id: str):
+        """Send JSON message to every socket of a specific user"""
+        await self.publish(user_envelope(message, user_id))
 
     async def notify_maintainers_and_admins(self, message: dict):
         """Notify all MAINTAINER and ADMIN users"""
         logger.info(f"Notifying maintainers and admins: {message}")
-        notified_count = 0
-        for user_id, role in self.user_roles.items():
-            if role in ['MAINTAINER', 'ADMIN']:
-                await self.send_json_by_user_id(message, user_id)
-                notified_count += 1
-        logger.info(f"Notified {notified_count} maintainers/admins")
+        await self.publish(maintainers_envelope(message))
 
     async def notify_reporter(self, message: dict, reporter_id: str):
         """Notify specific reporter about their issue"""
         logger.info(f"Notifying reporter {reporter_id}: {message}")
-        if reporter_id in self.active_connections:
-            await self.send_json_by_user_id(message, reporter_id)
-            logger.info(f"Successfully notified reporter {reporter_id}")
-        else:
-            logger.info(f"Reporter {reporter_id} not connected")
+        await self.publish(user_envelope(message, reporter_id))
 
     async def notify_all_users(self, message: dict):
         """Broadcast message to all connected users"""
         logger.info(f"Notifying all users: {message}")
-        notified_count = 0
-        for user_id in list(self.active_connections.keys()):
-            await self.send_json_by_user_id(message, user_id)
-            notified_count += 1
-        logger.info(f"Notified {notified_count} users")
+        await self.publish(all_users_envelope(message))
 
     async def notify_issue_participants(self, message: dict, issue_reporter_id: str, exclude_user_id: str = None):
-        """Notify all relevant users about an issue change"""
-        # Notify the reporter (if different from the one making the change)
-        if exclude_user_id != issue_reporter_id:
-            await self.notify_reporter(message, issue_reporter_id)
-        
-        # Notify all maintainers and admins (except the one making the change)
-        for user_id, role in self.user_roles.items():
-            if role in ['MAINTAINER', 'ADMIN'] and user_id != exclude_user_id:
-                await self.send_json_by_user_id(message, user_id)
+        """Notify the reporter and all maintainers/admins, except the user making the change"""
+        await self.publish({
+            "audience": "participants",
+            "user_id": issue_reporter_id,
+            "exclude_user_id": exclude_user_id,
+            "message": message
+        })
 
     def get_connected_users_info(self):
         """Get info about all connected users for debugging"""
         return {
             user_id: {
-                'role': self.user_roles.get(user_id),
-                'email': self.user_emails.get(user_id),
+                'role': next(iter(connections)).role,
+                'email': next(iter(connections)).email,
+                'connections': len(connections),
+                'topics': sorted(set().union(*(connection.topics for connection in connections))),
                 'connected': True
             }
-            for user_id in self.active_connections.keys()
+            for user_id, connections in list(self.by_user.items())
         }
 
 manager = ConnectionManager()
+outbox_dispatcher.bind(manager.publish)
 
-@router.websocket("/notification")
-async def websocket_endpoint(websocket: WebSocket):
+async def handle_client_message(connection: ClientConnection, data: str):
+    """Apply a client control frame: {"action": "subscribe"|"unsubscribe", "topics": [...]}"""
+    try:
+        request = json.loads(data)
+    except ValueError:
+        return
+    if not isinstance(request, dict) or not isinstance(request.get("topics"), list):
+        return
+    if request.get("action") == "subscribe":
+        topics = manager.subscribe(connection, request["topics"])
+    elif request.get("action") == "unsubscribe":
+        topics = manager.unsubscribe(connection, request["topics"])
+    else:
+        return
+    manager.send_to_connection(connection, {"type": "subscriptions", "topics": sorted(topics)})
+
+async def serve_websocket(websocket: WebSocket):
+    """Register a client socket and process its control frames until it goes away"""
     user_id = websocket.query_params.get("userid")
     user_role = websocket.query_params.get("role")
     user_email = websocket.query_params.get("email")
-    
+    topics = [topic for topic in websocket.query_params.get("topics", "").split(",") if topic]
+    last_seq = websocket.query_params.get("last_seq")
+    last_seq = int(last_seq) if last_seq and last_seq.isdigit() else None
+
     if not user_id:
         await websocket.close()
         return
 
-    await manager.connect(websocket, user_id, user_role, user_email)
-    
+    connection = await manager.connect(websocket, user_id, user_role, user_email, topics, last_seq)
+    if last_seq is not None:
+        await manager.replay(connection)
+
     try:
         while True:
-            # Keep connection alive with ping/pong
             data = await websocket.receive_text()
-            # Optional: handle any client messages here
+            await handle_client_message(connection, data)
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        manager.disconnect(connection)
     except Exception as e:
         logger.error(f"WebSocket error for user {user_id}: {e}")
-        manager.disconnect(user_id)
+        manager.disconnect(connection)
+
+@router.websocket("/notification")
+async def websocket_endpoint(websocket: WebSocket):
+    await serve_websocket(websocket)
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Awaitable, Callable, Optional, Tuple
+import hashlib
+import os
+import time
+from fastapi import Request, Response
+from .metrics import response_cache_bytes, response_cache_requests_counter
+from .realtime import manager
+from .user_cache import Principal
+
+# Total bytes of cached response bodies; 0 disables storing (ETags still work)
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Upper bound on staleness for changes that do not emit an event (e.g. worker rollups)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+
+# Realtime message types that mean cached issue reads may be out of date
+INVALIDATING_EVENTS = {
+    "issue_created",
+    "issue_updated",
+    "issue_deleted",
+    "issues_bulk_created",
+    "issues_bulk_updated",
+    # Attachments change the issue's file_path and updated_at
+    "issue_attachment_added",
+    "issue_attachment_deleted",
+}
+
+@dataclass
+class CachedResponse:
+    etag: str
+    body: bytes
+    headers: dict = field(default_factory=dict)
+    expires_at: float = 0.0
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+class ResponseCache:
+    """LRU of serialized GET responses, bounded by total body size and cleared on issue events.
+
+    Entries are keyed by (endpoint, role, scope, query string).  Every
+    invalidation bumps `generation`; a response built before the bump is
+    not stored, so a read racing a write cannot repopulate stale data.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self.size = 0
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key_for(request: Request, principal: Principal, scope=None) -> tuple:
+        return (request.url.path, principal.role, scope, tuple(sorted(request.query_params.multi_items())))
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: CachedResponse, generation: int):
+        if self.ttl <= 0 or len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            entry.expires_at = time.monotonic() + self.ttl
+            self._entries[key] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            response_cache_bytes.set(self.size)
+
+    def _remove(self, key: tuple):
+        self.size -= len(self._entries.pop(key).body)
+        response_cache_bytes.set(self.size)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.size = 0
+            response_cache_bytes.set(0)
+
+    def on_event(self, message: dict):
+        if message.get("type") in INVALIDATING_EVENTS:
+            self.invalidate()
+
+    async def respond(
+        self,
+        request: Request,
+        principal: Principal,
+        build: Callable[[], Awaitable[Tuple[bytes, dict]]],
+        scope=None,
+    ) -> Response:
+        """Serve a JSON GET from the cache, calling `build()` for (body, headers) on a miss.
+
+        Answers 304 when If-None-Match carries the current ETag.
+        """
+        key = self.key_for(request, principal, scope)
+        endpoint = request.url.path
+        entry = self.get(key)
+        if entry is None:
+            generation = self.generation
+            body, headers = await build()
+            entry = CachedResponse(etag=make_etag(body), body=body, headers=headers)
+            self.put(key, entry, generation)
+            result = "miss"
+        else:
+            result = "hit"
+
+        headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache", **entry.headers}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            response_cache_requests_counter.labels(endpoint=endpoint, result="not_modified").inc()
+            return Response(status_code=304, headers=headers)
+        response_cache_requests_counter.labels(endpoint=endpoint, result=result).inc()
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+response_cache = ResponseCache()
+manager.add_listener(response_cache.on_event)
@@ -1,45 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Form
-from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Form, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
+from typing import List, Optional
+import asyncio
 import logging
+import os
+from .database import AsyncSessionLocal
 from .deps import get_db, get_current_user
-from .models import User, Issue, UserRole, IssueSeverity, IssueStatus
-from .schemas import UserCreate, UserLogin, IssueCreate, IssueUpdate, Issue as IssueSchema, DailyStatsOut
-from .auth import create_access_token, get_password_hash, verify_password
-from .realtime import manager
+from .models import User, Issue, DeletedIssue, Attachment, IssueTransition, UserRole, IssueSeverity, IssueStatus
+from .schemas import (
+    UserCreate, UserLogin, IssueCreate, IssueImport, IssueUpdate, Issue as IssueSchema, DailyStatsOut,
+    BulkImportResult, IssueBulkUpdate, BulkUpdateResult, IssueSearchHit, IssueChanges, ProfilingSettings,
+    AttachmentOut, StatusDurationsOut, TrendDayOut, AgePercentilesOut,
+)
+from .auth import create_access_token, hash_password_async, verify_password_async
+from .realtime import manager, serve_websocket, all_users_envelope, maintainers_envelope, user_envelope
+from .outbox import add_event, outbox_dispatcher
+from .metrics import issue_created_counter
+from .user_cache import Principal
+from .stats import apply_stats_delta, get_daily_stats, resolve_stats_range, upsert_daily_stats
+from .transitions import get_status_durations, record_transition, transition_values
+from .analytics import age_percentiles, daily_trends, filter_arrays, issue_arrays
+from .bulk import BULK_CHUNK_SIZE, BULK_MAX_ERRORS, iter_import_rows, status_deltas
+from .pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, STREAM_BATCH_SIZE,
+    encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor, encode_feed_cursor, decode_feed_cursor,
+)
+from .changes import filter_tombstones, retention_horizon, rewind
+from .response_cache import etag_matches, response_cache
+from .serialization import ISSUE_COLUMNS, FastJSONResponse, dump_issue_lines, dump_issue_rows, issue_dict
+from .search import collect_highlights, has_search_terms, highlight_query, search_query
+from .profiling import profiler
+from .attachments import (
+    ATTACHMENT_READ_CHUNK, blob_path, check_declared_size, sanitize_content_type, sanitize_filename, storage_key,
+    store_stream,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+_daily_stats_list = TypeAdapter(List[DailyStatsOut])
+_trend_days = TypeAdapter(List[TrendDayOut])
+_age_percentiles = TypeAdapter(List[AgePercentilesOut])
+
+def _after_commit():
+    """Drop this process's cached issue reads and wake the outbox loop to publish the new events.
+
+    Other processes invalidate when the events reach them; doing it here too
+    means a client reading right after its own write never sees the old data.
+    """
+    response_cache.invalidate()
+    issue_arrays.mark_changed()
+    outbox_dispatcher.wake()
+
 @router.post("/auth/register", response_model=dict)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password_async(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
         role=user.role
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     
     # Create access token
     access_token = create_access_token(data={"sub": str(db_user.id)})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/auth/login")
-def login(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+async def login(email: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_password_async(password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Stored hash used an outdated cost factor; upgrade it transparently
+        user.hashed_password = new_hash
+        await db.commit()
     access_token = create_access_token({
         "sub": str(user.id), 
         "role": user.role,
@@ -48,29 +99,196 @@ def login(email: str = Form(...), password: str = Form(...), db: Session = Depen
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/users/me", response_model=dict)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "email": current_user.email,
         "role": current_user.role
     }
 
-@router.get("/issues", response_model=List[IssueSchema])
-def get_issues(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+def filter_issues(
+    query,
+    current_user: Principal,
+    status: Optional[List[IssueStatus]] = None,
+    severity: Optional[List[IssueSeverity]] = None,
+    reporter_id: Optional[int] = None,
+    updated_since: Optional[datetime] = None,
 ):
+    """Apply role scoping and the list filters shared by issue read endpoints"""
     # Role-based filtering
     if current_user.role == UserRole.REPORTER:
-        return db.query(Issue).filter(Issue.reporter_id == current_user.id).all()
+        query = query.filter(Issue.reporter_id == current_user.id)
+    elif reporter_id is not None:
+        query = query.filter(Issue.reporter_id == reporter_id)
+    if status is not None:
+        query = query.filter(Issue.status.in_(status))
+    if severity is not None:
+        query = query.filter(Issue.severity.in_(severity))
+    if updated_since is not None:
+        query = query.filter(Issue.updated_at >= updated_since)
+    return query
+
+async def _stream_issues_ndjson(current_user: Principal, filters: dict, after, limit: Optional[int]):
+    """Yield matching issues as NDJSON from a server-side cursor using a dedicated session"""
+    async with AsyncSessionLocal() as db:
+        query = filter_issues(select(*ISSUE_COLUMNS), current_user, **filters)
+        if after is not None:
+            query = query.filter(tuple_(Issue.created_at, Issue.id) > after)
+        query = query.order_by(Issue.created_at, Issue.id)
+        if limit is not None:
+            query = query.limit(limit)
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for batch in result.partitions():
+            yield dump_issue_lines(batch)
+
+@router.get("/issues", response_model=List[IssueSchema])
+async def get_issues(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[List[IssueStatus]] = Query(None),
+    severity: Optional[List[IssueSeverity]] = Query(None),
+    reporter_id: Optional[int] = None,
+    updated_since: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List issues in (created_at, id) order, one keyset page at a time.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Pages are cached and carry an ETag; `If-None-Match` gets a 304.
+    With `Accept: application/x-ndjson` every matching row after the cursor
+    is streamed instead, one JSON object per line.
+    """
+    after = decode_cursor(cursor)
+    filters = {
+        "status": status,
+        "severity": severity,
+        "reporter_id": reporter_id,
+        "updated_since": updated_since,
+    }
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _stream_issues_ndjson(current_user, filters, after, limit),
+            media_type="application/x-ndjson",
+        )
+
+    async def build_page():
+        page_size = limit or DEFAULT_PAGE_SIZE
+        query = filter_issues(select(*ISSUE_COLUMNS), current_user, **filters)
+        if after is not None:
+            query = query.filter(tuple_(Issue.created_at, Issue.id) > after)
+        rows = (await db.execute(query.order_by(Issue.created_at, Issue.id).limit(page_size + 1))).all()
+
+        headers = {}
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return dump_issue_rows(rows), headers
+
+    scope = current_user.id if current_user.role == UserRole.REPORTER else None
+    return await response_cache.respond(request, current_user, build_page, scope=scope)
+
+@router.get("/issues/changes", response_model=IssueChanges)
+async def get_issue_changes(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Issues created or updated, and ids deleted, since `cursor`.
+
+    Without a cursor every visible issue is returned (page by page) and
+    deletions are tracked from now on.  Keep calling with the returned
+    cursor while `has_more` is true, then poll with the last one.  A cursor
+    older than the tombstone retention gets 410 and the client must reload.
+    """
+    now = datetime.utcnow()
+    position = decode_feed_cursor(cursor)
+    if position is None:
+        issues_after, deleted_after = None, (now, 0)
     else:
-        return db.query(Issue).all()
+        issues_after, deleted_after = position
+        if deleted_after[0] < retention_horizon(now):
+            raise HTTPException(status_code=410, detail="Cursor has expired; reload all issues")
+    page_size = limit or DEFAULT_PAGE_SIZE
+
+    query = filter_issues(select(Issue), current_user)
+    if issues_after is not None:
+        query = query.filter(tuple_(Issue.updated_at, Issue.id) > issues_after)
+    issues = (await db.scalars(query.order_by(Issue.updated_at, Issue.id).limit(page_size + 1))).all()
+    tombstones = (await db.scalars(
+        filter_tombstones(select(DeletedIssue), current_user, deleted_after)
+        .order_by(DeletedIssue.deleted_at, DeletedIssue.id).limit(page_size + 1)
+    )).all()
+
+    has_more = len(issues) > page_size or len(tombstones) > page_size
+    issues, tombstones = issues[:page_size], tombstones[:page_size]
+    if issues:
+        issues_after = (issues[-1].updated_at, issues[-1].id)
+    if tombstones:
+        deleted_after = (tombstones[-1].deleted_at, tombstones[-1].id)
+    if not has_more:
+        issues_after, deleted_after = rewind(issues_after, now), rewind(deleted_after, now)
+    return {
+        "issues": issues,
+        "deleted": tombstones,
+        "cursor": encode_feed_cursor(issues_after, deleted_after),
+        "has_more": has_more,
+    }
+
+@router.get("/issues/search", response_model=List[IssueSearchHit])
+async def search_issues(
+    q: str = Query(..., min_length=1, max_length=256),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[List[IssueStatus]] = Query(None),
+    severity: Optional[List[IssueSeverity]] = Query(None),
+    reporter_id: Optional[int] = None,
+    updated_since: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over title and description, best matches first.
+
+    Takes the same filters as the issue list; the cursor for the next page
+    is returned in the X-Next-Cursor header.
+    """
+    if not has_search_terms(q):
+        raise HTTPException(status_code=400, detail="Search query has no searchable terms")
+    after = decode_rank_cursor(cursor)
+    page_size = limit or DEFAULT_PAGE_SIZE
+    dialect = db.get_bind().dialect.name
+
+    def apply_filters(query):
+        return filter_issues(
+            query, current_user,
+            status=status, severity=severity, reporter_id=reporter_id, updated_since=updated_since,
+        )
+
+    rows = (await db.execute(search_query(dialect, q, apply_filters, after, page_size + 1))).all()
+    headers = {}
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        headers["X-Next-Cursor"] = encode_rank_cursor(rows[-1].rank, rows[-1].id)
+    if not rows:
+        return FastJSONResponse([], headers=headers)
+
+    highlights = collect_highlights(await db.execute(highlight_query(dialect, q, (row.id for row in rows))))
+    hits = []
+    for row in rows:
+        hit = issue_dict(row)
+        hit["rank"] = row.rank
+        hit["title_highlight"], hit["snippet"] = highlights.get(row.id, ("", ""))
+        hits.append(hit)
+    return FastJSONResponse(hits, headers=headers)
 
 @router.post("/issues", response_model=IssueSchema)
 async def create_issue(
     issue: IssueCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     db_issue = Issue(
         title=issue.title,
@@ -80,10 +298,11 @@ async def create_issue(
         reporter_id=current_user.id
     )
     db.add(db_issue)
-    db.commit()
-    db.refresh(db_issue)
+    await db.flush()
+    await db.run_sync(apply_stats_delta, db_issue.created_at, db_issue.status, 1)
+    record_transition(db, db_issue, None, None, current_user.id, db_issue.created_at)
     
-    # Send real-time notification
+    # Real-time notification, committed together with the issue
     notification_data = {
         "type": "issue_created",
         "issue_id": db_issue.id,
@@ -96,21 +315,205 @@ async def create_issue(
     
     # Notify maintainers and admins when reporter creates issue
     if current_user.role == UserRole.REPORTER:
-        await manager.notify_maintainers_and_admins(notification_data)
+        add_event(db, maintainers_envelope(notification_data))
     # Also notify all users when admin/maintainer creates issue
     elif current_user.role in [UserRole.ADMIN, UserRole.MAINTAINER]:
-        await manager.notify_all_users(notification_data)
+        add_event(db, all_users_envelope(notification_data))
+    await db.commit()
+    await db.refresh(db_issue)
+    issue_created_counter.inc()
+    _after_commit()
     
     return db_issue
 
+def _record_row_error(result: dict, row_number: int, error: str):
+    result["failed"] += 1
+    if len(result["errors"]) < BULK_MAX_ERRORS:
+        result["errors"].append({"row": row_number, "error": error})
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+
+async def _import_chunk(db: AsyncSession, chunk: list, current_user: Principal, result: dict) -> List[int]:
+    """Insert one chunk with a single multi-row INSERT and commit it with its stats deltas"""
+    reporter_ids = {issue.reporter_id for _, issue in chunk if issue.reporter_id is not None}
+    known_reporters = set()
+    if reporter_ids:
+        known_reporters = set(await db.scalars(select(User.id).where(User.id.in_(reporter_ids))))
+
+    now = datetime.utcnow()
+    rows, values = [], []
+    for row_number, issue in chunk:
+        if issue.reporter_id is not None and issue.reporter_id not in known_reporters:
+            _record_row_error(result, row_number, f"Unknown reporter_id {issue.reporter_id}")
+            continue
+        rows.append(row_number)
+        values.append({
+            "title": issue.title,
+            "description": issue.description,
+            "severity": issue.severity,
+            "status": issue.status,
+            "reporter_id": issue.reporter_id or current_user.id,
+            "created_at": issue.created_at or now,
+            "updated_at": now,
+        })
+    if not values:
+        return []
+
+    try:
+        ids = (await db.scalars(insert(Issue).returning(Issue.id, sort_by_parameter_order=True), values)).all()
+        deltas = status_deltas((value["created_at"], value["status"], 1) for value in values)
+        await db.run_sync(upsert_daily_stats, deltas, True)
+        # Imported issues are taken to have held their status since created_at
+        await db.execute(insert(IssueTransition), [
+            transition_values(issue_id, value["created_at"], None, value["status"], None, value["severity"],
+                              current_user.id, value["created_at"])
+            for issue_id, value in zip(ids, values)
+        ])
+        add_event(db, maintainers_envelope({
+            "type": "issues_bulk_created",
+            "count": len(ids),
+            "first_issue_id": ids[0],
+            "last_issue_id": ids[-1],
+            "created_by_email": current_user.email,
+            "created_by_role": current_user.role,
+        }))
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Bulk import chunk of {len(values)} rows failed: {e!r}")
+        for row_number in rows:
+            _record_row_error(result, row_number, "Chunk rejected by the database")
+        return []
+
+    result["created"] += len(ids)
+    issue_created_counter.inc(len(ids))
+    _after_commit()
+    return ids
+
+@router.post("/issues/bulk", response_model=BulkImportResult)
+async def bulk_create_issues(
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create issues from a JSON array, or an NDJSON/CSV upload that is parsed as it streams.
+
+    Rows are validated one by one and inserted BULK_CHUNK_SIZE at a time,
+    each chunk in its own transaction; invalid rows are reported by row
+    number and skipped.  Only admins may set reporter_id or created_at.
+    """
+    result = {"created": 0, "failed": 0, "errors": []}
+    chunk = []
+    async for row_number, data, error in iter_import_rows(request):
+        if error is None and not isinstance(data, dict):
+            error = "Expected an object"
+        if error is None:
+            try:
+                issue = IssueImport.model_validate(data)
+            except ValidationError as e:
+                error = _format_validation_error(e)
+        if error is None and current_user.role != UserRole.ADMIN and (issue.reporter_id is not None or issue.created_at is not None):
+            error = "Only admins can set reporter_id or created_at"
+        if error is not None:
+            _record_row_error(result, row_number, error)
+            continue
+        chunk.append((row_number, issue))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await _import_chunk(db, chunk, current_user, result)
+            chunk = []
+    if chunk:
+        await _import_chunk(db, chunk, current_user, result)
+    return result
+
+@router.patch("/issues/bulk", response_model=BulkUpdateResult)
+async def bulk_update_issues(
+    bulk_update: IssueBulkUpdate,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply the same status/severity change to every issue matching a filter.
+
+    Matching ids are walked in id order BULK_CHUNK_SIZE at a time; each chunk
+    is one UPDATE plus its stats deltas in one transaction, followed by one
+    summary event for maintainers/admins and one per affected reporter.
+    """
+    if current_user.role not in [UserRole.ADMIN, UserRole.MAINTAINER]:
+        raise HTTPException(status_code=403, detail="Only admins and maintainers can bulk update issues")
+
+    criteria = bulk_update.filter
+    changes = bulk_update.changes.model_dump(exclude_none=True)
+    query = filter_issues(
+        select(Issue.id, Issue.created_at, Issue.status, Issue.severity, Issue.reporter_id),
+        current_user,
+        status=criteria.status,
+        severity=criteria.severity,
+        reporter_id=criteria.reporter_id,
+        updated_since=criteria.updated_since,
+    )
+    if criteria.ids is not None:
+        query = query.filter(Issue.id.in_(criteria.ids))
+
+    updated = 0
+    last_id = 0
+    while True:
+        matched = (await db.execute(query.filter(Issue.id > last_id).order_by(Issue.id).limit(BULK_CHUNK_SIZE))).all()
+        if not matched:
+            break
+        last_id = matched[-1].id
+        ids = [row.id for row in matched]
+        now = datetime.utcnow()
+        await db.execute(
+            update(Issue).where(Issue.id.in_(ids)).values(**changes, updated_at=now),
+            execution_options={"synchronize_session": False},
+        )
+        if "status" in changes:
+            deltas = status_deltas(
+                delta
+                for row in matched if row.status != changes["status"]
+                for delta in ((row.created_at, row.status, -1), (row.created_at, changes["status"], 1))
+            )
+            await db.run_sync(upsert_daily_stats, deltas, True)
+        transitions = [
+            transition_values(
+                row.id, row.created_at, row.status, changes.get("status", row.status),
+                row.severity, changes.get("severity", row.severity), current_user.id, now,
+            )
+            for row in matched
+            if changes.get("status", row.status) != row.status or changes.get("severity", row.severity) != row.severity
+        ]
+        if transitions:
+            await db.execute(insert(IssueTransition), transitions)
+
+        notification_data = {
+            "type": "issues_bulk_updated",
+            "count": len(ids),
+            "first_issue_id": ids[0],
+            "last_issue_id": ids[-1],
+            "changes": changes,
+            "updated_by_email": current_user.email,
+            "updated_by_role": current_user.role,
+        }
+        add_event(db, maintainers_envelope(notification_data))
+        by_reporter = {}
+        for row in matched:
+            if row.reporter_id != current_user.id:
+                by_reporter.setdefault(row.reporter_id, []).append(row.id)
+        for reporter_id, issue_ids in by_reporter.items():
+            add_event(db, user_envelope({**notification_data, "count": len(issue_ids), "issue_ids": issue_ids[:100]}, str(reporter_id)))
+        await db.commit()
+        updated += len(ids)
+        _after_commit()
+    return {"updated": updated}
+
 @router.put("/issues/{issue_id}", response_model=IssueSchema)
 async def update_issue(
     issue_id: int,
     issue_update: IssueUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    db_issue = db.query(Issue).filter(Issue.id == issue_id).first()
+    db_issue = await db.get(Issue, issue_id)
     if not db_issue:
         raise HTTPException(status_code=404, detail="Issue not found")
     
@@ -123,15 +526,21 @@ async def update_issue(
             raise HTTPException(status_code=403, detail="Reporters cannot change issue status")
     
     # Update fields
+    previous_status = db_issue.status
+    previous_severity = db_issue.severity
     update_data = issue_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_issue, field, value)
     
-    db_issue.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_issue)
+    now = datetime.utcnow()
+    if db_issue.status != previous_status:
+        await db.run_sync(apply_stats_delta, db_issue.created_at, previous_status, -1)
+        await db.run_sync(apply_stats_delta, db_issue.created_at, db_issue.status, 1)
+    if db_issue.status != previous_status or db_issue.severity != previous_severity:
+        record_transition(db, db_issue, previous_status, previous_severity, current_user.id, now)
+    db_issue.updated_at = now
     
-    # Send real-time notification
+    # Real-time notification, committed together with the change
     notification_data = {
         "type": "issue_updated",
         "issue_id": db_issue.id,
@@ -147,21 +556,24 @@ async def update_issue(
     if current_user.role in [UserRole.ADMIN, UserRole.MAINTAINER]:
         # ADMIN/MAINTAINER updated issue → Notify the reporter and all maintainers/admins
         if db_issue.reporter_id != current_user.id:
-            await manager.notify_reporter(notification_data, str(db_issue.reporter_id))
-        await manager.notify_maintainers_and_admins(notification_data)
+            add_event(db, user_envelope(notification_data, str(db_issue.reporter_id)))
+        add_event(db, maintainers_envelope(notification_data))
     elif current_user.role == UserRole.REPORTER:
         # REPORTER updated their own issue → Notify MAINTAINER and ADMIN
-        await manager.notify_maintainers_and_admins(notification_data)
+        add_event(db, maintainers_envelope(notification_data))
+    await db.commit()
+    await db.refresh(db_issue)
+    _after_commit()
     
     return db_issue
 
 @router.delete("/issues/{issue_id}")
 async def delete_issue(
     issue_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    db_issue = db.query(Issue).filter(Issue.id == issue_id).first()
+    db_issue = await db.get(Issue, issue_id)
     if not db_issue:
         raise HTTPException(status_code=404, detail="Issue not found")
     
@@ -169,7 +581,8 @@ async def delete_issue(
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Only admins can delete issues")
     
-    # Send real-time notification before deletion
+    # The notification is committed with the delete and dispatched afterwards,
+    # so caches invalidated by it cannot reload the deleted row
     notification_data = {
         "type": "issue_deleted",
         "issue_id": db_issue.id,
@@ -178,50 +591,268 @@ async def delete_issue(
         "reporter_id": db_issue.reporter_id
     }
     
+    await db.run_sync(apply_stats_delta, db_issue.created_at, db_issue.status, -1)
+    db.add(DeletedIssue(issue_id=db_issue.id, reporter_id=db_issue.reporter_id))
+    await db.delete(db_issue)
     # Notify the reporter and all maintainers/admins
-    if db_issue.reporter_id != current_user.id:
-        await manager.notify_reporter(notification_data, str(db_issue.reporter_id))
-    await manager.notify_maintainers_and_admins(notification_data)
-    
-    db.delete(db_issue)
-    db.commit()
+    if notification_data["reporter_id"] != current_user.id:
+        add_event(db, user_envelope(notification_data, str(notification_data["reporter_id"])))
+    add_event(db, maintainers_envelope(notification_data))
+    await db.commit()
+    _after_commit()
     
     return {"message": "Issue deleted successfully"}
 
+async def _get_visible_issue(db: AsyncSession, issue_id: int, current_user: Principal) -> Issue:
+    db_issue = await db.get(Issue, issue_id)
+    if not db_issue:
+        raise HTTPException(status_code=404, detail="Issue not found")
+    if current_user.role == UserRole.REPORTER and db_issue.reporter_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Can only access your own issues")
+    return db_issue
+
+@router.post("/issues/{issue_id}/attachments", response_model=AttachmentOut, status_code=201)
+async def upload_attachment(
+    issue_id: int,
+    request: Request,
+    filename: Optional[str] = Query(None, description="Name to store the upload under"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Attach the raw request body (not multipart) to an issue; Content-Type is kept as the file's type"""
+    check_declared_size(request.headers.get("content-length"))
+    await _get_visible_issue(db, issue_id, current_user)
+    # Don't hold a pooled connection while the body streams in
+    await db.commit()
+
+    blob = await store_stream(request.stream())
+
+    db_issue = await db.get(Issue, issue_id)
+    if not db_issue:
+        # Deleted during the upload; the unreferenced blob is left to the worker's sweep
+        raise HTTPException(status_code=404, detail="Issue not found")
+    attachment = Attachment(
+        issue_id=issue_id,
+        sha256=blob.sha256,
+        size=blob.size,
+        filename=sanitize_filename(filename),
+        content_type=sanitize_content_type(request.headers.get("content-type")),
+        uploaded_by_id=current_user.id,
+    )
+    db.add(attachment)
+    db_issue.file_path = storage_key(blob.sha256)
+    db_issue.updated_at = datetime.utcnow()
+
+    notification_data = {
+        "type": "issue_attachment_added",
+        "issue_id": issue_id,
+        "title": db_issue.title,
+        "filename": attachment.filename,
+        "size": blob.size,
+        "uploaded_by_email": current_user.email,
+        "reporter_id": db_issue.reporter_id
+    }
+    if db_issue.reporter_id != current_user.id:
+        add_event(db, user_envelope(notification_data, str(db_issue.reporter_id)))
+    add_event(db, maintainers_envelope(notification_data))
+    await db.commit()
+    _after_commit()
+    return attachment
+
+@router.get("/issues/{issue_id}/attachments", response_model=List[AttachmentOut])
+async def list_attachments(
+    issue_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    await _get_visible_issue(db, issue_id, current_user)
+    return (await db.scalars(select(Attachment).where(Attachment.issue_id == issue_id).order_by(Attachment.id))).all()
+
+@router.api_route("/issues/{issue_id}/attachments/{attachment_id}", methods=["GET", "HEAD"])
+async def download_attachment(
+    issue_id: int,
+    attachment_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Serve an attachment with Range/If-Range support; the ETag is the content hash"""
+    await _get_visible_issue(db, issue_id, current_user)
+    attachment = await db.get(Attachment, attachment_id)
+    if not attachment or attachment.issue_id != issue_id:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    # Release the pooled connection before a possibly long transfer
+    await db.commit()
+
+    etag = f'"{attachment.sha256}"'
+    # An attachment id always names the same bytes
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable", "X-Content-Type-Options": "nosniff"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    path = blob_path(attachment.sha256)
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        logger.error(f"Attachment {attachment_id} references missing blob {attachment.sha256}")
+        raise HTTPException(status_code=404, detail="Attachment content is missing")
+    # Servers implementing the ASGI pathsend extension send the file themselves (zero-copy);
+    # otherwise it is read in ATTACHMENT_READ_CHUNK pieces off the event loop
+    response = FileResponse(path, media_type=attachment.content_type, filename=attachment.filename,
+                            headers=headers, stat_result=stat_result)
+    response.chunk_size = ATTACHMENT_READ_CHUNK
+    return response
+
+@router.delete("/issues/{issue_id}/attachments/{attachment_id}", status_code=204)
+async def delete_attachment(
+    issue_id: int,
+    attachment_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    db_issue = await _get_visible_issue(db, issue_id, current_user)
+    attachment = await db.get(Attachment, attachment_id)
+    if not attachment or attachment.issue_id != issue_id:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    if current_user.role == UserRole.REPORTER and attachment.uploaded_by_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Can only delete your own attachments")
+
+    await db.delete(attachment)
+    await db.flush()
+    latest = await db.scalar(
+        select(Attachment.sha256).where(Attachment.issue_id == issue_id).order_by(Attachment.id.desc()).limit(1)
+    )
+    db_issue.file_path = storage_key(latest) if latest else None
+    db_issue.updated_at = datetime.utcnow()
+    add_event(db, maintainers_envelope({
+        "type": "issue_attachment_deleted",
+        "issue_id": issue_id,
+        "attachment_id": attachment_id,
+        "deleted_by_email": current_user.email,
+    }))
+    await db.commit()
+    _after_commit()
+
 @router.get("/stats/dashboard", response_model=List[DailyStatsOut])
-def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_dashboard_stats(
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    # This is a placeholder - implement actual stats logic
-    return []
+    """Per-day total/open/closed counts for issues created in [start, end] (default: last 30 days)"""
+    start, end = resolve_stats_range(start, end)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    async def build_stats():
+        return _daily_stats_list.dump_json(await db.run_sync(get_daily_stats, start, end)), {}
+
+    return await response_cache.respond(request, current_user, build_stats)
+
+@router.get("/stats/trends", response_model=List[TrendDayOut])
+async def get_trend_stats(
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    severity: Optional[List[IssueSeverity]] = Query(None),
+    reporter_id: Optional[int] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Per-day opened/closed counts and backlog burn-down for [start, end] (default: last 30 days)"""
+    start, end = resolve_stats_range(start, end)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    async def build_trends():
+        arrays = filter_arrays(await issue_arrays.get(db), severity, reporter_id)
+        return _trend_days.dump_json(await asyncio.to_thread(daily_trends, arrays, start, end)), {}
+
+    return await response_cache.respond(request, current_user, build_trends)
+
+@router.get("/stats/age-percentiles", response_model=List[AgePercentilesOut])
+async def get_age_percentile_stats(
+    request: Request,
+    reporter_id: Optional[int] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Age percentiles of currently open issues per severity"""
+    async def build_percentiles():
+        arrays = filter_arrays(await issue_arrays.get(db), reporter_id=reporter_id)
+        return _age_percentiles.dump_json(await asyncio.to_thread(age_percentiles, arrays, datetime.utcnow())), {}
+
+    return await response_cache.respond(request, current_user, build_percentiles)
+
+@router.get("/stats/status-durations", response_model=StatusDurationsOut)
+async def get_status_duration_stats(
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    severity: Optional[List[IssueSeverity]] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Time-in-status percentiles and mean time to resolution per severity for [start, end].
+
+    Served from the worker's per-day rollups, so figures trail the latest
+    changes by up to one aggregation run.
+    """
+    start, end = resolve_stats_range(start, end)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    async def build_stats():
+        return (await db.run_sync(get_status_durations, start, end, severity)).model_dump_json().encode(), {}
+
+    return await response_cache.respond(request, current_user, build_stats)
 
 @router.get("/debug/connections")
-def get_connected_users(current_user: User = Depends(get_current_user)):
+def get_connected_users(current_user: Principal = Depends(get_current_user)):
     """Debug endpoint to see connected users (admin only)"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin only")
     return manager.get_connected_users_info()
 
+@router.get("/debug/profiling")
+def get_profiling_settings(current_user: Principal = Depends(get_current_user)):
+    """Request profiling settings of the process answering (admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return profiler.settings()
+
+@router.put("/debug/profiling")
+def update_profiling_settings(settings: ProfilingSettings, current_user: Principal = Depends(get_current_user)):
+    """Turn request profiling on/off or retune it in this process, without a restart (admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin only")
+    profiler.configure(**settings.model_dump())
+    return profiler.settings()
+
+@router.get("/debug/profiles")
+def list_profiles(current_user: Principal = Depends(get_current_user)):
+    """Summaries of the most recent request profiles in this process, newest first (admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return profiler.summaries()
+
+@router.get("/debug/profiles/{profile_id}")
+def get_profile(profile_id: int, current_user: Principal = Depends(get_current_user)):
+    """Stack samples and SQL of one profiled request (admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin only")
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (evicted or recorded by another process)")
+    return profile
+
+@router.delete("/debug/profiles", status_code=204)
+def clear_profiles(current_user: Principal = Depends(get_current_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin only")
+    profiler.clear()
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    user_id = websocket.query_params.get("userid")
-    user_role = websocket.query_params.get("role")
-    user_email = websocket.query_params.get("email")
-    
-    if not user_id:
-        await websocket.close()
-        return
-
-    await manager.connect(websocket, user_id, user_role, user_email)
-    
-    try:
-        while True:
-            # Keep connection alive with ping/pong
-            data = await websocket.receive_text()
-            # Optional: handle any client messages here
-    except WebSocketDisconnect:
-        manager.disconnect(user_id)
-    except Exception as e:
-        logger.error(f"WebSocket error for user {user_id}: {e}")
-        manager.disconnect(user_id) 
\ No newline at end of file
+    await serve_websocket(websocket)
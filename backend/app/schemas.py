@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 from typing import Optional, List
 from .models import IssueSeverity, IssueStatus, UserRole
@@ -30,6 +30,11 @@ class IssueBase(BaseModel):
 class IssueCreate(IssueBase):
     pass
 
+class IssueImport(IssueCreate):
+    # Admin-only overrides for migrating issues from another tracker
+    reporter_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
 class IssueUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -46,8 +51,117 @@ class Issue(IssueBase):
     class Config:
         from_attributes = True
 
+class IssueSearchHit(Issue):
+    rank: float
+    # HTML-escaped text with matches wrapped in <mark>
+    title_highlight: str
+    snippet: str
+
+class DeletedIssueOut(BaseModel):
+    issue_id: int
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class IssueChanges(BaseModel):
+    issues: List[Issue]
+    deleted: List[DeletedIssueOut]
+    cursor: str
+    has_more: bool
+
+class AttachmentOut(BaseModel):
+    id: int
+    issue_id: int
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    uploaded_by_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class DailyStatsOut(BaseModel):
     date: str
     total_issues: int
     open_issues: int
-    closed_issues: int 
\ No newline at end of file
+    closed_issues: int
+
+class TrendDayOut(BaseModel):
+    date: str
+    opened: int
+    closed: int
+    backlog: int
+
+class AgePercentilesOut(BaseModel):
+    severity: IssueSeverity
+    open_issues: int
+    p50_seconds: Optional[float] = None
+    p90_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+    max_seconds: Optional[float] = None
+
+class DurationSummary(BaseModel):
+    status: IssueStatus
+    severity: IssueSeverity
+    count: int
+    mean_seconds: float
+    p50_seconds: Optional[float] = None
+    p90_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+
+class ResolutionDay(BaseModel):
+    date: str
+    severity: IssueSeverity
+    resolved: int
+    mttr_seconds: float
+
+class StatusDurationsOut(BaseModel):
+    start: str
+    end: str
+    time_in_status: List[DurationSummary]
+    resolution: List[DurationSummary]
+    resolution_by_day: List[ResolutionDay]
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[BulkRowError]
+
+class IssueBulkFilter(BaseModel):
+    # An empty list would select nothing, or everything if read as "not set"
+    ids: Optional[List[int]] = Field(None, min_length=1)
+    status: Optional[List[IssueStatus]] = Field(None, min_length=1)
+    severity: Optional[List[IssueSeverity]] = Field(None, min_length=1)
+    reporter_id: Optional[int] = None
+    updated_since: Optional[datetime] = None
+
+class IssueBulkChanges(BaseModel):
+    status: Optional[IssueStatus] = None
+    severity: Optional[IssueSeverity] = None
+
+class IssueBulkUpdate(BaseModel):
+    filter: IssueBulkFilter
+    changes: IssueBulkChanges
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if not self.filter.model_dump(exclude_none=True):
+            raise ValueError("filter must set at least one criterion")
+        if not self.changes.model_dump(exclude_none=True):
+            raise ValueError("changes must set status or severity")
+        return self
+
+class BulkUpdateResult(BaseModel):
+    updated: int
+
+class ProfilingSettings(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
+    slow_ms: Optional[float] = Field(None, ge=0)
@@ -0,0 +1,87 @@
+"""
+Ranked full-text search over issue titles and descriptions.
+
+Postgres matches `websearch_to_tsquery` against the generated
+`issues.search_vector` and ranks with `ts_rank_cd` (title weighted above
+description).  SQLite matches the `issues_fts` FTS5 table and ranks with
+bm25, negated so that on both backends a higher rank is a better hit.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+import html
+import re
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.sql import column, table
+from .models import Issue, SEARCH_TS_CONFIG
+from .serialization import ISSUE_COLUMNS
+
+# Relative bm25 weights of the title and description FTS5 columns
+FTS_COLUMN_WEIGHTS = (10.0, 1.0)
+
+# Placeholders wrapped around matches by the database, swapped for <mark>
+# tags after the surrounding issue text has been HTML-escaped
+_MARK_START, _MARK_STOP = "\x02", "\x03"
+
+issues_fts = table("issues_fts", column("rowid"), column("title"), column("description"))
+
+def fts_match_expression(q: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, operators are not interpreted"""
+    return " ".join(f'"{token}"' for token in re.findall(r"\w+", q))
+
+def has_search_terms(q: str) -> bool:
+    return bool(re.search(r"\w", q))
+
+def match_subquery(dialect: str, q: str):
+    """(id, rank) of every issue matching `q`"""
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_TS_CONFIG, q)
+        vector = literal_column("issues.search_vector")
+        return select(
+            Issue.id.label("id"),
+            func.ts_rank_cd(vector, tsquery).label("rank"),
+        ).where(vector.op("@@")(tsquery)).subquery("matches")
+    if dialect == "sqlite":
+        fts = literal_column("issues_fts")
+        return select(
+            issues_fts.c.rowid.label("id"),
+            (-func.bm25(fts, *FTS_COLUMN_WEIGHTS)).label("rank"),
+        ).where(fts.op("MATCH")(fts_match_expression(q))).subquery("matches")
+    raise NotImplementedError(f"Full-text search is not available on {dialect}")
+
+def search_query(dialect: str, q: str, query_fn, after: Optional[Tuple[float, int]], limit: int):
+    """Best-first page of ISSUE_COLUMNS + rank rows after the (rank, id) keyset position.
+
+    `query_fn` receives the joined select and applies scoping and filters.
+    """
+    matches = match_subquery(dialect, q)
+    query = query_fn(select(*ISSUE_COLUMNS, matches.c.rank).join(matches, matches.c.id == Issue.id))
+    if after is not None:
+        rank, issue_id = after
+        query = query.filter(or_(matches.c.rank < rank, and_(matches.c.rank == rank, matches.c.id > issue_id)))
+    return query.order_by(matches.c.rank.desc(), matches.c.id).limit(limit)
+
+def highlight_query(dialect: str, q: str, ids: Iterable[int]):
+    """(id, title, snippet) with marked matches, computed for one page of ids only"""
+    ids = list(ids)
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_TS_CONFIG, q)
+        marks = f"StartSel={_MARK_START}, StopSel={_MARK_STOP}"
+        return select(
+            Issue.id,
+            func.ts_headline(SEARCH_TS_CONFIG, func.coalesce(Issue.title, ""), tsquery, f"{marks}, HighlightAll=true"),
+            func.ts_headline(SEARCH_TS_CONFIG, func.coalesce(Issue.description, ""), tsquery,
+                             f"{marks}, MaxFragments=2, MaxWords=20, MinWords=5"),
+        ).where(Issue.id.in_(ids))
+    fts = literal_column("issues_fts")
+    return select(
+        issues_fts.c.rowid,
+        func.highlight(fts, 0, _MARK_START, _MARK_STOP),
+        func.snippet(fts, 1, _MARK_START, _MARK_STOP, "…", 24),
+    ).where(fts.op("MATCH")(fts_match_expression(q)), issues_fts.c.rowid.in_(ids))
+
+def render_highlight(text: Optional[str]) -> str:
+    """HTML-escape issue text, then turn the match placeholders into <mark> tags"""
+    escaped = html.escape(text or "")
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_STOP, "</mark>")
+
+def collect_highlights(rows) -> Dict[int, Tuple[str, str]]:
+    return {row[0]: (render_highlight(row[1]), render_highlight(row[2])) for row in rows}
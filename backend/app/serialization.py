@@ -0,0 +1,60 @@
+"""
+Fast JSON for issue reads.
+
+Issue rows are selected as plain column tuples and encoded straight to
+bytes with orjson, skipping ORM identity-map bookkeeping, per-row Pydantic
+validation and the stdlib encoder.  The rows come from our own schema, so
+the output matches what `schemas.Issue` would produce.  Without orjson the
+stdlib encoder is used.
+"""
+from datetime import date, datetime
+from typing import Any, Iterable
+import json
+from fastapi.responses import JSONResponse
+from .models import Issue
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+# Columns of schemas.Issue, in the order they are selected and emitted
+ISSUE_COLUMNS = (
+    Issue.id,
+    Issue.title,
+    Issue.description,
+    Issue.severity,
+    Issue.status,
+    Issue.file_path,
+    Issue.created_at,
+    Issue.updated_at,
+    Issue.reporter_id,
+)
+ISSUE_FIELDS = tuple(column.key for column in ISSUE_COLUMNS)
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+def issue_dict(row) -> dict:
+    """Map a row selected with ISSUE_COLUMNS (optionally followed by extra columns) to a dict"""
+    return dict(zip(ISSUE_FIELDS, row))
+
+def dump_issue_rows(rows: Iterable) -> bytes:
+    return dumps([issue_dict(row) for row in rows])
+
+def dump_issue_lines(rows: Iterable) -> bytes:
+    """NDJSON: one issue object per line"""
+    return b"".join(dumps(issue_dict(row)) + b"\n" for row in rows)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; the app's default response class"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
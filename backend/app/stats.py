@@ -0,0 +1,127 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from .models import DailyStats, Issue, IssueStatus
+from .schemas import DailyStatsOut
+
+# Statuses counted as closed on the dashboard; everything else is open
+CLOSED_STATUSES = {IssueStatus.DONE}
+
+def stats_day(value: datetime) -> datetime:
+    """Truncate a timestamp to the midnight bucket used as DailyStats.date"""
+    return datetime(value.year, value.month, value.day)
+
+def _dialect_insert(db: Session):
+    """Return the dialect-specific insert() that supports ON CONFLICT, if any"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+def upsert_daily_stats(db: Session, rows: Iterable[Tuple[datetime, IssueStatus, int]], increment: bool = False):
+    """Write (day, status, count) rollups in one statement.
+
+    With `increment` the counts are added to existing rows (delta updates),
+    otherwise they replace them (rebuilds).  Uses INSERT .. ON CONFLICT on
+    Postgres and SQLite and falls back to per-row updates elsewhere.
+    """
+    values = [{"date": day, "status": status, "count": count} for day, status, count in rows]
+    if not values:
+        return
+    insert = _dialect_insert(db)
+    if insert is not None:
+        stmt = insert(DailyStats).values(values)
+        new_count = DailyStats.count + stmt.excluded.count if increment else stmt.excluded.count
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyStats.date, DailyStats.status],
+            set_={"count": new_count}
+        ))
+        return
+    for value in values:
+        stat = db.query(DailyStats).filter(
+            DailyStats.date == value["date"],
+            DailyStats.status == value["status"]
+        ).with_for_update().first()
+        if stat is None:
+            db.add(DailyStats(**value))
+        elif increment:
+            stat.count = DailyStats.count + value["count"]
+        else:
+            stat.count = value["count"]
+    db.flush()
+
+def apply_stats_delta(db: Session, created_at: datetime, status: IssueStatus, delta: int):
+    """Add `delta` to the rollup of issues created on `created_at`'s day with `status`.
+
+    Runs inside the caller's transaction so the rollup commits together with
+    the issue change that caused it.
+    """
+    if delta:
+        upsert_daily_stats(db, [(stats_day(created_at), status, delta)], increment=True)
+
+def rebuild_daily_stats(db: Session, start: date, end: date) -> int:
+    """Recompute the rollups for days in [start, end) from `issues` with one GROUP BY.
+
+    The filter is a plain range on created_at so it can use an index; every
+    (day, status) pair in the range is written, including zeros, so stale
+    counts are overwritten.  Returns the number of rows written.
+    """
+    start_dt = datetime.combine(start, datetime.min.time())
+    end_dt = datetime.combine(end, datetime.min.time())
+    issue_day = func.date(Issue.created_at)
+    counts = {}
+    for day, status, count in db.query(issue_day, Issue.status, func.count(Issue.id)).filter(
+        Issue.created_at >= start_dt,
+        Issue.created_at < end_dt
+    ).group_by(issue_day, Issue.status):
+        # func.date() returns a string on SQLite and a date on Postgres
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        counts[(day, status)] = count
+
+    rows = []
+    day = start
+    while day < end:
+        for status in IssueStatus:
+            rows.append((datetime.combine(day, datetime.min.time()), status, counts.get((day, status), 0)))
+        day += timedelta(days=1)
+    upsert_daily_stats(db, rows)
+    return len(rows)
+
+def get_daily_stats(db: Session, start: date, end: date) -> List[DailyStatsOut]:
+    """Return one DailyStatsOut per day in [start, end] from the precomputed rollups"""
+    rows = db.query(DailyStats.date, DailyStats.status, DailyStats.count).filter(
+        DailyStats.date >= datetime.combine(start, datetime.min.time()),
+        DailyStats.date < datetime.combine(end + timedelta(days=1), datetime.min.time())
+    ).all()
+
+    totals = {}
+    for day, status, count in rows:
+        bucket = totals.setdefault(day.date(), [0, 0])
+        if status in CLOSED_STATUSES:
+            bucket[1] += count
+        else:
+            bucket[0] += count
+
+    result = []
+    day = start
+    while day <= end:
+        open_count, closed_count = totals.get(day, (0, 0))
+        result.append(DailyStatsOut(
+            date=day.isoformat(),
+            total_issues=open_count + closed_count,
+            open_issues=open_count,
+            closed_issues=closed_count
+        ))
+        day += timedelta(days=1)
+    return result
+
+def resolve_stats_range(start: Optional[date], end: Optional[date], default_days: int = 30):
+    """Fill in a missing end (today) and start (`default_days` before end)"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=default_days - 1)
+    return start, end
@@ -0,0 +1,253 @@
+"""
+Issue status/severity history and the time-in-status / resolution rollups built from it.
+
+Every change of an issue's status or severity appends an `issue_transitions`
+row in the same transaction as the change (creation appends one with no
+`from_status`).  The worker folds new rows into `status_duration_stats`,
+keyed by (day, kind, status, severity):
+
+- time_in_status: a stint in a status, from the transition that entered it to
+  the one that left it, counted on the day it ended under the severity the
+  issue had when leaving;
+- resolution: creation to reaching a closed status (from an open one),
+  counted on the day it was reached under the severity at that moment.
+
+Each rollup row keeps a count, a sum and a histogram over log-scale buckets,
+all of which add up across days, so the analytics endpoint answers any date
+range from (days x statuses x severities) rows instead of the history.
+
+Rows are folded in id order past the `aggregation_cursors` position, which
+commits with the rollups.  Rows younger than TRANSITION_STATS_SETTLE_SECONDS
+are left for the next run, so a transaction that took an id earlier but
+commits later is not skipped.
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+import json
+import math
+import os
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .models import AggregationCursor, IssueSeverity, IssueStatus, IssueTransition, StatusDurationStats
+from .schemas import DurationSummary, ResolutionDay, StatusDurationsOut
+from .stats import CLOSED_STATUSES, stats_day
+
+# Transitions folded into the rollups per worker transaction
+TRANSITION_STATS_BATCH_SIZE = int(os.getenv("TRANSITION_STATS_BATCH_SIZE", "5000"))
+# Transitions younger than this wait for the next run (see module docstring)
+TRANSITION_STATS_SETTLE_SECONDS = float(os.getenv("TRANSITION_STATS_SETTLE_SECONDS", "60"))
+
+TIME_IN_STATUS = "time_in_status"
+RESOLUTION = "resolution"
+CURSOR_NAME = "status_duration_stats"
+
+# Bucket 0 holds durations under a minute; above that each doubling is split
+# into HISTOGRAM_STEPS buckets (~19% wide, so percentiles are within ~9%),
+# up to about two years in the last bucket
+HISTOGRAM_MIN_SECONDS = 60
+HISTOGRAM_STEPS = 4
+HISTOGRAM_BUCKETS = 1 + HISTOGRAM_STEPS * 20
+
+def duration_bucket(seconds: float) -> int:
+    if seconds < HISTOGRAM_MIN_SECONDS:
+        return 0
+    bucket = int(math.log2(seconds / HISTOGRAM_MIN_SECONDS) * HISTOGRAM_STEPS) + 1
+    return min(bucket, HISTOGRAM_BUCKETS - 1)
+
+def bucket_value(bucket: int) -> float:
+    """Representative duration of a bucket: the geometric middle of its bounds"""
+    if bucket == 0:
+        return HISTOGRAM_MIN_SECONDS / 2
+    return HISTOGRAM_MIN_SECONDS * 2 ** ((bucket - 0.5) / HISTOGRAM_STEPS)
+
+def histogram_percentile(histogram: Dict[int, int], q: float) -> Optional[float]:
+    """Nearest-rank `q` quantile (0-1) of a bucket histogram, None when it is empty"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = max(math.ceil(q * total), 1)
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return bucket_value(bucket)
+    return bucket_value(max(histogram))
+
+def load_histogram(value: str) -> Counter:
+    return Counter({int(bucket): count for bucket, count in json.loads(value).items()})
+
+def dump_histogram(histogram: Counter) -> str:
+    return json.dumps({str(bucket): count for bucket, count in sorted(histogram.items()) if count})
+
+def transition_values(
+    issue_id: int,
+    created_at: datetime,
+    from_status: Optional[IssueStatus],
+    to_status: IssueStatus,
+    from_severity: Optional[IssueSeverity],
+    to_severity: IssueSeverity,
+    changed_by_id: Optional[int],
+    changed_at: Optional[datetime] = None,
+) -> dict:
+    return {
+        "issue_id": issue_id,
+        "created_at": created_at,
+        "from_status": from_status,
+        "to_status": to_status,
+        "from_severity": from_severity,
+        # Issue.severity is nullable on rows that predate its default
+        "to_severity": to_severity or IssueSeverity.LOW,
+        "changed_by_id": changed_by_id,
+        "changed_at": changed_at or datetime.utcnow(),
+    }
+
+def record_transition(db, issue, from_status: Optional[IssueStatus], from_severity: Optional[IssueSeverity],
+                      changed_by_id: Optional[int], changed_at: Optional[datetime] = None):
+    """Stage a history row for `issue`'s current status/severity in the caller's transaction (sync or async session)"""
+    db.add(IssueTransition(**transition_values(
+        issue.id, issue.created_at, from_status, issue.status, from_severity, issue.severity, changed_by_id, changed_at,
+    )))
+
+def _duration_samples(history: Sequence[IssueTransition], after_id: int):
+    """(day, kind, status, severity, seconds) for each transition of one issue with id > after_id.
+
+    `history` is the issue's transitions in id order, including the earlier
+    ones needed to find when the current stint started.
+    """
+    status, stint_start = None, None
+    for row in history:
+        new_stint = row.from_status is None or row.to_status != row.from_status
+        if row.id > after_id and row.from_status is not None:
+            day = stats_day(row.changed_at)
+            if new_stint and stint_start is not None and row.from_status == status:
+                seconds = (row.changed_at - stint_start).total_seconds()
+                yield day, TIME_IN_STATUS, row.from_status, row.from_severity or row.to_severity, max(seconds, 0.0)
+            if row.to_status in CLOSED_STATUSES and row.from_status not in CLOSED_STATUSES:
+                seconds = (row.changed_at - row.created_at).total_seconds()
+                yield day, RESOLUTION, row.to_status, row.to_severity, max(seconds, 0.0)
+        if new_stint:
+            status, stint_start = row.to_status, row.changed_at
+
+def aggregate_transitions(db: Session, now: Optional[datetime] = None, batch_size: int = TRANSITION_STATS_BATCH_SIZE) -> int:
+    """Fold the next batch of settled transitions into status_duration_stats; returns rows consumed.
+
+    Runs in the caller's transaction; call until it returns less than `batch_size`.
+    """
+    now = now or datetime.utcnow()
+    cursor = db.get(AggregationCursor, CURSOR_NAME, with_for_update=True)
+    if cursor is None:
+        cursor = AggregationCursor(name=CURSOR_NAME, last_id=0)
+        db.add(cursor)
+
+    horizon = now - timedelta(seconds=TRANSITION_STATS_SETTLE_SECONDS)
+    batch = []
+    for row in db.scalars(
+        select(IssueTransition).where(IssueTransition.id > cursor.last_id).order_by(IssueTransition.id).limit(batch_size)
+    ):
+        if row.changed_at > horizon:
+            break
+        batch.append(row)
+    if not batch:
+        return 0
+
+    last_id = batch[-1].id
+    histories: Dict[int, List[IssueTransition]] = {}
+    for row in db.scalars(
+        select(IssueTransition)
+        .where(IssueTransition.issue_id.in_(sorted({row.issue_id for row in batch})), IssueTransition.id <= last_id)
+        .order_by(IssueTransition.id)
+    ):
+        histories.setdefault(row.issue_id, []).append(row)
+
+    deltas: Dict[tuple, list] = {}
+    for history in histories.values():
+        for day, kind, status, severity, seconds in _duration_samples(history, cursor.last_id):
+            delta = deltas.setdefault((day, kind, status, severity), [0, 0.0, Counter()])
+            delta[0] += 1
+            delta[1] += seconds
+            delta[2][duration_bucket(seconds)] += 1
+    _merge_duration_stats(db, deltas)
+
+    cursor.last_id = last_id
+    cursor.updated_at = now
+    db.flush()
+    return len(batch)
+
+def _merge_duration_stats(db: Session, deltas: Dict[tuple, list]):
+    """Add (count, seconds, histogram) deltas to their rollup rows.
+
+    Histograms are merged in Python, which is safe because only the worker
+    writes these rows and it holds the cursor row lock while doing so.
+    """
+    if not deltas:
+        return
+    existing = {
+        (stat.date, stat.kind, stat.status, stat.severity): stat
+        for stat in db.scalars(select(StatusDurationStats).where(
+            StatusDurationStats.date.in_(sorted({key[0] for key in deltas})),
+            StatusDurationStats.kind.in_(sorted({key[1] for key in deltas})),
+        ))
+    }
+    for key, (count, seconds, histogram) in deltas.items():
+        stat = existing.get(key)
+        if stat is None:
+            day, kind, status, severity = key
+            db.add(StatusDurationStats(
+                date=day, kind=kind, status=status, severity=severity,
+                count=count, total_seconds=seconds, histogram=dump_histogram(histogram),
+            ))
+        else:
+            stat.count += count
+            stat.total_seconds += seconds
+            stat.histogram = dump_histogram(load_histogram(stat.histogram) + histogram)
+
+def _summaries(groups: Dict[tuple, list]) -> List[DurationSummary]:
+    """One summary per (status, severity), in enum order"""
+    order = {value: index for index, value in enumerate([*IssueStatus, *IssueSeverity])}
+    result = []
+    for (status, severity), (count, seconds, histogram) in sorted(groups.items(), key=lambda item: [order[k] for k in item[0]]):
+        result.append(DurationSummary(
+            status=status,
+            severity=severity,
+            count=count,
+            mean_seconds=seconds / count,
+            p50_seconds=histogram_percentile(histogram, 0.5),
+            p90_seconds=histogram_percentile(histogram, 0.9),
+            p99_seconds=histogram_percentile(histogram, 0.99),
+        ))
+    return result
+
+def get_status_durations(
+    db: Session, start: date, end: date, severities: Optional[Iterable[IssueSeverity]] = None
+) -> StatusDurationsOut:
+    """Time-in-status and resolution summaries for [start, end] from the precomputed rollups"""
+    query = select(StatusDurationStats).where(
+        StatusDurationStats.date >= datetime.combine(start, datetime.min.time()),
+        StatusDurationStats.date < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+    )
+    if severities:
+        query = query.where(StatusDurationStats.severity.in_(list(severities)))
+
+    groups = {TIME_IN_STATUS: {}, RESOLUTION: {}}
+    by_day = {}
+    for stat in db.scalars(query):
+        group = groups[stat.kind].setdefault((stat.status, stat.severity), [0, 0.0, Counter()])
+        group[0] += stat.count
+        group[1] += stat.total_seconds
+        group[2].update(load_histogram(stat.histogram))
+        if stat.kind == RESOLUTION:
+            day = by_day.setdefault((stat.date.date(), list(IssueSeverity).index(stat.severity), stat.severity), [0, 0.0])
+            day[0] += stat.count
+            day[1] += stat.total_seconds
+
+    return StatusDurationsOut(
+        start=start.isoformat(),
+        end=end.isoformat(),
+        time_in_status=_summaries(groups[TIME_IN_STATUS]),
+        resolution=_summaries(groups[RESOLUTION]),
+        resolution_by_day=[
+            ResolutionDay(date=day.isoformat(), severity=severity, resolved=count, mttr_seconds=seconds / count)
+            for (day, _, severity), (count, seconds) in sorted(by_day.items())
+        ],
+    )
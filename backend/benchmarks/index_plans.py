@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Show the query plans and timings of the reporter-scoped issue list and the
+worker's stats rollup with and without the issue indexes.
+
+    python benchmarks/index_plans.py --issues 200000
+    DATABASE_URL=postgresql://... python benchmarks/index_plans.py
+
+Without DATABASE_URL a throwaway SQLite file is used.  The tables are
+created, seeded with synthetic issues, the query indexes are dropped, and
+each query is EXPLAINed and timed; then the indexes are created and the
+same queries are measured again.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, func, insert, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.models import Base, Issue, IssueSeverity, IssueStatus, User, UserRole
+from app.routers import filter_issues
+
+QUERY_INDEXES = [
+    index for index in Issue.__table__.indexes
+    if index.name in (
+        "ix_issues_reporter_id_created_at",
+        "ix_issues_status_created_at",
+        "ix_issues_created_at_id",
+        "ix_issues_updated_at_id",
+    )
+]
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN ANALYZE "
+    return prefix + compiler.process(element.statement, **kw)
+
+def seed(engine, users: int, issues: int, days: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@example.com", "role": UserRole.REPORTER, "is_active": True}
+            for i in range(1, users + 1)
+        ])
+        batch = []
+        for i in range(issues):
+            created_at = now - timedelta(seconds=random.randint(0, days * 86400))
+            batch.append({
+                "title": f"Issue {i}",
+                "description": "synthetic",
+                "severity": random.choice(list(IssueSeverity)),
+                "status": random.choice(list(IssueStatus)),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "reporter_id": random.randint(1, users),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Issue), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Issue), batch)
+
+def hot_queries(session: Session, reporter_id: int):
+    reporter = SimpleNamespace(id=reporter_id, role=UserRole.REPORTER)
+    list_query = filter_issues(session.query(Issue), reporter).order_by(
+        Issue.created_at, Issue.id
+    ).limit(101)
+
+    end = datetime.utcnow()
+    start = end - timedelta(days=30)
+    issue_day = func.date(Issue.created_at)
+    rollup_query = session.query(issue_day, Issue.status, func.count(Issue.id)).filter(
+        Issue.created_at >= start,
+        Issue.created_at < end
+    ).group_by(issue_day, Issue.status)
+    return {"reporter get_issues": list_query, "worker rollup (30 days)": rollup_query}
+
+def measure(engine, label: str, reporter_id: int, repeat: int):
+    print(f"\n=== {label} ===")
+    with Session(engine) as session:
+        for name, query in hot_queries(session, reporter_id).items():
+            plan = session.execute(Explain(query.statement)).all()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                query.all()
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+            print(f"\n{name}: {elapsed_ms:.2f} ms/query")
+            for row in plan:
+                print("   ", row[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--issues", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{tempfile.mkdtemp()}/index_plans.db"
+    engine = create_engine(url)
+    print(f"Seeding {args.issues} issues for {args.users} reporters into {engine.url.render_as_string(hide_password=True)}")
+    seed(engine, args.users, args.issues, args.days)
+
+    with engine.begin() as conn:
+        for index in QUERY_INDEXES:
+            index.drop(conn)
+        conn.execute(text("ANALYZE"))
+    measure(engine, "without query indexes", random.randint(1, args.users), args.repeat)
+
+    with engine.begin() as conn:
+        for index in QUERY_INDEXES:
+            index.create(conn)
+        conn.execute(text("ANALYZE"))
+    measure(engine, "with query indexes", random.randint(1, args.users), args.repeat)
+
+if __name__ == "__main__":
+    main()
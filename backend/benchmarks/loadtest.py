@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Load test for the REST and WebSocket paths.
+
+    python benchmarks/loadtest.py                              # throwaway SQLite + local server
+    python benchmarks/loadtest.py --issues 100000 --concurrency 64 --ws-clients 500
+    DATABASE_URL=postgresql://... python benchmarks/loadtest.py --workers 4
+    python benchmarks/loadtest.py --base-url http://localhost:8000 --no-seed
+    python benchmarks/loadtest.py --compare benchmarks/results/<earlier run>.json
+
+Seeds N users and M issues straight into DATABASE_URL (a temporary SQLite
+file by default), starts uvicorn on it unless --base-url is given, then:
+
+1. drives each REST scenario (login, list, create, update) for --duration
+   seconds with --concurrency concurrent clients;
+2. holds --ws-clients maintainer sockets, split between /notification and
+   /api/ws, creates --fanout-issues issues as a reporter and measures the
+   time from each POST to every socket receiving its issue_created event.
+
+Latency percentiles (p50/p95/p99, ms), throughput and status counts are
+written to a JSON file under benchmarks/results/ so runs on different
+commits can be compared with --compare.  With --workers > 1 set
+REALTIME_BUS=redis or postgres, otherwise fan-out stays within one worker.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+import websockets
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.auth import get_password_hash
+from app.models import Base, Issue, IssueSeverity, IssueStatus, User, UserRole
+from app.stats import rebuild_daily_stats
+
+PASSWORD = "loadtest"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def role_for(user_number: int) -> UserRole:
+    # 5% admins, 15% maintainers, the rest reporters
+    bucket = user_number % 20
+    if bucket == 0:
+        return UserRole.ADMIN
+    if bucket <= 3:
+        return UserRole.MAINTAINER
+    return UserRole.REPORTER
+
+def seed_database(url: str, users: int, issues: int, days: int, rng: random.Random):
+    """Recreate the schema and bulk-insert synthetic users and issues"""
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    hashed = get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    reporters = [i for i in range(1, users + 1) if role_for(i) == UserRole.REPORTER]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"load{i}@example.com", "hashed_password": hashed, "role": role_for(i), "is_active": True}
+            for i in range(1, users + 1)
+        ])
+        batch = []
+        for i in range(issues):
+            created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+            batch.append({
+                "title": f"Load issue {i}",
+                "description": "Synthetic issue used by the load test",
+                "severity": rng.choice(list(IssueSeverity)),
+                "status": rng.choice(list(IssueStatus)),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "reporter_id": rng.choice(reporters),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Issue), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Issue), batch)
+    with Session(engine) as db, db.begin():
+        rebuild_daily_stats(db, (now - timedelta(days=days + 1)).date(), (now + timedelta(days=1)).date())
+    engine.dispose()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def spawn_server(database_url: str, workers: int) -> tuple:
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": database_url}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient() as client:
+        for _ in range(150):
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return process, base_url
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 30s")
+
+def percentile(ordered: list, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), round(p / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+def summarize(latencies_ms: list, statuses: Counter, elapsed: float) -> dict:
+    ordered = sorted(latencies_ms)
+    ok = sum(count for status, count in statuses.items() if isinstance(status, int) and status < 400)
+    return {
+        "requests": len(ordered),
+        "ok": ok,
+        "errors": len(ordered) - ok,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+async def run_scenario(request_fn, concurrency: int, duration: float) -> dict:
+    """Call request_fn() from `concurrency` loops for `duration` seconds"""
+    latencies, statuses = [], Counter()
+    deadline = time.perf_counter() + duration
+
+    async def loop():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await request_fn()
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+async def login(client: httpx.AsyncClient, email: str) -> str:
+    r = await client.post("/api/auth/login", data={"email": email, "password": PASSWORD})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+async def rest_scenarios(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    users = range(1, args.users + 1)
+    reporters = [i for i in users if role_for(i) == UserRole.REPORTER][:args.token_users]
+    maintainers = [i for i in users if role_for(i) != UserRole.REPORTER][:args.token_users]
+    reporter_tokens = [await login(client, f"load{i}@example.com") for i in reporters]
+    maintainer_tokens = [await login(client, f"load{i}@example.com") for i in maintainers]
+
+    def auth(tokens):
+        return {"Authorization": f"Bearer {rng.choice(tokens)}"}
+
+    async def do_login():
+        r = await client.post("/api/auth/login", data={"email": f"load{rng.choice(users)}@example.com", "password": PASSWORD})
+        return r.status_code
+
+    list_params = [{}, {"limit": 20}, {"status": "OPEN"}, {"severity": "CRITICAL"}, {"status": ["OPEN", "TRIAGED"], "limit": 50}]
+
+    async def do_list():
+        tokens = reporter_tokens if rng.random() < 0.5 else maintainer_tokens
+        r = await client.get("/api/issues", headers=auth(tokens), params=rng.choice(list_params))
+        return r.status_code
+
+    async def do_create():
+        r = await client.post("/api/issues", headers=auth(reporter_tokens), json={
+            "title": f"Created under load {rng.random():.6f}",
+            "description": "Created by benchmarks/loadtest.py",
+            "severity": rng.choice(list(IssueSeverity)).value,
+        })
+        return r.status_code
+
+    async def do_update():
+        r = await client.put(f"/api/issues/{rng.randint(1, args.issues)}", headers=auth(maintainer_tokens),
+                             json={"status": rng.choice(list(IssueStatus)).value})
+        return r.status_code
+
+    scenarios = {"login": do_login, "list": do_list, "create": do_create, "update": do_update}
+    results = {}
+    for name in args.scenarios:
+        print(f"  {name}: {args.concurrency} clients for {args.duration}s")
+        results[name] = await run_scenario(scenarios[name], args.concurrency, args.duration)
+        print(f"    {results[name]['throughput_rps']} req/s, p50 {results[name]['p50_ms']} ms, "
+              f"p99 {results[name]['p99_ms']} ms, errors {results[name]['errors']}")
+    return results
+
+async def websocket_fanout(client: httpx.AsyncClient, args) -> dict:
+    """Hold maintainer sockets and time issue_created delivery to each of them"""
+    ws_base = str(client.base_url).replace("http", "ws", 1)
+    received = {}  # issue_id -> list of receive times
+    sockets = []
+    paths = ["/notification", "/api/ws"]
+    for i in range(args.ws_clients):
+        url = f"{ws_base}{paths[i % 2]}?userid=ws-load-{i}&role=MAINTAINER&email=ws{i}@example.com"
+        sockets.append(await websockets.connect(url, max_queue=None))
+
+    async def reader(ws):
+        try:
+            async for frame in ws:
+                message = json.loads(frame)
+                if message.get("type") == "issue_created":
+                    received.setdefault(message["issue_id"], []).append(time.perf_counter())
+        except websockets.ConnectionClosed:
+            pass
+
+    readers = [asyncio.create_task(reader(ws)) for ws in sockets]
+    reporter = next(i for i in range(1, args.users + 1) if role_for(i) == UserRole.REPORTER)
+    headers = {"Authorization": f"Bearer {await login(client, f'load{reporter}@example.com')}"}
+
+    sent = {}
+    for n in range(args.fanout_issues):
+        started = time.perf_counter()
+        r = await client.post("/api/issues", headers=headers, json={"title": f"Fan-out {n}", "description": "ws load"})
+        r.raise_for_status()
+        sent[r.json()["id"]] = started
+        await asyncio.sleep(args.fanout_interval)
+
+    expected = len(sent) * len(sockets)
+    wait_until = time.perf_counter() + args.fanout_timeout
+    while sum(len(received.get(issue_id, ())) for issue_id in sent) < expected and time.perf_counter() < wait_until:
+        await asyncio.sleep(0.05)
+
+    for ws in sockets:
+        await ws.close()
+    await asyncio.gather(*readers, return_exceptions=True)
+
+    latencies = sorted(
+        (arrival - sent[issue_id]) * 1000
+        for issue_id in sent for arrival in received.get(issue_id, ())
+    )
+    delivered = len(latencies)
+    return {
+        "clients": len(sockets),
+        "issues": len(sent),
+        "expected_deliveries": expected,
+        "delivered": delivered,
+        "delivery_ratio": round(delivered / expected, 4) if expected else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline['meta']['commit']}):")
+    rows = [(name, current["scenarios"].get(name), stats) for name, stats in baseline["scenarios"].items()]
+    rows.append(("websocket fan-out", current.get("websocket"), baseline.get("websocket")))
+    for name, now, before in rows:
+        if not now or not before:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            if key in now and before.get(key):
+                changes.append(f"{key} {before[key]} -> {now[key]} ({(now[key] - before[key]) / before[key]:+.0%})")
+        print(f"  {name}: " + ", ".join(changes))
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    database_url = os.getenv("DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/loadtest.db"
+    if not args.no_seed:
+        print(f"Seeding {args.users} users and {args.issues} issues into {database_url.split('@')[-1]}")
+        seed_database(database_url, args.users, args.issues, args.days, rng)
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        process, base_url = await spawn_server(database_url, args.workers)
+        print(f"Started uvicorn with {args.workers} worker(s) on {base_url}")
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "database": database_url.split("://")[0],
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "scenarios": {},
+    }
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            print("REST scenarios:")
+            result["scenarios"] = await rest_scenarios(client, args, rng)
+            if args.ws_clients:
+                print(f"WebSocket fan-out: {args.ws_clients} sockets, {args.fanout_issues} issues")
+                result["websocket"] = await websocket_fanout(client, args)
+                ws = result["websocket"]
+                print(f"    delivered {ws['delivered']}/{ws['expected_deliveries']}, p50 {ws['p50_ms']} ms, p99 {ws['p99_ms']} ms")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nWrote {output}")
+    if args.compare:
+        compare(result, args.compare)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Use a running server instead of starting one (seeds DATABASE_URL unless --no-seed)")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the data already in the database")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--issues", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when starting the server")
+    parser.add_argument("--scenarios", nargs="+", default=["login", "list", "create", "update"],
+                        choices=["login", "list", "create", "update"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per REST scenario")
+    parser.add_argument("--token-users", type=int, default=20, help="Users per role that log in up front for the other scenarios")
+    parser.add_argument("--ws-clients", type=int, default=100)
+    parser.add_argument("--fanout-issues", type=int, default=20)
+    parser.add_argument("--fanout-interval", type=float, default=0.05)
+    parser.add_argument("--fanout-timeout", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    parser.add_argument("--compare", help="Earlier result file to print deltas against")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
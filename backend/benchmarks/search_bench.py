@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Time /api/issues/search queries on a generated corpus against the LIKE scan
+they replace.
+
+    python benchmarks/search_bench.py                  # 1M issues, SQLite FTS5
+    DATABASE_URL=postgresql://... python benchmarks/search_bench.py --issues 1000000
+
+Without DATABASE_URL a throwaway SQLite file is used.  Titles and
+descriptions are drawn from a Zipf-like vocabulary so that common terms
+match a large share of the corpus and rare ones a handful of rows.  Each
+query runs the same statements as the endpoint (first page of ranked hits,
+then highlights for that page) and the same query as a `LIKE '%term%'`
+filter, and reports p50/p95 latencies.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import and_, create_engine, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.models import Base, Issue, IssueSeverity, IssueStatus, User, UserRole
+from app.routers import filter_issues
+from app.search import highlight_query, search_query
+
+VOCABULARY = [
+    "crash", "login", "timeout", "checkout", "payment", "dashboard", "export",
+    "slow", "memory", "leak", "button", "mobile", "safari", "upload", "search",
+] + [f"term{i}" for i in range(5000)]
+# Zipf-ish weights: the first words are very common, the tail is rare
+WEIGHTS = [1.0 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+QUERIES = ["crash", "login timeout", "checkout payment", "memory leak", "term42", "term4999", "safari upload button"]
+
+def words(count: int) -> str:
+    return " ".join(random.choices(VOCABULARY, weights=WEIGHTS, k=count))
+
+def seed(engine, users: int, issues: int, days: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@example.com", "role": UserRole.REPORTER, "is_active": True}
+            for i in range(1, users + 1)
+        ])
+        batch = []
+        for i in range(issues):
+            created_at = now - timedelta(seconds=random.randint(0, days * 86400))
+            batch.append({
+                "title": words(random.randint(3, 8)),
+                "description": words(random.randint(20, 80)),
+                "severity": random.choice(list(IssueSeverity)),
+                "status": random.choice(list(IssueStatus)),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "reporter_id": random.randint(1, users),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Issue), batch)
+                batch = []
+                if (i + 1) % 100000 == 0:
+                    print(f"  {i + 1} issues")
+        if batch:
+            conn.execute(insert(Issue), batch)
+        conn.execute(text("ANALYZE"))
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+def timed(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--issues", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--skip-like", action="store_true", help="Do not time the LIKE baseline")
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{tempfile.mkdtemp()}/search_bench.db"
+    engine = create_engine(url)
+    dialect = engine.dialect.name
+    print(f"Seeding {args.issues} issues into {engine.url.render_as_string(hide_password=True)}")
+    started = time.perf_counter()
+    seed(engine, args.users, args.issues, args.days)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+    admin = SimpleNamespace(id=0, role=UserRole.ADMIN)
+    print(f"{'query':<24}{'hits/page':>10}{'search p50':>12}{'p95':>9}{'highlight p50':>15}{'LIKE p50':>11}")
+    with Session(engine) as session:
+        for q in QUERIES:
+            page_query = search_query(dialect, q, lambda query: filter_issues(query, admin), None, args.page_size)
+            rows, search_ms = timed(lambda: session.execute(page_query).all(), args.repeat)
+            ids = [row.id for row in rows]
+            _, highlight_ms = timed(lambda: session.execute(highlight_query(dialect, q, ids)).all(), args.repeat)
+
+            like_p50 = float("nan")
+            if not args.skip_like:
+                like = and_(*(Issue.title.contains(term) | Issue.description.contains(term) for term in q.split()))
+                like_query = select(Issue).where(like).order_by(Issue.created_at, Issue.id).limit(args.page_size)
+                _, like_ms = timed(lambda: session.execute(like_query).all(), max(1, args.repeat // 5))
+                like_p50 = statistics.median(like_ms)
+
+            search_p50, search_p95 = percentiles(search_ms)
+            print(f"{q:<24}{len(rows):>10}{search_p50:>10.1f}ms{search_p95:>7.1f}ms"
+                  f"{statistics.median(highlight_ms):>13.1f}ms{like_p50:>9.1f}ms")
+
+if __name__ == "__main__":
+    main()
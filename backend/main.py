@@ -1,19 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import router as api_router
-from app.realtime import router as realtime_router
+from app.realtime import router as realtime_router, manager
 from app.logging_config import logger
-from app.metrics import metrics_router
+from app.metrics import metrics_router, mark_process_dead
+from app.instrumentation import MetricsMiddleware
+from app.profiling import ProfilingMiddleware
+from app.auth import password_hash_pool
+from app.pubsub import create_bus
+from app.outbox import outbox_dispatcher
+from app.serialization import FastJSONResponse
 logger.info("Issues & Insights Tracker API starting up")
+import os
 import uvicorn
-app = FastAPI(title="Issues & Insights Tracker API")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    bus = create_bus()
+    manager.use_bus(bus)
+    await bus.start()
+    # The only publisher of outbox rows; handlers wake it after committing
+    await outbox_dispatcher.start()
+    yield
+    await outbox_dispatcher.stop()
+    await bus.stop()
+    await manager.wait_for_deliveries()
+    password_hash_pool.shutdown()
+    mark_process_dead(os.getpid())
+
+app = FastAPI(title="Issues & Insights Tracker API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Profiling runs inside MetricsMiddleware to reuse its per-request SQL stats
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(api_router, prefix="/api")
@@ -0,0 +1,20 @@
+import os
+
+# Handlers wake the outbox loop after each commit; without periodic sweeps the
+# loop never races tests that drive a dispatcher over rows they inserted
+os.environ.setdefault("OUTBOX_POLL_INTERVAL", "3600")
+
+import pytest
+from fastapi.testclient import TestClient
+from app.database import engine
+from app.models import Base
+from backend.main import app
+
+# The tests share the app's default database, so make sure its tables exist
+Base.metadata.create_all(bind=engine)
+
+@pytest.fixture(scope="session", autouse=True)
+def app_lifespan():
+    """Run the app's startup/shutdown once, so the outbox loop is there to publish events"""
+    with TestClient(app):
+        yield
@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+from fastapi.testclient import TestClient
+from backend.main import app
+from app.analytics import (
+    IssueArrays, age_percentiles, arrays_from_rows, daily_trends, epoch_seconds, filter_arrays, merge_changes,
+)
+from app.models import IssueSeverity, IssueStatus
+
+client = TestClient(app)
+
+def _headers(email: str, role: str) -> dict:
+    client.post("/api/auth/register", json={"email": email, "password": "trendpass", "role": role})
+    token = client.post("/api/auth/login", data={"email": email, "password": "trendpass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _rows():
+    day = datetime(2025, 3, 1)
+    return [
+        # id, created_at, updated_at, status, severity, reporter_id
+        (3, day - timedelta(days=5), day + timedelta(days=1), IssueStatus.DONE, IssueSeverity.HIGH, 1),
+        (1, day - timedelta(days=3), day - timedelta(days=2), IssueStatus.DONE, IssueSeverity.LOW, 1),
+        (2, day, day, IssueStatus.OPEN, IssueSeverity.HIGH, 2),
+        (4, day + timedelta(days=1, hours=5), day + timedelta(days=1, hours=5), IssueStatus.TRIAGED, None, None),
+    ]
+
+def test_trends_match_a_row_by_row_count():
+    arrays = arrays_from_rows(_rows())
+    assert arrays.id.tolist() == [1, 2, 3, 4]
+    start, end = date(2025, 2, 28), date(2025, 3, 3)
+    trends = daily_trends(arrays, start, end)
+
+    for trend in trends:
+        day = date.fromisoformat(trend.date)
+        opened = sum(1 for row in _rows() if row[1].date() == day)
+        closed = sum(1 for row in _rows() if row[3] == IssueStatus.DONE and row[2].date() == day)
+        backlog = sum(1 for row in _rows() if row[1].date() <= day and not (row[3] == IssueStatus.DONE and row[2].date() <= day))
+        assert (trend.opened, trend.closed, trend.backlog) == (opened, closed, backlog)
+    assert [t.backlog for t in trends] == [1, 2, 2, 2]
+
+    high = daily_trends(filter_arrays(arrays, [IssueSeverity.HIGH]), start, end)
+    assert [t.opened for t in high] == [0, 1, 0, 0]
+    assert [t.backlog for t in daily_trends(filter_arrays(arrays, reporter_id=1), start, end)] == [1, 1, 0, 0]
+
+def test_age_percentiles_per_severity():
+    now = datetime(2025, 3, 10)
+    rows = [(i, now - timedelta(hours=i), now, IssueStatus.OPEN, IssueSeverity.MEDIUM, 1) for i in range(1, 101)]
+    rows.append((500, now - timedelta(days=90), now, IssueStatus.DONE, IssueSeverity.MEDIUM, 1))
+    result = {r.severity: r for r in age_percentiles(arrays_from_rows(rows), now)}
+    medium = result[IssueSeverity.MEDIUM]
+    ages = np.arange(1, 101) * 3600.0
+    assert medium.open_issues == 100
+    assert medium.p50_seconds == np.percentile(ages, 50)
+    assert medium.p99_seconds == np.percentile(ages, 99)
+    assert medium.max_seconds == 100 * 3600
+    assert result[IssueSeverity.LOW].open_issues == 0 and result[IssueSeverity.LOW].p50_seconds is None
+
+def test_merge_replaces_changed_rows_and_applies_tombstones():
+    base = arrays_from_rows(_rows())
+    changed = arrays_from_rows([
+        (2, datetime(2025, 3, 1), datetime(2025, 3, 4), IssueStatus.DONE, IssueSeverity.HIGH, 2),
+        (9, datetime(2025, 3, 4), datetime(2025, 3, 4), IssueStatus.OPEN, IssueSeverity.LOW, 2),
+    ])
+    # The tombstone for 3 is newer than its cached row; the one for 4 predates
+    # the cached row (a reused id) and must not remove it
+    deleted_ids = np.array([3, 4, 7], dtype=np.int64)
+    deleted_at = epoch_seconds([datetime(2025, 3, 5), datetime(2025, 3, 1), datetime(2025, 3, 5)])
+    merged = merge_changes(base, changed, deleted_ids, deleted_at)
+    assert merged.id.tolist() == [1, 2, 4, 9]
+    assert merged.status[1] == list(IssueStatus).index(IssueStatus.DONE)
+    assert len(merge_changes(IssueArrays.empty(), IssueArrays.empty(), deleted_ids, deleted_at)) == 0
+
+def test_trend_endpoints_follow_issue_changes():
+    admin = _headers("trends-admin@example.com", "ADMIN")
+    today = datetime.utcnow().date().isoformat()
+
+    def today_trend():
+        r = client.get("/api/stats/trends", headers=admin, params={"start": today, "severity": "CRITICAL"})
+        assert r.status_code == 200
+        return r.json()[-1]
+
+    before = today_trend()
+    issue_id = client.post("/api/issues", headers=admin, json={"title": "Trend", "description": "d", "severity": "CRITICAL"}).json()["id"]
+    after_create = today_trend()
+    assert after_create["opened"] == before["opened"] + 1
+    assert after_create["backlog"] == before["backlog"] + 1
+
+    client.put(f"/api/issues/{issue_id}", headers=admin, json={"status": "DONE"})
+    after_close = today_trend()
+    assert after_close["closed"] == before["closed"] + 1
+    assert after_close["backlog"] == before["backlog"]
+
+    client.delete(f"/api/issues/{issue_id}", headers=admin)
+    assert today_trend() == before
+
+    r = client.get("/api/stats/age-percentiles", headers=admin)
+    assert r.status_code == 200
+    assert [row["severity"] for row in r.json()] == ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import pytest
+from fastapi.testclient import TestClient
+from backend.main import app
+import app.attachments as attachments
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def attachment_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(attachments, "ATTACHMENT_DIR", str(tmp_path))
+    return tmp_path
+
+def _headers(email: str, role: str) -> dict:
+    client.post("/api/auth/register", json={"email": email, "password": "attachpass", "role": role})
+    token = client.post("/api/auth/login", data={"email": email, "password": "attachpass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _issue(headers: dict) -> int:
+    return client.post("/api/issues", headers=headers, json={"title": "Crash", "description": "dump attached"}).json()["id"]
+
+def test_identical_uploads_share_one_blob(attachment_dir):
+    headers = _headers("attach-reporter@example.com", "REPORTER")
+    issue_id = _issue(headers)
+    body = b"Traceback (most recent call last):\n" * 5000
+    digest = hashlib.sha256(body).hexdigest()
+
+    ids = []
+    for name in ("crash.log", "../../etc/crash-again.log"):
+        r = client.post(f"/api/issues/{issue_id}/attachments", params={"filename": name},
+                        headers={**headers, "Content-Type": "text/plain"}, content=body)
+        assert r.status_code == 201
+        assert r.json()["sha256"] == digest and r.json()["size"] == len(body)
+        ids.append(r.json()["id"])
+
+    listed = client.get(f"/api/issues/{issue_id}/attachments", headers=headers).json()
+    assert [a["filename"] for a in listed] == ["crash.log", "crash-again.log"]
+    blobs = [name for _, _, names in os.walk(attachment_dir / "sha256") for name in names]
+    assert blobs == [digest]
+    assert not os.listdir(attachment_dir / "tmp")
+
+def test_download_supports_etag_and_ranges():
+    headers = _headers("attach-maintainer@example.com", "MAINTAINER")
+    issue_id = _issue(headers)
+    body = bytes(range(256)) * 64
+    attachment = client.post(f"/api/issues/{issue_id}/attachments", params={"filename": "core.bin"},
+                             headers=headers, content=body).json()
+    url = f"/api/issues/{issue_id}/attachments/{attachment['id']}"
+
+    r = client.get(url, headers=headers)
+    assert r.status_code == 200 and r.content == body
+    assert r.headers["etag"] == f'"{attachment["sha256"]}"'
+    assert r.headers["content-type"] == "application/octet-stream"
+    assert "core.bin" in r.headers["content-disposition"]
+
+    assert client.get(url, headers={**headers, "If-None-Match": r.headers["etag"]}).status_code == 304
+
+    r = client.get(url, headers={**headers, "Range": "bytes=256-511"})
+    assert r.status_code == 206
+    assert r.content == body[256:512]
+    assert r.headers["content-range"] == f"bytes 256-511/{len(body)}"
+
+    issue = client.get("/api/issues", headers=headers).json()
+    assert any(i["id"] == issue_id and i["file_path"] == attachments.storage_key(attachment["sha256"]) for i in issue)
+
+def test_oversized_and_foreign_uploads_are_rejected(attachment_dir, monkeypatch):
+    owner = _headers("attach-owner@example.com", "REPORTER")
+    other = _headers("attach-other@example.com", "REPORTER")
+    issue_id = _issue(owner)
+
+    assert client.post(f"/api/issues/{issue_id}/attachments", headers=other, content=b"x").status_code == 403
+
+    monkeypatch.setattr(attachments, "ATTACHMENT_MAX_BYTES", 1024)
+    r = client.post(f"/api/issues/{issue_id}/attachments", headers=owner, content=b"x" * 2048)
+    assert r.status_code == 413
+    # Rejected while streaming (no Content-Length), and nothing is left behind
+    def chunks():
+        for _ in range(8):
+            yield b"x" * 512
+    r = client.post(f"/api/issues/{issue_id}/attachments", headers=owner, content=chunks())
+    assert r.status_code == 413
+    assert not os.path.exists(attachment_dir / "sha256")
+    assert os.listdir(attachment_dir / "tmp") == []
+
+def test_unreferenced_blobs_are_pruned_after_the_grace_period(attachment_dir):
+    from datetime import datetime, timedelta
+    from app.database import SessionLocal
+
+    headers = _headers("attach-gc@example.com", "ADMIN")
+    issue_id = _issue(headers)
+    kept = client.post(f"/api/issues/{issue_id}/attachments", headers=headers, content=b"kept").json()
+    orphan = attachments.blob_path(hashlib.sha256(b"orphan").hexdigest())
+    os.makedirs(os.path.dirname(orphan))
+    with open(orphan, "wb") as f:
+        f.write(b"orphan")
+
+    with SessionLocal() as db:
+        assert attachments.prune_unreferenced_blobs(db) == 0
+        assert attachments.prune_unreferenced_blobs(db, datetime.utcnow() + timedelta(days=2)) == 1
+    assert not os.path.exists(orphan)
+    assert os.path.exists(attachments.blob_path(kept["sha256"]))
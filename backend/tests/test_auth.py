@@ -30,4 +30,58 @@ def test_rbac_user_list(user_data):
     r = client.post("/api/auth/login", data={"email": user_data["email"], "password": user_data["password"]})
     token = r.json()["access_token"]
     r = client.get("/api/users", headers={"Authorization": f"Bearer {token}"})
-    assert r.status_code == 403 
\ No newline at end of file
+    assert r.status_code == 403 
+def test_role_change_invalidates_cached_principal():
+    from app.database import SessionLocal
+    from app.models import User, UserRole
+
+    user = {"email": "promoted@example.com", "password": "promopass", "role": "REPORTER"}
+    client.post("/api/auth/register", json=user)
+    r = client.post("/api/auth/login", data={"email": user["email"], "password": user["password"]})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    r = client.get("/api/users/me", headers=headers)
+    assert r.json()["role"] == "REPORTER"
+
+    with SessionLocal() as db:
+        db_user = db.query(User).filter(User.email == user["email"]).first()
+        db_user.role = UserRole.MAINTAINER
+        db.commit()
+    r = client.get("/api/users/me", headers=headers)
+    assert r.json()["role"] == "MAINTAINER"
+
+    with SessionLocal() as db:
+        db_user = db.query(User).filter(User.email == user["email"]).first()
+        db_user.role = UserRole.REPORTER
+        db_user.is_active = False
+        db.commit()
+    r = client.get("/api/users/me", headers=headers)
+    assert r.status_code == 403
+
+def test_login_rehashes_outdated_password_hash():
+    from passlib.context import CryptContext
+    from app.auth import BCRYPT_ROUNDS
+    from app.database import SessionLocal
+    from app.models import User
+
+    user = {"email": "rehash@example.com", "password": "rehashpass", "role": "REPORTER"}
+    client.post("/api/auth/register", json=user)
+    with SessionLocal() as db:
+        db_user = db.query(User).filter(User.email == user["email"]).first()
+        db_user.hashed_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash(user["password"])
+        db.commit()
+    r = client.post("/api/auth/login", data={"email": user["email"], "password": user["password"]})
+    assert r.status_code == 200
+    with SessionLocal() as db:
+        db_user = db.query(User).filter(User.email == user["email"]).first()
+        assert db_user.hashed_password.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+
+def test_password_hash_pool_rejects_when_saturated():
+    import asyncio
+    from fastapi import HTTPException
+    from app.auth import PasswordHashPool, get_password_hash
+
+    pool = PasswordHashPool(workers=1, max_pending=0)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(pool.run("hash", get_password_hash, "secret"))
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
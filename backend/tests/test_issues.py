@@ -1,39 +1,182 @@
-import pytest
-from fastapi.testclient import TestClient
-from backend.main import app
-
-client = TestClient(app)
-
-@pytest.fixture
-def admin_token():
-    admin = {"email": "admin2@example.com", "password": "adminpass", "role": "ADMIN"}
-    client.post("/api/auth/register", json=admin)
-    r = client.post("/api/auth/login", data={"email": admin["email"], "password": admin["password"]})
-    return r.json()["access_token"]
-
-@pytest.fixture
-def reporter_token():
-    user = {"email": "rep@example.com", "password": "reppass", "role": "REPORTER"}
-    client.post("/api/auth/register", json=user)
-    r = client.post("/api/auth/login", data={"email": user["email"], "password": user["password"]})
-    return r.json()["access_token"]
-
-def test_create_and_list_issue(reporter_token):
-    r = client.post("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, data={"title": "Bug", "description": "desc", "severity": "LOW"})
-    assert r.status_code == 200
-    r = client.get("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"})
-    assert r.status_code == 200
-    assert len(r.json()) >= 1
-
-def test_delete_issue(admin_token, reporter_token):
-    # Reporter creates issue
-    r = client.post("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, data={"title": "Bug2", "description": "desc", "severity": "LOW"})
-    issue_id = r.json()["id"]
-    # Admin deletes
-    r = client.delete(f"/api/issues/{issue_id}", headers={"Authorization": f"Bearer {admin_token}"})
-    assert r.status_code == 200
-    # Reporter cannot delete
-    r = client.post("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, data={"title": "Bug3", "description": "desc", "severity": "LOW"})
-    issue_id = r.json()["id"]
-    r = client.delete(f"/api/issues/{issue_id}", headers={"Authorization": f"Bearer {reporter_token}"})
-    assert r.status_code == 403 
\ No newline at end of file
+import json
+import pytest
+import uuid
+from fastapi.testclient import TestClient
+from backend.main import app
+
+client = TestClient(app)
+
+@pytest.fixture
+def admin_token():
+    admin = {"email": "admin2@example.com", "password": "adminpass", "role": "ADMIN"}
+    client.post("/api/auth/register", json=admin)
+    r = client.post("/api/auth/login", data={"email": admin["email"], "password": admin["password"]})
+    return r.json()["access_token"]
+
+@pytest.fixture
+def reporter_token():
+    user = {"email": "rep@example.com", "password": "reppass", "role": "REPORTER"}
+    client.post("/api/auth/register", json=user)
+    r = client.post("/api/auth/login", data={"email": user["email"], "password": user["password"]})
+    return r.json()["access_token"]
+
+def test_create_and_list_issue(reporter_token):
+    r = client.post("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, data={"title": "Bug", "description": "desc", "severity": "LOW"})
+    assert r.status_code == 200
+    r = client.get("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"})
+    assert r.status_code == 200
+    assert len(r.json()) >= 1
+
+def test_delete_issue(admin_token, reporter_token):
+    # Reporter creates issue
+    r = client.post("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, data={"title": "Bug2", "description": "desc", "severity": "LOW"})
+    issue_id = r.json()["id"]
+    # Admin deletes
+    r = client.delete(f"/api/issues/{issue_id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert r.status_code == 200
+    # Reporter cannot delete
+    r = client.post("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, data={"title": "Bug3", "description": "desc", "severity": "LOW"})
+    issue_id = r.json()["id"]
+    r = client.delete(f"/api/issues/{issue_id}", headers={"Authorization": f"Bearer {reporter_token}"})
+    assert r.status_code == 403 
+def test_list_issues_keyset_pagination(reporter_token):
+    headers = {"Authorization": f"Bearer {reporter_token}"}
+    for i in range(3):
+        client.post("/api/issues", headers=headers, json={"title": f"Page {i}", "description": "desc"})
+    r = client.get("/api/issues", headers=headers, params={"limit": 2})
+    assert r.status_code == 200
+    first_page = r.json()
+    assert len(first_page) == 2
+    cursor = r.headers["X-Next-Cursor"]
+    r = client.get("/api/issues", headers=headers, params={"limit": 2, "cursor": cursor})
+    assert r.status_code == 200
+    seen = {issue["id"] for issue in first_page}
+    assert not seen & {issue["id"] for issue in r.json()}
+
+def test_list_issues_filters_and_invalid_cursor(reporter_token):
+    headers = {"Authorization": f"Bearer {reporter_token}"}
+    client.post("/api/issues", headers=headers, json={"title": "Crit", "description": "desc", "severity": "CRITICAL"})
+    r = client.get("/api/issues", headers=headers, params={"severity": "CRITICAL"})
+    assert r.status_code == 200
+    assert r.json() and all(issue["severity"] == "CRITICAL" for issue in r.json())
+    r = client.get("/api/issues", headers=headers, params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+
+def test_list_issues_ndjson_export(reporter_token):
+    headers = {"Authorization": f"Bearer {reporter_token}", "Accept": "application/x-ndjson"}
+    client.post("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, json={"title": "Export", "description": "desc"})
+    r = client.get("/api/issues", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert rows and all("id" in row for row in rows)
+
+def test_bulk_import_reports_row_errors(reporter_token):
+    headers = {"Authorization": f"Bearer {reporter_token}", "Content-Type": "text/csv"}
+    body = 'title,description,severity\nImported 1,"multi\nline",HIGH\nImported 2,desc,NOT_A_SEVERITY\nImported 3,desc,\n'
+    r = client.post("/api/issues/bulk", headers=headers, content=body)
+    assert r.status_code == 200
+    result = r.json()
+    assert result["created"] == 2 and result["failed"] == 1
+    assert result["errors"][0]["row"] == 2
+
+    headers["Content-Type"] = "application/x-ndjson"
+    body = '{"title": "Nd 1", "description": "d"}\nnot json\n{"title": "Nd 2", "description": "d", "reporter_id": 1}\n'
+    result = client.post("/api/issues/bulk", headers=headers, content=body).json()
+    assert result["created"] == 1
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+
+def test_bulk_update_by_filter(admin_token, reporter_token):
+    rows = [{"title": f"Bulk {i}", "description": "release"} for i in range(3)]
+    r = client.post("/api/issues/bulk", headers={"Authorization": f"Bearer {reporter_token}"}, json=rows)
+    assert r.json()["created"] == 3
+    mine = client.get("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, params={"limit": 1000}).json()
+    ids = [issue["id"] for issue in mine if issue["title"].startswith("Bulk ")]
+
+    payload = {"filter": {"ids": ids}, "changes": {"status": "DONE"}}
+    r = client.patch("/api/issues/bulk", headers={"Authorization": f"Bearer {reporter_token}"}, json=payload)
+    assert r.status_code == 403
+    r = client.patch("/api/issues/bulk", headers={"Authorization": f"Bearer {admin_token}"}, json=payload)
+    assert r.status_code == 200
+    assert r.json() == {"updated": len(ids)}
+    r = client.get("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, params={"status": "DONE", "limit": 1000})
+    assert set(ids) <= {issue["id"] for issue in r.json()}
+
+    r = client.patch("/api/issues/bulk", headers={"Authorization": f"Bearer {admin_token}"}, json={"filter": {}, "changes": {"status": "DONE"}})
+    assert r.status_code == 422
+
+def test_bulk_update_rejects_empty_criteria(admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    issue = client.post("/api/issues", headers=headers, json={"title": "Untouched", "description": "desc"}).json()
+    for criterion in ("ids", "status", "severity"):
+        r = client.patch("/api/issues/bulk", headers=headers, json={"filter": {criterion: []}, "changes": {"status": "DONE"}})
+        assert r.status_code == 422
+    r = client.get("/api/issues", headers=headers, params={"limit": 1000})
+    assert next(i for i in r.json() if i["id"] == issue["id"])["status"] == "OPEN"
+
+def test_issue_list_etag_and_invalidation(reporter_token):
+    headers = {"Authorization": f"Bearer {reporter_token}"}
+    client.post("/api/issues", headers=headers, json={"title": "Cached", "description": "desc"})
+    r = client.get("/api/issues", headers=headers, params={"limit": 1000})
+    etag = r.headers["ETag"]
+    assert client.get("/api/issues", headers=headers, params={"limit": 1000}).headers["ETag"] == etag
+
+    r = client.get("/api/issues", headers={**headers, "If-None-Match": etag}, params={"limit": 1000})
+    assert r.status_code == 304 and r.content == b""
+
+    # Creating an issue is broadcast through the manager, which drops cached pages
+    client.post("/api/issues", headers=headers, json={"title": "Cached 2", "description": "desc"})
+    r = client.get("/api/issues", headers={**headers, "If-None-Match": etag}, params={"limit": 1000})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert "Cached 2" in {issue["title"] for issue in r.json()}
+
+def _drain_changes(headers, cursor=None, limit=None):
+    issues, deleted = {}, set()
+    while True:
+        params = {k: v for k, v in {"cursor": cursor, "limit": limit}.items() if v is not None}
+        r = client.get("/api/issues/changes", headers=headers, params=params)
+        assert r.status_code == 200
+        page = r.json()
+        issues.update({issue["id"]: issue for issue in page["issues"]})
+        deleted.update(tombstone["issue_id"] for tombstone in page["deleted"])
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            return issues, deleted, cursor
+
+def test_change_feed_reports_updates_and_deletions(admin_token):
+    from datetime import datetime, timedelta
+    from app.pagination import encode_feed_cursor
+
+    email = f"feed-{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/register", json={"email": email, "password": "pass", "role": "REPORTER"})
+    headers = {"Authorization": f"Bearer {client.post('/api/auth/login', data={'email': email, 'password': 'pass'}).json()['access_token']}"}
+    kept = client.post("/api/issues", headers=headers, json={"title": "Feed 1", "description": "d"}).json()["id"]
+    removed = client.post("/api/issues", headers=headers, json={"title": "Feed 2", "description": "d"}).json()["id"]
+
+    issues, deleted, cursor = _drain_changes(headers, limit=1)
+    assert set(issues) == {kept, removed} and not deleted
+
+    client.put(f"/api/issues/{kept}", headers=headers, json={"title": "Feed 1 renamed"})
+    client.delete(f"/api/issues/{removed}", headers={"Authorization": f"Bearer {admin_token}"})
+    issues, deleted, _ = _drain_changes(headers, cursor)
+    assert issues[kept]["title"] == "Feed 1 renamed"
+    assert removed in deleted and removed not in issues
+
+    stale = datetime.utcnow() - timedelta(days=365)
+    r = client.get("/api/issues/changes", headers=headers, params={"cursor": encode_feed_cursor((stale, 0), (stale, 0))})
+    assert r.status_code == 410
+
+def test_fast_issue_serialization_matches_schema(reporter_token):
+    from sqlalchemy import select
+    from app.database import SessionLocal
+    from app.models import Issue
+    from app.schemas import Issue as IssueSchema
+    from app.serialization import ISSUE_COLUMNS, dump_issue_rows
+
+    client.post("/api/issues", headers={"Authorization": f"Bearer {reporter_token}"}, json={"title": "Fast ✓", "description": "Ünïcode \"quoted\""})
+    with SessionLocal() as db:
+        issues = db.scalars(select(Issue).order_by(Issue.id)).all()
+        rows = db.execute(select(*ISSUE_COLUMNS).order_by(Issue.id)).all()
+    expected = [IssueSchema.model_validate(issue).model_dump(mode="json") for issue in issues]
+    assert json.loads(dump_issue_rows(rows)) == expected
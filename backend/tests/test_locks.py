@@ -0,0 +1,15 @@
+from sqlalchemy import create_engine
+from app.locks import advisory_lock_key, try_lock
+
+def test_named_lock_excludes_other_holders_until_released(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'locks.db'}")
+    with try_lock(engine, "worker-job:aggregate") as first:
+        with try_lock(engine, "worker-job:aggregate") as second, try_lock(engine, "worker-job:prune") as other:
+            assert (first, second, other) == (True, False, True)
+    with try_lock(engine, "worker-job:aggregate") as again:
+        assert again
+
+def test_advisory_lock_keys_are_stable_64_bit_ints():
+    key = advisory_lock_key("worker-job:aggregate")
+    assert key == advisory_lock_key("worker-job:aggregate") != advisory_lock_key("worker-job:prune")
+    assert -2**63 <= key < 2**63
@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from backend.main import app
+
+client = TestClient(app)
+
+def _sample(text: str, prefix: str) -> float:
+    return sum(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(prefix))
+
+def test_requests_are_timed_by_route_with_query_counts():
+    admin = {"email": "metrics-admin@example.com", "password": "adminpass", "role": "ADMIN"}
+    client.post("/api/auth/register", json=admin)
+    token = client.post("/api/auth/login", data={"email": admin["email"], "password": admin["password"]}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    before = client.get("/metrics").text
+    issue_id = client.post("/api/issues", headers=headers, json={"title": "Metrics", "description": "d"}).json()["id"]
+    client.put(f"/api/issues/{issue_id}", headers=headers, json={"status": "TRIAGED"})
+    after = client.get("/metrics").text
+
+    assert _sample(after, "issue_created_total") == _sample(before, "issue_created_total") + 1
+    route = 'http_request_duration_seconds_count{method="PUT",route="/api/issues/{issue_id}",status="200"}'
+    assert _sample(after, route) == _sample(before, route) + 1
+    queries = 'db_queries_per_request_sum{route="/api/issues/{issue_id}"}'
+    assert _sample(after, queries) > _sample(before, queries)
+
+def test_repeated_selects_are_flagged_as_n_plus_one():
+    from sqlalchemy import select
+    from app.database import SessionLocal
+    from app.instrumentation import DB_N_PLUS_ONE_THRESHOLD, QueryStats, current_query_stats
+    from app.models import User
+
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        with SessionLocal() as db:
+            for user_id in range(DB_N_PLUS_ONE_THRESHOLD + 1):
+                db.execute(select(User).where(User.id == user_id)).first()
+    finally:
+        current_query_stats.reset(token)
+    assert stats.count >= DB_N_PLUS_ONE_THRESHOLD + 1
+    assert len(stats.repeated_selects()) == 1
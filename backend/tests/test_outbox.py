@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from backend.main import app
+from app.database import SessionLocal
+from app.models import OutboxEvent
+from app.outbox import OutboxDispatcher, add_event, prune_outbox
+from app.realtime import maintainers_envelope
+
+client = TestClient(app)
+
+def _headers(email: str, role: str) -> dict:
+    client.post("/api/auth/register", json={"email": email, "password": "outboxpass", "role": role})
+    token = client.post("/api/auth/login", data={"email": email, "password": "outboxpass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_reconnecting_socket_gets_missed_events_replayed_in_order():
+    reporter = _headers("outbox-reporter@example.com", "REPORTER")
+    url = "/notification?userid=outbox-maintainer&role=MAINTAINER"
+
+    with client.websocket_connect(url) as ws:
+        first = client.post("/api/issues", headers=reporter, json={"title": "Seen", "description": "d"}).json()
+        seen = ws.receive_json()
+    assert seen["issue_id"] == first["id"] and seen["seq"] > 0
+
+    # Committed while the maintainer was offline
+    missed = [client.post("/api/issues", headers=reporter, json={"title": f"Missed {i}", "description": "d"}).json()["id"]
+              for i in range(2)]
+
+    with client.websocket_connect(f"{url}&last_seq={seen['seq']}") as ws:
+        replayed = [ws.receive_json() for _ in missed]
+        live = client.post("/api/issues", headers=reporter, json={"title": "Live", "description": "d"}).json()
+        after = ws.receive_json()
+    assert [message["issue_id"] for message in replayed] == missed
+    assert seen["seq"] < replayed[0]["seq"] < replayed[1]["seq"] < after["seq"]
+    assert after["issue_id"] == live["id"]
+
+def test_socket_too_far_behind_is_told_to_resync():
+    with client.websocket_connect("/notification?userid=outbox-future&role=MAINTAINER&last_seq=999999999") as ws:
+        message = ws.receive_json()
+    assert message["type"] == "resync_required"
+
+def test_dispatcher_republishes_numbered_rows_and_numbers_new_ones_after_them():
+    with SessionLocal() as db, db.begin():
+        next_seq = (db.scalar(select(func.max(OutboxEvent.seq))) or 0) + 1
+        # Numbered by a dispatcher that died before marking it dispatched
+        db.add(OutboxEvent(seq=next_seq, payload='{"audience":"roles","roles":null,"message":{"type":"recovered"}}'))
+        add_event(db, maintainers_envelope({"type": "fresh"}))
+
+    published = []
+
+    async def publish(envelope):
+        published.append(envelope["message"])
+
+    dispatcher = OutboxDispatcher()
+    dispatcher.bind(publish)
+    asyncio.run(dispatcher.dispatch())
+
+    assert published[-2:] == [{"type": "recovered", "seq": next_seq}, {"type": "fresh", "seq": next_seq + 1}]
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).where(OutboxEvent.dispatched_at.is_(None))) == 0
+    assert asyncio.run(dispatcher.dispatch()) == 0
+
+def test_prune_keeps_recent_rows_and_the_latest_seq():
+    with SessionLocal() as db, db.begin():
+        latest = db.scalar(select(func.max(OutboxEvent.seq))) or 0
+        old = datetime.utcnow() - timedelta(days=365)
+        db.add_all([
+            OutboxEvent(seq=latest + 1, payload="{}", dispatched_at=old),
+            OutboxEvent(seq=latest + 2, payload="{}", dispatched_at=old),
+        ])
+    with SessionLocal() as db, db.begin():
+        prune_outbox(db)
+        remaining = set(db.scalars(select(OutboxEvent.seq).where(OutboxEvent.seq > latest)))
+    assert remaining == {latest + 2}
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+from backend.main import app
+
+client = TestClient(app)
+
+def _login(email: str, role: str) -> dict:
+    client.post("/api/auth/register", json={"email": email, "password": "profilepass", "role": role})
+    token = client.post("/api/auth/login", data={"email": email, "password": "profilepass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_sampled_requests_are_profiled_with_their_sql():
+    headers = _login("profile-admin@example.com", "ADMIN")
+    client.delete("/api/debug/profiles", headers=headers)
+    settings = client.put("/api/debug/profiling", headers=headers, json={"enabled": True, "sample_rate": 1}).json()
+    assert settings["enabled"] and settings["sample_rate"] == 1
+    try:
+        client.post("/api/issues", headers=headers, json={"title": "Profiled", "description": "d"})
+        client.get("/api/issues", headers=headers)
+    finally:
+        client.put("/api/debug/profiling", headers=headers, json={"enabled": False})
+
+    summaries = client.get("/api/debug/profiles", headers=headers).json()
+    assert [(summary["method"], summary["route"]) for summary in summaries] == [("GET", "/api/issues"), ("POST", "/api/issues")]
+    assert all(summary["reason"] == "sampled" for summary in summaries)
+
+    profile = client.get(f"/api/debug/profiles/{summaries[1]['id']}", headers=headers).json()
+    assert profile["status"] == 200
+    assert profile["sql_count"] == len(profile["sql"]) > 0
+    assert any(query["statement"].lstrip().upper().startswith("INSERT INTO ISSUES") for query in profile["sql"])
+
+    assert client.get("/api/debug/profiles/0", headers=headers).status_code == 404
+
+def test_profiles_are_admin_only():
+    headers = _login("profile-reporter@example.com", "REPORTER")
+    assert client.get("/api/debug/profiles", headers=headers).status_code == 403
+    assert client.put("/api/debug/profiling", headers=headers, json={"enabled": True}).status_code == 403
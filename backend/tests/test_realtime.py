@@ -1,7 +1,153 @@
-from fastapi.testclient import TestClient
-from backend.main import app
-
-def test_socketio_connect():
-    client = TestClient(app)
-    r = client.get("/socket.io/")
-    assert r.status_code in (200, 400, 404)  # 400/404 if not a websocket request, 200 if handled 
\ No newline at end of file
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from backend.main import app
+
+def test_socketio_connect():
+    client = TestClient(app)
+    r = client.get("/socket.io/")
+    assert r.status_code in (200, 400, 404)  # 400/404 if not a websocket request, 200 if handled 
+class FakeWebSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        self.closed = True
+
+def test_broadcast_evicts_slow_socket_without_delaying_others():
+    from app.realtime import ConnectionManager
+
+    async def scenario():
+        manager = ConnectionManager(send_timeout=0.05)
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=1)
+        await manager.connect(fast, "1", "ADMIN")
+        await manager.connect(slow, "2", "MAINTAINER")
+        await manager.notify_maintainers_and_admins({"type": "issue_created", "issue_id": 1})
+        # The notify call only schedules delivery
+        assert fast.sent == []
+        await manager.wait_for_deliveries()
+        return manager, fast, slow
+
+    manager, fast, slow = asyncio.run(scenario())
+    assert fast.sent == [{"type": "issue_created", "issue_id": 1}]
+    assert slow.sent == [] and slow.closed
+    assert "2" not in manager.by_user
+    assert "1" in manager.by_user
+
+def test_queued_issue_updates_are_coalesced():
+    from app.realtime import ConnectionManager
+
+    async def scenario():
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, "1", "ADMIN")
+        await manager.notify_maintainers_and_admins({"type": "issue_created", "issue_id": 7})
+        for status in ("TRIAGED", "IN_PROGRESS", "DONE"):
+            await manager.notify_maintainers_and_admins({"type": "issue_updated", "issue_id": 7, "status": status})
+        await manager.notify_maintainers_and_admins({"type": "issue_updated", "issue_id": 8, "status": "DONE"})
+        await manager.wait_for_deliveries()
+        return ws
+
+    ws = asyncio.run(scenario())
+    assert ws.sent == [
+        {"type": "issue_created", "issue_id": 7},
+        {"type": "issue_updated", "issue_id": 7, "status": "DONE"},
+        {"type": "issue_updated", "issue_id": 8, "status": "DONE"},
+    ]
+
+def test_outbound_queue_overflow_policies():
+    from app.realtime import ConnectionManager
+
+    async def scenario(policy):
+        manager = ConnectionManager(queue_size=2, overflow_policy=policy)
+        ws = FakeWebSocket()
+        await manager.connect(ws, "1", "ADMIN")
+        for i in range(4):
+            await manager.notify_all_users({"type": "issue_created", "issue_id": i})
+        await manager.wait_for_deliveries()
+        return manager, ws
+
+    manager, ws = asyncio.run(scenario("drop_oldest"))
+    assert [m["issue_id"] for m in ws.sent] == [2, 3]
+    assert "1" in manager.by_user
+
+    manager, ws = asyncio.run(scenario("disconnect"))
+    assert ws.closed
+    assert "1" not in manager.by_user
+
+def test_issue_created_reaches_maintainer_socket():
+    client = TestClient(app)
+    reporter = {"email": "ws-reporter@example.com", "password": "reppass", "role": "REPORTER"}
+    client.post("/api/auth/register", json=reporter)
+    r = client.post("/api/auth/login", data={"email": reporter["email"], "password": reporter["password"]})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    with client.websocket_connect("/api/ws?userid=ws-maintainer&role=MAINTAINER&email=m@example.com") as ws:
+        r = client.post("/api/issues", headers=headers, json={"title": "Live", "description": "desc"})
+        assert r.status_code == 200
+        message = ws.receive_json()
+    assert message["type"] == "issue_created"
+    assert message["issue_id"] == r.json()["id"]
+
+def test_registry_targets_roles_topics_and_multiple_sockets():
+    from app.realtime import ConnectionManager
+
+    async def scenario():
+        manager = ConnectionManager()
+        tab1, tab2, watcher, reporter = FakeWebSocket(), FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(tab1, "1", "ADMIN")
+        await manager.connect(tab2, "1", "ADMIN")
+        watching = await manager.connect(watcher, "2", "MAINTAINER", topics=["issue:5"])
+        await manager.connect(reporter, "3", "REPORTER", topics=["issue:9"])
+        await manager.notify_maintainers_and_admins({"type": "issue_created", "issue_id": 9})
+        await manager.notify_maintainers_and_admins({"type": "issue_updated", "issue_id": 5})
+        await manager.wait_for_deliveries()
+        manager.unsubscribe(watching, ["issue:5"])
+        await manager.notify_maintainers_and_admins({"type": "issue_created", "issue_id": 10})
+        await manager.wait_for_deliveries()
+        return tab1, tab2, watcher, reporter
+
+    tab1, tab2, watcher, reporter = asyncio.run(scenario())
+    assert [m["issue_id"] for m in tab1.sent] == [9, 5, 10]
+    assert tab2.sent == tab1.sent
+    assert [m["issue_id"] for m in watcher.sent] == [5, 10]
+    # Subscribing never widens a reporter's audience
+    assert reporter.sent == []
+
+def test_websocket_subscribe_frame():
+    client = TestClient(app)
+    with client.websocket_connect("/notification?userid=sub-user&role=MAINTAINER") as ws:
+        ws.send_text(json.dumps({"action": "subscribe", "topics": ["issue:3", "severity:high", "bogus"]}))
+        assert ws.receive_json() == {"type": "subscriptions", "topics": ["issue:3", "severity:HIGH"]}
+
+def test_bus_delivers_across_processes_to_local_sockets_only():
+    from app.pubsub import InMemoryBus
+    from app.realtime import ConnectionManager
+
+    async def scenario():
+        hub = set()
+        worker_a = ConnectionManager(bus=InMemoryBus(hub))
+        worker_b = ConnectionManager(bus=InMemoryBus(hub))
+        on_a, on_b, reporter_on_b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect(on_a, "1", "ADMIN")
+        await worker_b.connect(on_b, "2", "MAINTAINER")
+        await worker_b.connect(reporter_on_b, "3", "REPORTER")
+        # An issue created in worker A reaches sockets held by worker B once
+        await worker_a.notify_maintainers_and_admins({"type": "issue_created", "issue_id": 1})
+        await worker_a.notify_reporter({"type": "issue_updated", "issue_id": 1}, "3")
+        await worker_a.wait_for_deliveries()
+        await worker_b.wait_for_deliveries()
+        return on_a, on_b, reporter_on_b
+
+    on_a, on_b, reporter_on_b = asyncio.run(scenario())
+    assert on_a.sent == on_b.sent == [{"type": "issue_created", "issue_id": 1}]
+    assert reporter_on_b.sent == [{"type": "issue_updated", "issue_id": 1}]
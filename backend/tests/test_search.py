@@ -0,0 +1,46 @@
+import uuid
+from fastapi.testclient import TestClient
+from backend.main import app
+
+client = TestClient(app)
+
+# The test database persists between runs, so every run searches its own term
+RUN = f"run{uuid.uuid4().hex[:8]}"
+
+def _token(email, role):
+    client.post("/api/auth/register", json={"email": email, "password": "pass", "role": role})
+    r = client.post("/api/auth/login", data={"email": email, "password": "pass"})
+    return r.json()["access_token"]
+
+def test_search_ranks_highlights_and_paginates():
+    headers = {"Authorization": f"Bearer {_token(f'searcher-{RUN}@example.com', 'REPORTER')}"}
+    client.post("/api/issues", headers=headers, json={"title": f"Checkout crashes {RUN}", "description": "Payment <form> crashes on submit"})
+    client.post("/api/issues", headers=headers, json={"title": f"Slow dashboard {RUN}", "description": "Sometimes the checkout crashed too", "severity": "HIGH"})
+    client.post("/api/issues", headers=headers, json={"title": f"Unrelated {RUN}", "description": "nothing to see"})
+
+    r = client.get("/api/issues/search", headers=headers, params={"q": f"checkout crash {RUN}"})
+    assert r.status_code == 200
+    hits = r.json()
+    assert [hit["title"] for hit in hits] == [f"Checkout crashes {RUN}", f"Slow dashboard {RUN}"]
+    assert hits[0]["rank"] >= hits[1]["rank"]
+    assert "<mark>Checkout</mark>" in hits[0]["title_highlight"]
+    assert "&lt;form&gt;" in hits[0]["snippet"] and "<mark>crashes</mark>" in hits[0]["snippet"]
+
+    r = client.get("/api/issues/search", headers=headers, params={"q": f"checkout crash {RUN}", "limit": 1})
+    assert len(r.json()) == 1
+    r = client.get("/api/issues/search", headers=headers, params={"q": f"checkout crash {RUN}", "limit": 1, "cursor": r.headers["X-Next-Cursor"]})
+    assert [hit["title"] for hit in r.json()] == [f"Slow dashboard {RUN}"]
+
+    r = client.get("/api/issues/search", headers=headers, params={"q": f"checkout {RUN}", "severity": "HIGH"})
+    assert [hit["title"] for hit in r.json()] == [f"Slow dashboard {RUN}"]
+
+def test_search_is_scoped_and_tracks_edits():
+    owner = {"Authorization": f"Bearer {_token(f'owner-{RUN}@example.com', 'REPORTER')}"}
+    other = {"Authorization": f"Bearer {_token(f'other-{RUN}@example.com', 'REPORTER')}"}
+    issue_id = client.post("/api/issues", headers=owner, json={"title": f"Zebra stripes {RUN}", "description": "misaligned"}).json()["id"]
+    assert client.get("/api/issues/search", headers=other, params={"q": f"zebra {RUN}"}).json() == []
+
+    client.put(f"/api/issues/{issue_id}", headers=owner, json={"title": f"Giraffe spots {RUN}"})
+    assert client.get("/api/issues/search", headers=owner, params={"q": f"zebra {RUN}"}).json() == []
+    assert [hit["id"] for hit in client.get("/api/issues/search", headers=owner, params={"q": f"giraffe {RUN}"}).json()] == [issue_id]
+    assert client.get("/api/issues/search", headers=owner, params={"q": "\"*"}).status_code == 400
@@ -1,14 +1,52 @@
-from fastapi.testclient import TestClient
-from backend.main import app
-
-client = TestClient(app)
-
-def test_dashboard_stats():
-    # Register and login as admin
-    admin = {"email": "admin3@example.com", "password": "adminpass", "role": "ADMIN"}
-    client.post("/api/auth/register", json=admin)
-    r = client.post("/api/auth/login", data={"email": admin["email"], "password": admin["password"]})
-    token = r.json()["access_token"]
-    r = client.get("/api/stats/dashboard", headers={"Authorization": f"Bearer {token}"})
-    assert r.status_code == 200
-    assert isinstance(r.json(), list) 
\ No newline at end of file
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from backend.main import app
+
+client = TestClient(app)
+
+def test_dashboard_stats():
+    # Register and login as admin
+    admin = {"email": "admin3@example.com", "password": "adminpass", "role": "ADMIN"}
+    client.post("/api/auth/register", json=admin)
+    r = client.post("/api/auth/login", data={"email": admin["email"], "password": admin["password"]})
+    token = r.json()["access_token"]
+    r = client.get("/api/stats/dashboard", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    assert isinstance(r.json(), list) 
+def test_dashboard_stats_track_issue_changes():
+    admin = {"email": "admin3@example.com", "password": "adminpass", "role": "ADMIN"}
+    client.post("/api/auth/register", json=admin)
+    r = client.post("/api/auth/login", data={"email": admin["email"], "password": admin["password"]})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    def today():
+        r = client.get("/api/stats/dashboard", headers=headers, params={"start": datetime.utcnow().date().isoformat()})
+        assert r.status_code == 200
+        return r.json()[-1]
+
+    before = today()
+    r = client.post("/api/issues", headers=headers, json={"title": "Stats", "description": "desc"})
+    issue_id = r.json()["id"]
+    after_create = today()
+    assert after_create["total_issues"] == before["total_issues"] + 1
+    assert after_create["open_issues"] == before["open_issues"] + 1
+
+    client.put(f"/api/issues/{issue_id}", headers=headers, json={"status": "DONE"})
+    after_close = today()
+    assert after_close["open_issues"] == before["open_issues"]
+    assert after_close["closed_issues"] == before["closed_issues"] + 1
+
+    client.delete(f"/api/issues/{issue_id}", headers=headers)
+    assert today() == before
+
+def test_rebuild_daily_stats_matches_incremental_rollups():
+    from app.database import SessionLocal
+    from app.stats import get_daily_stats, rebuild_daily_stats
+
+    today = datetime.utcnow().date()
+    with SessionLocal() as db:
+        incremental = get_daily_stats(db, today, today)
+    with SessionLocal() as db, db.begin():
+        rebuild_daily_stats(db, today, today + timedelta(days=1))
+    with SessionLocal() as db:
+        assert get_daily_stats(db, today, today) == incremental
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from backend.main import app
+from app.database import SessionLocal
+from app.models import IssueSeverity, IssueStatus, IssueTransition
+from app.transitions import (
+    RESOLUTION, TIME_IN_STATUS, _duration_samples, aggregate_transitions, bucket_value, duration_bucket,
+    get_status_durations, histogram_percentile,
+)
+
+client = TestClient(app)
+
+def _headers(email: str, role: str) -> dict:
+    client.post("/api/auth/register", json={"email": email, "password": "historypass", "role": role})
+    token = client.post("/api/auth/login", data={"email": email, "password": "historypass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _aggregate_all():
+    later = datetime.utcnow() + timedelta(hours=1)
+    while True:
+        with SessionLocal() as db, db.begin():
+            if aggregate_transitions(db, now=later) == 0:
+                return
+
+def test_issue_changes_are_recorded_and_rolled_up():
+    admin = _headers("history-admin@example.com", "ADMIN")
+    _aggregate_all()
+    today = datetime.utcnow().date()
+    with SessionLocal() as db:
+        before = get_status_durations(db, today, today, [IssueSeverity.CRITICAL])
+        # SQLite may hand out a deleted issue's id again; its history stays
+        first_id = (db.scalar(select(func.max(IssueTransition.id))) or 0) + 1
+
+    issue_id = client.post("/api/issues", headers=admin, json={"title": "History", "description": "d"}).json()["id"]
+    client.put(f"/api/issues/{issue_id}", headers=admin, json={"status": "TRIAGED"})
+    client.put(f"/api/issues/{issue_id}", headers=admin, json={"severity": "CRITICAL"})
+    client.put(f"/api/issues/{issue_id}", headers=admin, json={"title": "Renamed"})
+    r = client.patch("/api/issues/bulk", headers=admin, json={"filter": {"ids": [issue_id]}, "changes": {"status": "DONE"}})
+    assert r.json() == {"updated": 1}
+
+    with SessionLocal() as db:
+        rows = db.scalars(select(IssueTransition).where(
+            IssueTransition.issue_id == issue_id, IssueTransition.id >= first_id
+        ).order_by(IssueTransition.id)).all()
+    assert [(row.from_status, row.to_status, row.to_severity) for row in rows] == [
+        (None, IssueStatus.OPEN, IssueSeverity.LOW),
+        (IssueStatus.OPEN, IssueStatus.TRIAGED, IssueSeverity.LOW),
+        (IssueStatus.TRIAGED, IssueStatus.TRIAGED, IssueSeverity.CRITICAL),
+        (IssueStatus.TRIAGED, IssueStatus.DONE, IssueSeverity.CRITICAL),
+    ]
+
+    _aggregate_all()
+    with SessionLocal() as db:
+        after = get_status_durations(db, today, today, [IssueSeverity.CRITICAL])
+
+    def count(result, kind, status):
+        summaries = result.time_in_status if kind == TIME_IN_STATUS else result.resolution
+        return sum(s.count for s in summaries if s.status == status)
+
+    # The TRIAGED stint ended as CRITICAL; the OPEN one ended while still LOW
+    assert count(after, TIME_IN_STATUS, IssueStatus.TRIAGED) == count(before, TIME_IN_STATUS, IssueStatus.TRIAGED) + 1
+    assert count(after, TIME_IN_STATUS, IssueStatus.OPEN) == count(before, TIME_IN_STATUS, IssueStatus.OPEN)
+    assert count(after, RESOLUTION, IssueStatus.DONE) == count(before, RESOLUTION, IssueStatus.DONE) + 1
+
+    r = client.get("/api/stats/status-durations", headers=admin, params={"start": today.isoformat(), "severity": "CRITICAL"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["resolution_by_day"][-1]["date"] == today.isoformat()
+    assert body["resolution_by_day"][-1]["severity"] == "CRITICAL"
+    assert all(s["severity"] == "CRITICAL" for s in body["time_in_status"])
+
+def test_stints_span_severity_changes_and_reopens():
+    start = datetime(2025, 1, 1)
+    def row(id, minutes, from_status, to_status, from_severity=IssueSeverity.LOW, to_severity=IssueSeverity.LOW):
+        return SimpleNamespace(id=id, created_at=start, changed_at=start + timedelta(minutes=minutes),
+                               from_status=from_status, to_status=to_status,
+                               from_severity=None if from_status is None else from_severity, to_severity=to_severity)
+    history = [
+        row(1, 0, None, IssueStatus.OPEN),
+        row(2, 10, IssueStatus.OPEN, IssueStatus.OPEN, IssueSeverity.LOW, IssueSeverity.HIGH),
+        row(3, 30, IssueStatus.OPEN, IssueStatus.DONE, IssueSeverity.HIGH, IssueSeverity.HIGH),
+        row(4, 90, IssueStatus.DONE, IssueStatus.OPEN, IssueSeverity.HIGH, IssueSeverity.HIGH),
+        row(5, 100, IssueStatus.OPEN, IssueStatus.DONE, IssueSeverity.HIGH, IssueSeverity.HIGH),
+    ]
+    samples = [(kind, status, severity, seconds) for _, kind, status, severity, seconds in _duration_samples(history, 2)]
+    assert samples == [
+        (TIME_IN_STATUS, IssueStatus.OPEN, IssueSeverity.HIGH, 30 * 60),
+        (RESOLUTION, IssueStatus.DONE, IssueSeverity.HIGH, 30 * 60),
+        (TIME_IN_STATUS, IssueStatus.DONE, IssueSeverity.HIGH, 60 * 60),
+        (TIME_IN_STATUS, IssueStatus.OPEN, IssueSeverity.HIGH, 10 * 60),
+        (RESOLUTION, IssueStatus.DONE, IssueSeverity.HIGH, 100 * 60),
+    ]
+
+def test_histogram_percentiles_are_within_bucket_error():
+    durations = [60 * (i + 1) for i in range(1000)]
+    histogram = {}
+    for seconds in durations:
+        bucket = duration_bucket(seconds)
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    for q in (0.5, 0.9, 0.99):
+        exact = durations[int(q * len(durations)) - 1]
+        assert abs(histogram_percentile(histogram, q) - exact) / exact < 0.1
+    assert histogram_percentile({}, 0.5) is None
+    assert duration_bucket(10 ** 12) == duration_bucket(10 ** 13)
+    assert bucket_value(duration_bucket(3600)) == bucket_value(duration_bucket(3700))
@@ -0,0 +1,154 @@
+"""
+Job runtime for the worker: several interval jobs on a bounded thread pool,
+safe to run in more than one replica.
+
+Every replica schedules every job.  When a run is due, the replica first
+takes the job's cross-process lock (app.locks: Postgres advisory lock, or a
+file lock on SQLite) and skips the run if another replica holds it.  Under
+the lock it checks the job's row in `worker_jobs`: if any replica started the
+job less than WORKER_RUN_SLACK of an interval ago, this run is a duplicate and
+is skipped too.  The row also records each run's outcome and duration, so the
+history survives restarts and is shared by all replicas.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+import os
+import time
+import traceback
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.blocking import BlockingScheduler
+from sqlalchemy.orm import sessionmaker
+
+from app.locks import try_lock
+from app.models import WorkerJob
+from app.metrics import (
+    export_worker_metrics, worker_job_duration, worker_job_failures_counter, worker_job_lag,
+    worker_job_last_success, worker_job_skipped_counter, worker_jobs_running,
+)
+
+# Jobs executed at the same time by one replica
+WORKER_MAX_THREADS = int(os.getenv("WORKER_MAX_THREADS", "4"))
+# A run is skipped if the job started less than this fraction of its interval ago
+WORKER_RUN_SLACK = float(os.getenv("WORKER_RUN_SLACK", "0.5"))
+# Seconds a run may start late (e.g. after a pause) before it is counted as missed
+WORKER_MISFIRE_GRACE = int(os.getenv("WORKER_MISFIRE_GRACE", "300"))
+
+class JobRuntime:
+    """Registry of interval jobs plus the scheduler and pool that run them"""
+
+    def __init__(self, engine, max_threads: int = WORKER_MAX_THREADS):
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine)
+        self.jobs: Dict[str, Callable[[], None]] = {}
+        self.intervals: Dict[str, timedelta] = {}
+        self.scheduler = BlockingScheduler(
+            executors={"default": ThreadPoolExecutor(max_threads)},
+            # A job never overlaps itself; runs missed while busy collapse into one
+            job_defaults={"max_instances": 1, "coalesce": True, "misfire_grace_time": WORKER_MISFIRE_GRACE},
+        )
+        self.scheduler.add_listener(self._on_submitted, EVENT_JOB_SUBMITTED)
+        self.scheduler.add_listener(self._on_not_run, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+
+    def job(self, name: str, **interval):
+        """Register the decorated function to run every `interval` (weeks/days/hours/minutes/seconds)"""
+        def decorator(fn):
+            self.jobs[name] = fn
+            self.intervals[name] = timedelta(**interval)
+            self.scheduler.add_job(self.run, "interval", args=[name], id=name, name=name, **interval)
+            return fn
+        return decorator
+
+    def start(self):
+        self._load_last_success()
+        self.scheduler.start()
+
+    def _load_last_success(self):
+        """Seed the last-success gauges from the shared job table"""
+        with self.Session() as session:
+            for job in session.query(WorkerJob).filter(WorkerJob.name.in_(list(self.jobs))):
+                if job.last_success_at is not None:
+                    worker_job_last_success.labels(job=job.name).set((job.last_success_at - datetime(1970, 1, 1)).total_seconds())
+
+    def _on_submitted(self, event):
+        if event.scheduled_run_times:
+            lag = datetime.now(event.scheduled_run_times[0].tzinfo) - event.scheduled_run_times[0]
+            worker_job_lag.labels(job=event.job_id).set(max(lag.total_seconds(), 0))
+
+    def _on_not_run(self, event):
+        reason = "overlap" if event.code == EVENT_JOB_MAX_INSTANCES else "missed"
+        worker_job_skipped_counter.labels(job=event.job_id, reason=reason).inc()
+        print(f"Job {event.job_id} not run: {reason}")
+
+    def run(self, name: str, force: bool = False) -> Optional[bool]:
+        """Run one job under its lock; True/False for success/failure, None if skipped.
+
+        `force` ignores the recently-run check (still never runs concurrently).
+        """
+        with try_lock(self.engine, f"worker-job:{name}") as acquired:
+            if not acquired:
+                worker_job_skipped_counter.labels(job=name, reason="locked").inc()
+                print(f"Job {name} skipped: running in another replica")
+                return None
+            if not self._claim(name, force):
+                worker_job_skipped_counter.labels(job=name, reason="recent").inc()
+                print(f"Job {name} skipped: already run by another replica")
+                return None
+            return self._execute(name)
+
+    def _claim(self, name: str, force: bool) -> bool:
+        now = datetime.utcnow()
+        with self.Session() as session, session.begin():
+            job = session.get(WorkerJob, name)
+            if job is None:
+                job = WorkerJob(name=name, runs=0, failures=0)
+                session.add(job)
+            elif (
+                not force
+                and job.last_started_at is not None
+                and now - job.last_started_at < self.intervals[name] * WORKER_RUN_SLACK
+            ):
+                return False
+            job.last_started_at = now
+        return True
+
+    def _execute(self, name: str) -> bool:
+        error = None
+        worker_jobs_running.labels(job=name).inc()
+        started = time.perf_counter()
+        try:
+            self.jobs[name]()
+        except Exception as e:
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            worker_job_failures_counter.labels(job=name).inc()
+            print(f"Error in job {name}: {e}")
+            traceback.print_exc()
+        finally:
+            duration = time.perf_counter() - started
+            worker_jobs_running.labels(job=name).dec()
+            worker_job_duration.labels(job=name).observe(duration)
+        if error is None:
+            worker_job_last_success.labels(job=name).set_to_current_time()
+        self._record(name, duration, error)
+        try:
+            export_worker_metrics()
+        except Exception as e:
+            print(f"Error exporting worker metrics: {e}")
+        return error is None
+
+    def _record(self, name: str, duration: float, error: Optional[str]):
+        now = datetime.utcnow()
+        try:
+            with self.Session() as session, session.begin():
+                job = session.get(WorkerJob, name)
+                job.last_finished_at = now
+                job.last_duration_seconds = duration
+                job.last_status = "failed" if error else "succeeded"
+                job.last_error = error
+                job.runs = (job.runs or 0) + 1
+                if error:
+                    job.failures = (job.failures or 0) + 1
+                else:
+                    job.last_success_at = now
+        except Exception as e:
+            print(f"Error recording run of job {name}: {e}")
@@ -1,51 +1,108 @@
-import os
-import sys
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime, date
-from apscheduler.schedulers.blocking import BlockingScheduler
-
-# Add backend to Python path
-backend_path = os.path.join(os.path.dirname(__file__), '..', 'backend')
-if os.path.exists(backend_path):
-    sys.path.insert(0, backend_path)
-
-try:
-    from app.models import Base, Issue, IssueStatus, DailyStats
-    from app.database import DATABASE_URL
-except ImportError:
-    # Fallback for Docker environment
-    sys.path.append('/app/backend')
-    from app.models import Base, Issue, IssueStatus, DailyStats
-    from app.database import DATABASE_URL
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
-
-scheduler = BlockingScheduler()
-
-@scheduler.scheduled_job('interval', minutes=30)
-def aggregate_daily_stats():
-    try:
-        session = SessionLocal()
-        today = date.today()
-        for status in IssueStatus:
-            count = session.query(func.count(Issue.id)).filter(
-                Issue.status == status,
-                func.date(Issue.created_at) == today
-            ).scalar()
-            stat = session.query(DailyStats).filter_by(date=today, status=status).first()
-            if stat:
-                stat.count = count
-            else:
-                stat = DailyStats(date=today, status=status, count=count)
-                session.add(stat)
-        session.commit()
-        session.close()
-        print(f"Aggregated daily stats for {today}")
-    except Exception as e:
-        print(f"Error aggregating stats: {e}")
-
-if __name__ == "__main__":
-    print("Starting worker...")
-    scheduler.start() 
\ No newline at end of file
+import os
+import sys
+import argparse
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime, date, timedelta
+
+# Add backend to Python path
+backend_path = os.path.join(os.path.dirname(__file__), '..', 'backend')
+if os.path.exists(backend_path):
+    sys.path.insert(0, backend_path)
+
+try:
+    from app.models import Base, Issue, IssueStatus, DailyStats
+    from app.database import create_db_engine
+    from app.stats import rebuild_daily_stats
+    from app.changes import prune_tombstones
+    from app.outbox import prune_outbox
+    from app.attachments import prune_unreferenced_blobs
+    from app.transitions import TRANSITION_STATS_BATCH_SIZE, aggregate_transitions
+    from runtime import JobRuntime
+except ImportError:
+    # Fallback for Docker environment
+    sys.path.append('/app/backend')
+    from app.models import Base, Issue, IssueStatus, DailyStats
+    from app.database import create_db_engine
+    from app.stats import rebuild_daily_stats
+    from app.changes import prune_tombstones
+    from app.outbox import prune_outbox
+    from app.attachments import prune_unreferenced_blobs
+    from app.transitions import TRANSITION_STATS_BATCH_SIZE, aggregate_transitions
+    from runtime import JobRuntime
+
+# Days re-aggregated by the periodic job, counting today
+STATS_RECONCILE_DAYS = int(os.getenv("STATS_RECONCILE_DAYS", "2"))
+# Days rebuilt per transaction when backfilling
+STATS_BACKFILL_CHUNK_DAYS = int(os.getenv("STATS_BACKFILL_CHUNK_DAYS", "31"))
+
+engine = create_db_engine(name="worker")
+SessionLocal = sessionmaker(bind=engine)
+
+runtime = JobRuntime(engine)
+
+def backfill_daily_stats(start: date, end: date, chunk_days: int = STATS_BACKFILL_CHUNK_DAYS):
+    """Rebuild the daily rollups for [start, end] in chunks, one short transaction per chunk"""
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), end + timedelta(days=1))
+        with SessionLocal() as session, session.begin():
+            rebuild_daily_stats(session, chunk_start, chunk_end)
+        print(f"Aggregated daily stats for {chunk_start} to {chunk_end - timedelta(days=1)}")
+        chunk_start = chunk_end
+
+@runtime.job("aggregate_daily_stats", minutes=30)
+def aggregate_daily_stats():
+    today = datetime.utcnow().date()
+    backfill_daily_stats(today - timedelta(days=STATS_RECONCILE_DAYS - 1), today)
+
+@runtime.job("aggregate_status_durations", minutes=5)
+def aggregate_status_durations():
+    total = 0
+    while True:
+        with SessionLocal() as session, session.begin():
+            consumed = aggregate_transitions(session)
+        total += consumed
+        if consumed < TRANSITION_STATS_BATCH_SIZE:
+            break
+    print(f"Aggregated {total} issue transitions")
+
+@runtime.job("prune_deleted_issues", hours=6)
+def prune_deleted_issues():
+    with SessionLocal() as session, session.begin():
+        removed = prune_tombstones(session)
+    print(f"Pruned {removed} change-feed tombstones")
+
+@runtime.job("prune_outbox", hours=1)
+def prune_outbox_events():
+    with SessionLocal() as session, session.begin():
+        removed = prune_outbox(session)
+    print(f"Pruned {removed} dispatched outbox events")
+
+@runtime.job("prune_attachment_blobs", hours=24)
+def prune_attachment_blobs():
+    with SessionLocal() as session:
+        removed = prune_unreferenced_blobs(session)
+    print(f"Removed {removed} unreferenced attachment blobs")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Issues & Insights Tracker worker")
+    subparsers = parser.add_subparsers(dest="command")
+    backfill = subparsers.add_parser("backfill", help="Rebuild daily stats for a date range and exit")
+    backfill.add_argument("start", type=date.fromisoformat)
+    backfill.add_argument("end", type=date.fromisoformat)
+    backfill.add_argument("--chunk-days", type=int, default=STATS_BACKFILL_CHUNK_DAYS)
+    run = subparsers.add_parser("run", help="Run one job now (under its lock) and exit")
+    run.add_argument("job", choices=sorted(runtime.jobs))
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        backfill_daily_stats(args.start, args.end, args.chunk_days)
+        return
+    if args.command == "run":
+        sys.exit(0 if runtime.run(args.job, force=True) is not False else 1)
+
+    print(f"Starting worker with jobs: {', '.join(sorted(runtime.jobs))}")
+    runtime.start()
+
+if __name__ == "__main__":
+    main()